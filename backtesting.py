@@ -0,0 +1,158 @@
+import os
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from classicalforecast import METHOD_FUNCTIONS, METHODS as CLASSICAL_METHODS
+from windowing import ape
+from instrumentation import timed
+
+# -------------------- CONFIG --------------------
+GLOBAL_LSTM = "Global LSTM"
+BACKTEST_METHODS = CLASSICAL_METHODS + [GLOBAL_LSTM]
+LSTM_TIME_STEPS = 8
+LSTM_MAX_EPOCHS = 30
+LSTM_MAX_SECONDS = 60
+
+# Worker-side view of the shared (members x weeks) matrix and its windows
+_shared = {}
+
+
+# -------------------- ORIGINS --------------------
+def rolling_origins(n_weeks, horizon, n_origins=6, step=4, min_train=26):
+    """Forecast origins (first unseen week) spaced `step` weeks apart, latest last."""
+    last = n_weeks - horizon
+    origins = [last - k * step for k in range(n_origins)]
+    return sorted(o for o in origins if o >= min_train)
+
+
+# -------------------- WORKERS --------------------
+def _attach(shm_name, shape, dtype):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _use(np.ndarray(shape, dtype=dtype, buffer=shm.buf), shm)
+
+
+def _use(Y, shm=None):
+    Y.setflags(write=False)
+    _shared.update(shm=shm, Y=Y, windows={})
+
+
+def _windows(time_steps):
+    """All (series, window) slices of the shared matrix, built once per worker as a strided view."""
+    if time_steps not in _shared["windows"]:
+        _shared["windows"][time_steps] = np.lib.stride_tricks.sliding_window_view(
+            _shared["Y"], time_steps + 1, axis=1
+        )  # (N, T - ts, ts + 1), no copy
+    return _shared["windows"][time_steps]
+
+
+def _lstm_fold(origin, horizon):
+    from forecastmodels import build_lstm, forecast_recursive
+    from trainingcontrol import TrainingBudget, train_with_budget
+
+    Y = _shared["Y"]
+    ts = LSTM_TIME_STEPS
+    history = Y[:, :origin]
+    col_min = history.min(axis=1)
+    col_range = np.where(history.max(axis=1) > col_min, history.max(axis=1) - col_min, 1.0)
+
+    # Windows whose target lies before the origin; the strided view is shared across folds
+    windows = _windows(ts)[:, :max(origin - ts, 0)]
+    samples = (windows - col_min[:, None, None]) / col_range[:, None, None]
+    samples = samples.reshape(-1, ts + 1)
+
+    model = build_lstm(ts)
+    train_with_budget(
+        model, samples[:, :ts, None], samples[:, ts],
+        TrainingBudget(max_epochs=LSTM_MAX_EPOCHS, max_seconds=LSTM_MAX_SECONDS, patience=5)
+    )
+    last = (history[:, -ts:] - col_min[:, None]) / col_range[:, None]
+    return forecast_recursive(model, last, horizon) * col_range[:, None] + col_min[:, None]
+
+
+def _run_fold(method, origin, horizon):
+    if method == GLOBAL_LSTM:
+        pred = _lstm_fold(origin, horizon)
+    else:
+        pred = METHOD_FUNCTIONS[method](_shared["Y"][:, :origin], horizon)
+    return method, origin, np.asarray(pred, dtype=np.float32)
+
+
+# -------------------- BACKTEST --------------------
+def accuracy_table(Y, members, dates, results, horizon):
+    """Long method x member x origin x horizon table with compact dtypes."""
+    frames = []
+    for method, origin, pred in results:
+        actual = Y[:, origin:origin + horizon].astype(np.float32)
+        n_members, n_h = pred.shape
+        with np.errstate(invalid="ignore"):
+            errors = ape(actual, pred)
+        frames.append(pd.DataFrame({
+            "method": np.repeat(method, n_members * n_h),
+            "member": np.repeat(np.asarray(members), n_h),
+            "origin": np.repeat(dates[origin], n_members * n_h),
+            "horizon": np.tile(np.arange(1, n_h + 1, dtype=np.int16), n_members),
+            "actual": actual.ravel(),
+            "forecast": pred.ravel(),
+            "ape": errors.ravel().astype(np.float32),
+        }))
+    table = pd.concat(frames, ignore_index=True)
+    for col in ["method", "member"]:
+        table[col] = table[col].astype("category")
+    return table
+
+
+@timed()
+def run_backtest(Y, members, dates, horizon=12, methods=CLASSICAL_METHODS, n_origins=6, step=4,
+                 max_workers=None):
+    """
+    Evaluate each method from several rolling origins on a (members x weeks) matrix.
+
+    Every (method, origin) fold runs in a process pool. The matrix lives in shared
+    memory, so workers slice training histories and LSTM windows from the same
+    buffer instead of receiving or rebuilding copies per fold. With a single
+    worker the folds run inline on the matrix itself.
+    """
+    Y = np.ascontiguousarray(Y, dtype=np.float64)
+    origins = rolling_origins(Y.shape[1], horizon, n_origins, step)
+    if not origins:
+        raise ValueError(f"Not enough weeks ({Y.shape[1]}) to backtest a {horizon}-week horizon.")
+    folds = [(method, origin) for method in methods for origin in origins]
+
+    max_workers = max_workers or min(len(folds), os.cpu_count() or 1)
+    if max_workers == 1:
+        _use(Y.view())
+        try:
+            results = [_run_fold(method, origin, horizon) for method, origin in folds]
+        finally:
+            _shared.clear()
+        return accuracy_table(Y, members, dates, results, horizon)
+
+    shm = shared_memory.SharedMemory(create=True, size=Y.nbytes)
+    try:
+        np.ndarray(Y.shape, dtype=Y.dtype, buffer=shm.buf)[:] = Y
+        with ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=mp.get_context("spawn"),
+            initializer=_attach, initargs=(shm.name, Y.shape, Y.dtype)
+        ) as pool:
+            futures = [pool.submit(_run_fold, method, origin, horizon) for method, origin in folds]
+            results = [f.result() for f in futures]
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return accuracy_table(Y, members, dates, results, horizon)
+
+
+def summarize_backtest(table):
+    """MAPE by method x horizon, and the best method per member over all origins/horizons."""
+    by_horizon = table.pivot_table(index="horizon", columns="method", values="ape", aggfunc="mean", observed=True)
+    by_member = table.pivot_table(index="member", columns="method", values="ape", aggfunc="mean", observed=True)
+    by_horizon.columns = by_horizon.columns.astype(str)
+    by_member.columns = by_member.columns.astype(str)
+    by_member.index = by_member.index.astype(str)
+    best = by_member.idxmin(axis=1).rename("Best Method")
+    return by_horizon, by_member.join(best)
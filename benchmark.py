@@ -0,0 +1,411 @@
+import os
+import gc
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import plotly.graph_objects as go
+
+from datastore import (
+    build_cache, cache_path, base_files, iter_chunks, date_range, load_dataset, file_fingerprint, streaming_enabled,
+    DATE_COL
+)
+from timeseriescube import build_cube, build_cube_chunked, CUBE_LEVELS, SUM_MEASURES, MEAN_MEASURES
+from ingestion import build_stats, build_stats_partitioned, STATS_COLUMNS
+from inventorypolicy import PolicyGrid, cube_demand_stats
+from inventorysim import daily_demand_stats, lead_time_pmf_from_counts, reorder_policy, NormalDemand, run_simulation
+from segmentation import segment
+from statreport import TestData, TESTS, TEST_COLUMNS
+from forecastpipeline import forecast_single_series
+from forecastmodels import rolling_mean
+from classicalforecast import fit_classical
+from hierarchy import Hierarchy, BottomForecast, reconcile_forecast, MINT
+from modelregistry import ModelRegistry
+from trainingcontrol import TrainingBudget
+from datagenerator import write_dataset
+from chartdata import add_line, histogram_figure
+from instrumentation import rss_mb, peak_rss_mb, reset_peak_rss
+
+# -------------------- CONFIG --------------------
+SCALES = {"250k": 250_000, "2.5M": 2_500_000, "25M": 25_000_000}
+DEFAULT_SCALES = ["250k", "2.5M"]
+BENCH_DIR = os.environ.get("SCM_BENCH_DIR", os.path.join(tempfile.gettempdir(), "scm_bench"))
+BASELINE_PATH = "benchmark_baseline.json"
+BENCH_DAYS = 629           # calendar of the original dataset; SKUs and customers grow with the row count
+ROWS_PER_CUSTOMER = 5_000
+SEED = 0
+
+TIME_TOLERANCE = 0.25      # slower than baseline by more than this fraction is a regression...
+MIN_TIME_DELTA = 0.05      # ...and by more than this many seconds (timer noise on tiny cases)
+MEMORY_TOLERANCE = 0.25
+MIN_MEMORY_DELTA = 32.0    # MB
+
+SIM_PATHS = 1_000
+SIM_DAYS = 30
+FORECAST_TIME_STEPS = 4
+FORECAST_EPOCHS = 5
+
+
+# -------------------- MEASUREMENT --------------------
+def measure(prepare, rows, repeat=1):
+    """
+    Run a case `repeat` times: prepare() (not timed) returns the callable to
+    time. Reports the best wall time, the peak RSS of this process during the
+    slowest-memory run (absolute and above the RSS at start; spawn workers are
+    not included) and rows per second at the best time.
+    """
+    walls, peaks, deltas = [], [], []
+    for _ in range(repeat):
+        run = prepare()
+        gc.collect()
+        reset_peak_rss()
+        start_rss = rss_mb() or 0.0
+        start = time.perf_counter()
+        run()
+        walls.append(time.perf_counter() - start)
+        peak = peak_rss_mb()
+        peaks.append(peak)
+        deltas.append(max(peak - start_rss, 0.0))
+        del run
+    wall = min(walls)
+    return {
+        "wall_s": wall,
+        "peak_rss_mb": max(peaks),
+        "peak_delta_mb": max(deltas),
+        "rows_per_s": rows / wall if wall > 0 else float("inf"),
+    }
+
+
+# -------------------- DATASETS --------------------
+def dataset_path(scale, seed=SEED, bench_dir=BENCH_DIR):
+    """Synthetic CSV for a scale, generated once (datagenerator) and reused by later runs."""
+    rows = SCALES[scale]
+    path = os.path.join(bench_dir, f"supply_chain-{scale}-seed{seed}.csv")
+    if not os.path.exists(path):
+        os.makedirs(bench_dir, exist_ok=True)
+        write_dataset(
+            path + ".tmp.csv", n_skus=max(1, rows // BENCH_DAYS), n_customers=max(50, rows // ROWS_PER_CUSTOMER),
+            n_days=BENCH_DAYS, seed=seed
+        )
+        os.replace(path + ".tmp.csv", path)
+    return path
+
+
+# -------------------- CONTEXT --------------------
+class BenchContext:
+    """
+    Inputs the cases share for one dataset, built on first use and outside
+    the timed region: the columnar cache, the cube, the running statistics and
+    the statistical tests' shared arrays. Built the way the pages build them
+    (streaming above the size threshold).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.fingerprint = file_fingerprint(path)
+        self.streaming = streaming_enabled(path)
+        self._cache = {}
+
+    def _get(self, name, build):
+        if name not in self._cache:
+            self._cache[name] = build()
+        return self._cache[name]
+
+    def load(self, columns=None):
+        """Rows read from the columnar cache."""
+        return load_dataset(columns=columns, path=self.path)
+
+    @property
+    def parquet_paths(self):
+        return self._get("parquet_paths", lambda: base_files(self.path, self.fingerprint))
+
+    @property
+    def n_rows(self):
+        return self._get("n_rows", lambda: sum(pq.ParquetFile(p).metadata.num_rows for p in self.parquet_paths))
+
+    def build_cube(self):
+        columns = [DATE_COL] + CUBE_LEVELS + SUM_MEASURES + MEAN_MEASURES
+        if self.streaming:
+            start, end = date_range(self.parquet_paths)
+            return build_cube_chunked(iter_chunks(self.parquet_paths, columns), start, end)
+        return build_cube(self.load(columns))
+
+    def build_stats(self):
+        if self.streaming:
+            return build_stats_partitioned(list(self.parquet_paths))
+        return build_stats(self.load(STATS_COLUMNS))
+
+    @property
+    def cube(self):
+        return self._get("cube", self.build_cube)
+
+    @property
+    def stats(self):
+        return self._get("stats", self.build_stats)
+
+    def test_data(self, approximate=False):
+        if approximate:
+            return self._get("test_data_approx", lambda: TestData(None, self.stats))
+        return self._get("test_data", lambda: TestData(self.load(TEST_COLUMNS), self.stats))
+
+
+# -------------------- CASES --------------------
+# Each case takes the context, does its untimed setup and returns the callable to time.
+def _csv_to_parquet(ctx):
+    target = cache_path(ctx.path, ctx.fingerprint)
+    if os.path.exists(target):
+        os.remove(target)
+    return lambda: build_cache(ctx.path, ctx.fingerprint)
+
+
+def _columnar_load(ctx):
+    ctx.parquet_paths
+    if ctx.streaming:
+        # Above the threshold the pages never hold every row; time one streamed pass instead
+        return lambda: sum(len(chunk) for chunk in iter_chunks(ctx.parquet_paths))
+    return lambda: ctx.load()
+
+
+def _cube_build(ctx):
+    ctx.parquet_paths
+    return ctx.build_cube
+
+
+def _stats_build(ctx):
+    ctx.parquet_paths
+    return ctx.build_stats
+
+
+def _forecast_pipeline(ctx):
+    cube = ctx.cube
+    sku_cube = cube.daily("SKU")
+    member = sku_cube.totals("Sales Quantity").idxmax()
+    registry = ModelRegistry(tempfile.mkdtemp(prefix="scm_bench_models-"))
+    budget = TrainingBudget(max_epochs=FORECAST_EPOCHS, early_stopping=False)
+
+    def run():
+        # Filter -> weekly resample -> rolling -> windows -> fit -> 52-step forecast (fresh registry: always trains)
+        try:
+            forecast_single_series(cube, "SKU", member, FORECAST_TIME_STEPS, budget=budget, registry=registry,
+                                   fingerprint="benchmark")
+        finally:
+            shutil.rmtree(registry.root, ignore_errors=True)
+    return run
+
+
+def _hierarchical_reconcile(ctx):
+    cube = ctx.cube
+    weekly = cube.weekly("SKU")
+    rolling = rolling_mean(weekly.values("Sales Quantity").astype(np.float64))
+    bottom = BottomForecast.from_classical(fit_classical(rolling.T, weekly.members, weekly.dates, level="SKU"))
+
+    def run():
+        # Summing matrix from the cube links -> classical aggregate forecasts -> MinT over every node
+        reconcile_forecast(Hierarchy.from_cube(cube), bottom, MINT)
+    return run
+
+
+def _daily_line_chart(ctx):
+    cube = ctx.cube
+
+    def run():
+        # Every SKU's daily sales as one line each (first 20), reduced and serialised as the page would send them
+        daily = cube.daily("SKU")
+        fig = go.Figure()
+        for member in daily.members[:20]:
+            add_line(fig, daily.series("Sales Quantity", member), mode="lines", name=str(member))
+        fig.to_json()
+    return run
+
+
+def _demand_histogram(ctx):
+    values = ctx.cube.daily("SKU").values("Sales Quantity").ravel()
+    return lambda: histogram_figure(values, title="Daily SKU demand").to_json()
+
+
+def _policy_grid(ctx):
+    demand = cube_demand_stats(ctx.cube.daily("SKU"))
+    return lambda: PolicyGrid(demand).lookup(50.0, 1.0, 0.95)
+
+
+def _monte_carlo(ctx):
+    daily_sku = ctx.cube.daily("SKU")
+    mean, std = daily_demand_stats(daily_sku)
+    lead_pmf = lead_time_pmf_from_counts(ctx.stats.lead_time_counts(), daily_sku.members)
+    s, Q = reorder_policy(mean, std, lead_pmf, 50.0, 1.0, 0.95)
+    return lambda: run_simulation(daily_sku.members, NormalDemand(mean, std), s, Q, lead_pmf,
+                                  n_paths=SIM_PATHS, days=SIM_DAYS)
+
+
+def _level_totals(level):
+    def case(ctx):
+        cube = ctx.cube
+        return lambda: cube.daily(level).totals("Sales Quantity").sort_values(ascending=False)
+    return case
+
+
+def _customer_revenue(ctx):
+    stats = ctx.stats
+    return lambda: stats.customer_revenue().sort_values(ascending=False)
+
+
+def _stock_turnover(ctx):
+    cube = ctx.cube
+
+    def run():
+        sku_cube = cube.daily("SKU")
+        turnover = pd.concat([sku_cube.totals("Sales Quantity"), sku_cube.totals("Stock Level")], axis=1)
+        (turnover["Sales Quantity"] / turnover["Stock Level"].replace(0, np.nan).fillna(1)).sort_values()
+    return run
+
+
+def _rfm_segments(key):
+    def case(ctx):
+        stats = ctx.stats
+        return lambda: segment(stats.rfm(key))
+    return case
+
+
+def _test_data(ctx):
+    df, stats = ctx.load(TEST_COLUMNS), ctx.stats
+    return lambda: TestData(df, stats)
+
+
+def _stat_test(test, approximate):
+    def case(ctx):
+        data = ctx.test_data(approximate)
+        return lambda: test.run(data, approximate=approximate)
+    return case
+
+
+def cases():
+    """(group, name, case) for every benchmarked hot path."""
+    found = [
+        ("load", "csv_to_parquet", _csv_to_parquet),
+        ("load", "columnar_read", _columnar_load),
+        ("build", "cube", _cube_build),
+        ("build", "running_stats", _stats_build),
+        ("forecast", "single_series_lstm", _forecast_pipeline),
+        ("forecast", "hierarchical_reconcile", _hierarchical_reconcile),
+        ("inventory", "eoq_safety_stock_grid", _policy_grid),
+        ("inventory", "monte_carlo_simulation", _monte_carlo),
+        ("charts", "daily_line_chart", _daily_line_chart),
+        ("charts", "demand_histogram", _demand_histogram),
+    ]
+    for level in ["Supplier", "Product_Family_Name", "Category", "SKU"]:
+        found.append(("segmentation", f"sales_by_{level.lower()}", _level_totals(level)))
+    found += [
+        ("segmentation", "customer_revenue", _customer_revenue),
+        ("segmentation", "stock_turnover", _stock_turnover),
+        ("segmentation", "rfm_customers", _rfm_segments("Customer ID")),
+        ("segmentation", "rfm_skus", _rfm_segments("SKU")),
+        ("stats", "test_data", _test_data),
+    ]
+    for test in TESTS:
+        name = test.name.split("(")[-1].rstrip(")").lower().replace(" ", "_").replace("-", "_").replace("–", "_")
+        found.append(("stats", name, _stat_test(test, False)))
+        if test.approx is not None:
+            found.append(("stats_approx", name, _stat_test(test, True)))
+    return found
+
+
+# -------------------- BASELINE --------------------
+def compare(results, baseline, time_tolerance=TIME_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE):
+    """Regression messages for every case slower or heavier than its baseline beyond tolerance."""
+    regressions = []
+    for scale, scale_results in results.items():
+        for case, result in scale_results.items():
+            base = baseline.get(scale, {}).get(case)
+            if base is None:
+                continue
+            slower = result["wall_s"] - base["wall_s"]
+            if slower > MIN_TIME_DELTA and result["wall_s"] > base["wall_s"] * (1 + time_tolerance):
+                regressions.append(
+                    f"{scale} {case}: wall time {result['wall_s']:.3f}s vs baseline {base['wall_s']:.3f}s "
+                    f"(+{result['wall_s'] / base['wall_s'] - 1:.0%})"
+                )
+            heavier = result["peak_delta_mb"] - base["peak_delta_mb"]
+            if heavier > MIN_MEMORY_DELTA and result["peak_delta_mb"] > base["peak_delta_mb"] * (1 + memory_tolerance):
+                regressions.append(
+                    f"{scale} {case}: peak memory +{result['peak_delta_mb']:.0f} MB vs baseline "
+                    f"+{base['peak_delta_mb']:.0f} MB"
+                )
+    return regressions
+
+
+def _write_json(path, payload):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as fh:
+        json.dump(payload, fh, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def run_benchmarks(scales=DEFAULT_SCALES, groups=None, repeat=1, seed=SEED, log=print):
+    """{scale: {"group/name": measurement}} for the selected scales and case groups."""
+    results = {}
+    for scale in scales:
+        log(f"== {scale}: preparing dataset")
+        path = dataset_path(scale, seed)
+        ctx = BenchContext(path)
+        results[scale] = {}
+        for group, name, case in cases():
+            if groups and group not in groups:
+                continue
+            key = f"{group}/{name}"
+            result = measure(lambda: case(ctx), ctx.n_rows, repeat)
+            results[scale][key] = result
+            log(f"{scale:>5} {key:<45} {result['wall_s']:>9.3f}s {result['peak_delta_mb']:>8.0f} MB "
+                f"{result['rows_per_s']:>14,.0f} rows/s")
+    return results
+
+
+if __name__ == "__main__":
+    # python benchmark.py [--scales 250k 2.5M 25M] [--groups load stats] [--save-baseline]
+    parser = argparse.ArgumentParser(description="Benchmark the pages' core computations on synthetic data.")
+    parser.add_argument("--scales", nargs="+", default=DEFAULT_SCALES, choices=list(SCALES))
+    parser.add_argument("--groups", nargs="+", help="case groups to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per case; the best time is kept")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--output", help="also write this run's results to a JSON file")
+    parser.add_argument("--time-tolerance", type=float, default=TIME_TOLERANCE)
+    parser.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE)
+    args = parser.parse_args()
+
+    # Cached helpers run without a Streamlit runtime here; their warnings are noise
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    results = run_benchmarks(args.scales, args.groups, args.repeat, args.seed)
+    meta = {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count(),
+            "numpy": np.__version__, "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    if args.output:
+        _write_json(args.output, {"meta": meta, "results": results})
+
+    if args.save_baseline:
+        stored = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as fh:
+                stored = json.load(fh).get("results", {})
+        stored.update(results)
+        _write_json(args.baseline, {"meta": meta, "results": stored})
+        print(f"baseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)["results"]
+        regressions = compare(results, baseline, args.time_tolerance, args.memory_tolerance)
+        if regressions:
+            print(f"\nPERFORMANCE REGRESSIONS ({len(regressions)}):", file=sys.stderr)
+            for message in regressions:
+                print(f"  {message}", file=sys.stderr)
+            sys.exit(1)
+        print(f"\nno regressions against {args.baseline}")
+    else:
+        print(f"\nno baseline at {args.baseline}; run with --save-baseline to create one")
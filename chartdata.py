@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+# -------------------- CONFIG --------------------
+PIXEL_BUDGET = 1_000        # points per line trace, about the width of a chart in pixels
+HISTOGRAM_BINS = 30
+MINMAX_PREREDUCE = 4        # very long series: min-max down to this many x the budget, then LTTB
+MINMAX_THRESHOLD = 100      # ... once they exceed this many x the budget
+
+# Charts are reduced on the server before Plotly sees them: histograms are
+# binned with NumPy and long lines are decimated to the pixel budget, so the
+# payload and the browser's render time depend on the chart size, not on the
+# number of simulated paths or days. Values go out as NumPy arrays, which
+# Plotly serialises as base64 typed arrays instead of JSON lists; dates are
+# sent as epoch milliseconds on a date axis for the same reason.
+
+
+# -------------------- HISTOGRAMS --------------------
+def histogram_bins(values, nbins=HISTOGRAM_BINS, value_range=None):
+    """Counts and bin edges of the finite values, equal-width bins over their range."""
+    values = np.asarray(values, dtype=np.float64).ravel()
+    values = values[np.isfinite(values)]
+    if value_range is None:
+        value_range = (values.min(), values.max()) if values.size else (0.0, 1.0)
+    lo, hi = value_range
+    if lo == hi:
+        lo, hi = lo - 0.5, hi + 0.5
+    counts, edges = np.histogram(values, bins=nbins, range=(lo, hi))
+    return counts, edges
+
+
+def histogram_figure(values, nbins=HISTOGRAM_BINS, title=None, x_title=None, y_title="Frequency",
+                     opacity=0.75, template="plotly_white"):
+    """Bar chart of pre-binned values: nbins bars are sent however many values there are."""
+    counts, edges = histogram_bins(values, nbins)
+    fig = go.Figure(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2, y=counts.astype(np.int32), width=np.diff(edges),
+        opacity=opacity, name=x_title or "value",
+        customdata=np.column_stack([edges[:-1], edges[1:]]),
+        hovertemplate="%{customdata[0]:.4g} – %{customdata[1]:.4g}<br>%{y:,}<extra></extra>",
+    ))
+    fig.update_layout(title=title, xaxis_title=x_title, yaxis_title=y_title, bargap=0, template=template)
+    return fig
+
+
+# -------------------- DOWNSAMPLING --------------------
+def minmax_indices(y, n_buckets):
+    """
+    Positions of the minimum and maximum of each of n_buckets equal slices,
+    plus the first and last point, sorted. NaNs lose both comparisons, so an
+    all-NaN slice keeps one NaN and the gap stays visible.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    size = -(-n // n_buckets)
+    padded_low = np.full(n_buckets * size, np.inf)
+    padded_high = np.full(n_buckets * size, -np.inf)
+    padded_low[:n] = np.where(np.isnan(y), np.inf, y)
+    padded_high[:n] = np.where(np.isnan(y), -np.inf, y)
+    offsets = np.arange(n_buckets) * size
+    lows = offsets + padded_low.reshape(n_buckets, size).argmin(axis=1)
+    highs = offsets + padded_high.reshape(n_buckets, size).argmax(axis=1)
+    return np.unique(np.concatenate([[0, n - 1], lows[lows < n], highs[highs < n]]))
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: first and last point plus, per bucket, the
+    point spanning the largest triangle with the previous pick and the mean of
+    the next bucket. Keeps peaks and the visual shape of the line.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)  # n_out - 2 buckets between the end points
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[hi:next_hi].mean(), y[hi:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+
+def downsample_indices(x, y, max_points=PIXEL_BUDGET):
+    """
+    Positions to keep so at most max_points are drawn. LTTB for finite series;
+    min-max decimation when there are NaN gaps, and as a pre-reduction for
+    very long series so LTTB's per-bucket loop stays short.
+    """
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+    y = np.asarray(y, dtype=np.float64)
+    if not np.isfinite(y).all():
+        return minmax_indices(y, max(max_points // 2 - 1, 1))
+    x = np.asarray(x, dtype=np.float64)
+    if n > max_points * MINMAX_THRESHOLD:
+        keep = minmax_indices(y, max_points * MINMAX_PREREDUCE // 2)
+        return keep[lttb_indices(x[keep], y[keep], max_points)]
+    return lttb_indices(x, y, max_points)
+
+
+def _x_values(index):
+    """Numeric x: epoch milliseconds for dates (a date axis reads them as dates), floats otherwise."""
+    if isinstance(index, pd.DatetimeIndex):
+        return index.as_unit("ms").asi8.astype(np.float64), True
+    return np.asarray(index, dtype=np.float64), False
+
+
+def add_line(fig, series, max_points=PIXEL_BUDGET, **trace_kwargs):
+    """
+    Add `series` (a pandas Series) to `fig` as a line downsampled to
+    max_points, with typed-array x/y. A DatetimeIndex switches the x axis to
+    type "date".
+    """
+    x, is_date = _x_values(series.index)
+    y = series.to_numpy(dtype=np.float64)
+    keep = downsample_indices(x, y, max_points)
+    fig.add_trace(go.Scatter(x=x[keep], y=y[keep].astype(np.float32), **trace_kwargs))
+    if is_date:
+        fig.update_xaxes(type="date")
+    return fig
@@ -0,0 +1,196 @@
+import numpy as np
+import pandas as pd
+
+from windowing import mape
+from instrumentation import timed
+
+# -------------------- CONFIG --------------------
+SEASON_LENGTH = 52  # weekly data, yearly seasonality
+ALPHA_GRID = np.array([0.05, 0.1, 0.2, 0.3, 0.5, 0.7, 0.9])
+HW_GRID = np.array([
+    (alpha, beta, gamma)
+    for alpha in (0.1, 0.3, 0.6)
+    for beta in (0.01, 0.1)
+    for gamma in (0.05, 0.2)
+])
+CROSTON_ALPHA = 0.1
+
+SEASONAL_NAIVE = "Seasonal Naive"
+SES = "Simple Exponential Smoothing"
+HOLT_WINTERS = "Holt-Winters"
+CROSTON = "Croston"
+METHODS = [SEASONAL_NAIVE, SES, HOLT_WINTERS, CROSTON]
+
+# Every method takes Y as a (members x weeks) matrix and returns (members x horizon).
+# Time is walked once; each step is one array operation over all series (and
+# all smoothing parameter candidates).
+
+
+# -------------------- METHODS --------------------
+def seasonal_naive(Y, horizon, season_length=SEASON_LENGTH):
+    n_weeks = Y.shape[1]
+    if n_weeks < season_length:
+        return np.repeat(Y[:, -1:], horizon, axis=1)  # plain naive
+    last_season = Y[:, n_weeks - season_length:]
+    return last_season[:, np.arange(horizon) % season_length]
+
+
+def ses(Y, horizon, alphas=ALPHA_GRID):
+    """Simple exponential smoothing; alpha picked per series by one-step SSE."""
+    alpha = alphas[:, None]                                  # (G, 1)
+    level = np.broadcast_to(Y[:, 0], (len(alphas), Y.shape[0])).copy()
+    sse = np.zeros_like(level)
+    for t in range(1, Y.shape[1]):
+        err = Y[:, t] - level
+        sse += err ** 2
+        level += alpha * err
+    best = sse.argmin(axis=0)
+    final = np.take_along_axis(level, best[None, :], axis=0)[0]
+    return np.repeat(final[:, None], horizon, axis=1)
+
+
+def holt_winters(Y, horizon, season_length=SEASON_LENGTH, grid=HW_GRID):
+    """
+    Additive Holt-Winters over a small (alpha, beta, gamma) grid, best per series
+    by one-step SSE. Falls back to Holt's linear trend when there is less than
+    one season plus a few weeks of history.
+    """
+    n_series, n_weeks = Y.shape
+    seasonal = n_weeks >= season_length + 4
+    m = season_length if seasonal else 1
+    alpha, beta, gamma = (grid[:, k][:, None] for k in range(3))  # (G, 1) each
+    n_grid = len(grid)
+
+    if seasonal:
+        first = Y[:, :m]
+        level0 = first.mean(axis=1)
+        if n_weeks >= 2 * m:
+            trend0 = (Y[:, m:2 * m].mean(axis=1) - level0) / m
+        else:
+            trend0 = np.zeros(n_series)
+        season0 = first - level0[:, None]
+        start = m
+    else:
+        level0 = Y[:, 0]
+        trend0 = Y[:, 1] - Y[:, 0] if n_weeks > 1 else np.zeros(n_series)
+        season0 = np.zeros((n_series, 1))
+        start = 1
+        gamma = np.zeros_like(gamma)
+
+    level = np.broadcast_to(level0, (n_grid, n_series)).copy()
+    trend = np.broadcast_to(trend0, (n_grid, n_series)).copy()
+    season = np.broadcast_to(season0, (n_grid, n_series, m)).copy()  # indexed by t % m
+    sse = np.zeros((n_grid, n_series))
+
+    for t in range(start, n_weeks):
+        phase = t % m
+        s_prev = season[:, :, phase]
+        y = Y[:, t]
+        sse += (y - (level + trend + s_prev)) ** 2
+        new_level = alpha * (y - s_prev) + (1 - alpha) * (level + trend)
+        trend = beta * (new_level - level) + (1 - beta) * trend
+        season[:, :, phase] = gamma * (y - new_level) + (1 - gamma) * s_prev
+        level = new_level
+
+    best = sse.argmin(axis=0)
+    pick = np.arange(n_series)
+    steps = np.arange(1, horizon + 1)
+    phases = (n_weeks + steps - 1) % m
+    return (
+        level[best, pick][:, None]
+        + trend[best, pick][:, None] * steps[None, :]
+        + season[best, pick][:, phases]
+    )
+
+
+def croston(Y, horizon, alpha=CROSTON_ALPHA):
+    """Croston's method for intermittent demand: smoothed size / smoothed interval."""
+    nonzero = Y > 0
+    n_nonzero = nonzero.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        size = np.where(n_nonzero > 0, np.where(nonzero, Y, 0).sum(axis=1) / n_nonzero, 0.0)
+        interval = np.where(n_nonzero > 0, Y.shape[1] / n_nonzero, 1.0)
+    since_last = np.ones(Y.shape[0])
+    for t in range(Y.shape[1]):
+        demand = nonzero[:, t]
+        size = np.where(demand, size + alpha * (Y[:, t] - size), size)
+        interval = np.where(demand, interval + alpha * (since_last - interval), interval)
+        since_last = np.where(demand, 1.0, since_last + 1.0)
+    return np.repeat((size / interval)[:, None], horizon, axis=1)
+
+
+METHOD_FUNCTIONS = {
+    SEASONAL_NAIVE: seasonal_naive,
+    SES: ses,
+    HOLT_WINTERS: holt_winters,
+    CROSTON: croston,
+}
+
+
+def forecast_all(Y, horizon, methods=METHODS):
+    return {name: METHOD_FUNCTIONS[name](Y, horizon) for name in methods}
+
+
+# -------------------- MODEL SELECTION --------------------
+class ClassicalForecast:
+    """Holdout accuracy of every method and the per-series best forecast."""
+
+    def __init__(self, members, dates, actual, split_idx, holdout, mape, best_method, future, future_dates):
+        self.members = members
+        self.dates = dates
+        self.actual = actual
+        self.split_idx = split_idx
+        self.holdout = holdout
+        self.mape = mape
+        self.best_method = best_method
+        self.future = future
+        self.future_dates = future_dates
+
+    def member_frames(self, member):
+        """Train/test actuals, holdout forecast and future forecast for one member."""
+        j = list(self.members).index(member)
+        actual = pd.Series(self.actual[j], index=self.dates)
+        train = actual.iloc[:self.split_idx]
+        test = actual.iloc[self.split_idx:]
+        pred = pd.Series(self.holdout[j], index=test.index)
+        future = pd.Series(self.future[j], index=self.future_dates)
+        return train, test, pred, future
+
+    def summary(self):
+        table = self.mape.copy()
+        table.insert(0, "Best Method", self.best_method)
+        table.insert(1, "Best MAPE", self.mape.min(axis=1))
+        return table
+
+    def forecast_table(self):
+        return pd.DataFrame(self.future.T, index=pd.Index(self.future_dates, name="Date"), columns=self.members)
+
+
+@timed()
+def fit_classical(Y, members, dates, horizon=52, train_fraction=0.8, methods=METHODS, level="Member"):
+    """
+    Fit every method on the first train_fraction of each (members x weeks) row,
+    score the holdout by MAPE, then refit on the full
+    history and keep each series' best method for the future forecast.
+    """
+    Y = np.asarray(Y, dtype=np.float64)
+    split_idx = int(Y.shape[1] * train_fraction)
+    test = Y[:, split_idx:]
+
+    holdout = forecast_all(Y[:, :split_idx], test.shape[1], methods)
+    scores = pd.DataFrame(
+        {name: mape(test.T, pred.T) for name, pred in holdout.items()},
+        index=pd.Index(members, name=level),
+    )
+    best_idx = scores.to_numpy().argmin(axis=1)
+    best_method = pd.Series(np.asarray(methods)[best_idx], index=scores.index)
+
+    rows = np.arange(len(members))
+    holdout_stack = np.stack([holdout[name] for name in methods])        # (M, N, h)
+    future_stack = np.stack(list(forecast_all(Y, horizon, methods).values()))
+    future_dates = pd.date_range(dates[-1], periods=horizon + 1, freq="W")[1:]
+
+    return ClassicalForecast(
+        members, dates, Y, split_idx, holdout_stack[best_idx, rows], scores, best_method,
+        future_stack[best_idx, rows], future_dates
+    )
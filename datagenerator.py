@@ -0,0 +1,250 @@
+import os
+import argparse
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from datastore import stream_schema, CHUNK_ROWS, ROW_GROUP_SIZE, DATE_COL
+
+# -------------------- CONFIG --------------------
+# Defaults reproduce the shape of datagenerator.ipynb (380 SKUs x 50 customers, Nov 2023 - Aug 2025)
+N_SKUS = 380
+N_CUSTOMERS = 50
+N_WAREHOUSES = 6
+START_DATE = "2023-11-15"
+N_DAYS = 629
+
+CATEGORIES = [
+    "Electronics", "Home & Kitchen", "Fashion", "Sports & Outdoors",
+    "Books", "Beauty & Personal Care", "Toys & Games", "Pet Supplies",
+    "Automotive", "Office Products"
+]
+SUPPLIERS = [
+    "AmazonBasics", "Sony", "Samsung", "Nike", "Adidas", "Apple",
+    "Microsoft", "Lenovo", "Puma", "Philips", "LG", "HP"
+]
+PRODUCT_FAMILIES = [
+    "Wireless Earbuds", "Smartphone", "Laptop", "Bluetooth Speaker", "Gaming Mouse",
+    "Air Fryer", "Coffee Maker", "Vacuum Cleaner", "Backpack", "Running Shoes",
+    "Wrist Watch", "Sunglasses", "Yoga Mat", "Board Game", "Pet Food",
+    "Car Phone Mount", "Desk Lamp", "External Hard Drive", "Water Bottle", "E-reader"
+]
+WAREHOUSES = ["Dubai", "Abu Dhabi", "Sharjah", "Riyadh", "Jeddah", "Doha"]
+
+HIGH_VOLUME_SHARE = 0.3   # customers buying 1.5x; the rest buy 0.5x and place 70% of the rows
+LOW_VOLUME_ROWS = 0.7
+DISCOUNTS = np.array([0, 5, 10, 15, 20])
+RETURN_RATES = np.array([0, 0.01, 0.02, 0.05])
+LEAD_TIMES = np.array([1, 2, 3, 5, 7, 10])
+TREND = 0.1               # demand grows 10% over the generated period
+
+# Seasonal profile per SKU (SKU index % 3): peak months, factor in season, factor otherwise
+SEASONS = [({11, 12, 1}, 1.8, 0.6), ({6, 7}, 1.5, 0.8), ({8, 9}, 1.2, 1.0)]
+SEASON_FACTORS = np.array([[peak if m in months else off for m in range(13)] for months, peak, off in SEASONS])
+
+COLUMNS = [
+    DATE_COL, "SKU", "Customer ID", "Stock Level", "Sales Quantity", "Revenue (USD)", "Lead Time (days)",
+    "Discount Applied (%)", "Return Quantity", "Shipping Cost (USD)", "Warehouse Location",
+    "Product_Family_Name", "Category", "Supplier", "Price_per_Unit (USD)"
+]
+
+
+# -------------------- CATALOG --------------------
+class Catalog:
+    """
+    Fixed dimensions of a generated dataset: products with their attributes
+    and seasonal profile, customers split into high / low volume, and
+    warehouses. Drawn from the seed alone, so every chunk (in any process)
+    sees the same catalog.
+    """
+
+    def __init__(self, n_skus=N_SKUS, n_customers=N_CUSTOMERS, n_warehouses=N_WAREHOUSES, seed=0):
+        rng = np.random.default_rng([seed, 0])
+        self.skus = np.array([f"SKU-{1000 + i}" for i in range(n_skus)])
+        self.family = rng.integers(0, len(PRODUCT_FAMILIES), n_skus)
+        self.category = rng.integers(0, len(CATEGORIES), n_skus)
+        self.supplier = rng.integers(0, len(SUPPLIERS), n_skus)
+        self.price = np.round(rng.uniform(5, 500, n_skus), 2)
+        # Deterministic seasonal profile (the notebook's hash(sku) % 3 changed with every interpreter run)
+        self.season = np.arange(n_skus) % len(SEASONS)
+
+        self.customers = np.array([f"Customer-{i + 1:03d}" for i in range(n_customers)])
+        n_high = max(1, int(n_customers * HIGH_VOLUME_SHARE))
+        high = rng.permutation(n_customers)
+        self.high_volume, self.low_volume = np.sort(high[:n_high]), np.sort(high[n_high:])
+        if not len(self.low_volume):
+            self.low_volume = self.high_volume
+
+        extra = [f"Warehouse-{i + 1}" for i in range(len(WAREHOUSES), n_warehouses)]
+        self.warehouses = np.array((WAREHOUSES + extra)[:n_warehouses])
+
+    @property
+    def n_skus(self):
+        return len(self.skus)
+
+
+# -------------------- GENERATION --------------------
+def _categorical(codes, categories):
+    return pd.Categorical.from_codes(codes, categories=pd.Index(categories))
+
+
+def generate_days(catalog, first_day, n_days, total_days=N_DAYS, start_date=START_DATE, seed=0):
+    """
+    Rows for days [first_day, first_day + n_days): one row per day and SKU,
+    days outer and SKUs inner as in the notebook, every field drawn as one
+    array. The block's random stream is seeded by (seed, first_day).
+    """
+    rng = np.random.default_rng([seed, 1, first_day])
+    n_skus = catalog.n_skus
+    n = n_days * n_skus
+    day = np.repeat(np.arange(first_day, first_day + n_days), n_skus)
+    sku = np.tile(np.arange(n_skus), n_days)
+    dates = pd.Timestamp(start_date) + pd.to_timedelta(np.arange(first_day, first_day + n_days), unit="D")
+    month = np.repeat(dates.month.to_numpy(), n_skus)
+
+    stock = np.maximum(10, rng.normal(500, 100, n).astype(np.int64))
+    base = np.maximum(10, rng.normal(50, 10, n).astype(np.int64))
+    seasonal = SEASON_FACTORS[catalog.season[sku], month]
+    trend = 1 + day / total_days * TREND
+    quantity = np.floor(base * seasonal * trend)
+
+    low = rng.random(n) < LOW_VOLUME_ROWS
+    customer = np.where(
+        low,
+        catalog.low_volume[rng.integers(0, len(catalog.low_volume), n)],
+        catalog.high_volume[rng.integers(0, len(catalog.high_volume), n)],
+    )
+    quantity = np.floor(quantity * np.where(low, 0.5, 1.5)).astype(np.int64)
+
+    discount = DISCOUNTS[rng.integers(0, len(DISCOUNTS), n)]
+    returns = np.floor(quantity * RETURN_RATES[rng.integers(0, len(RETURN_RATES), n)]).astype(np.int64)
+    shipping = np.round(rng.uniform(2, 20, n), 2)
+    warehouse = rng.integers(0, len(catalog.warehouses), n)
+    price = catalog.price[sku]
+    revenue = np.round(quantity * price * (1 - discount / 100), 2)
+    lead_time = LEAD_TIMES[rng.integers(0, len(LEAD_TIMES), n)]
+
+    return pd.DataFrame({
+        DATE_COL: np.repeat(dates.to_numpy(), n_skus),
+        "SKU": _categorical(sku, catalog.skus),
+        "Customer ID": _categorical(customer, catalog.customers),
+        "Stock Level": stock,
+        "Sales Quantity": quantity,
+        "Revenue (USD)": revenue,
+        "Lead Time (days)": lead_time,
+        "Discount Applied (%)": discount,
+        "Return Quantity": returns,
+        "Shipping Cost (USD)": shipping,
+        "Warehouse Location": _categorical(warehouse, catalog.warehouses),
+        "Product_Family_Name": _categorical(catalog.family[sku], PRODUCT_FAMILIES),
+        "Category": _categorical(catalog.category[sku], CATEGORIES),
+        "Supplier": _categorical(catalog.supplier[sku], SUPPLIERS),
+        "Price_per_Unit (USD)": price,
+    }, columns=COLUMNS)
+
+
+def day_blocks(n_days, n_skus, chunk_rows=CHUNK_ROWS):
+    """(first_day, n_days) of each chunk: whole days, about chunk_rows rows each."""
+    per_chunk = max(1, chunk_rows // max(n_skus, 1))
+    return [(first, min(per_chunk, n_days - first)) for first in range(0, n_days, per_chunk)]
+
+
+def iter_generate(n_skus=N_SKUS, n_customers=N_CUSTOMERS, n_warehouses=N_WAREHOUSES, n_days=N_DAYS,
+                  start_date=START_DATE, seed=0, chunk_rows=CHUNK_ROWS):
+    """Generated dataset as a stream of frames, in date order; the same seed and sizes give the same rows."""
+    catalog = Catalog(n_skus, n_customers, n_warehouses, seed)
+    for first_day, days in day_blocks(n_days, n_skus, chunk_rows):
+        yield generate_days(catalog, first_day, days, n_days, start_date, seed)
+
+
+def generate(**kwargs):
+    """Whole generated dataset in memory (small sizes only; write_dataset streams large ones)."""
+    return pd.concat(iter_generate(**kwargs), ignore_index=True)
+
+
+# -------------------- OUTPUT --------------------
+def _parquet_table(df):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # Same column types as the app's own columnar cache (dictionary keys, int64, float32)
+    return table.cast(stream_schema(table.schema))
+
+
+def _csv_table(df):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    schema = pa.schema([
+        field.with_type(pa.date32()) if field.name == DATE_COL
+        else field.with_type(pa.string()) if pa.types.is_dictionary(field.type) else field
+        for field in table.schema
+    ])
+    return table.cast(schema)
+
+
+def _write_part(directory, index, catalog_args, first_day, days, n_days, start_date, seed):
+    catalog = Catalog(*catalog_args, seed=seed)
+    df = generate_days(catalog, first_day, days, n_days, start_date, seed)
+    target = os.path.join(directory, f"part-{index:05d}.parquet")
+    pq.write_table(_parquet_table(df), target + ".tmp", row_group_size=ROW_GROUP_SIZE)
+    os.replace(target + ".tmp", target)
+    return len(df)
+
+
+def write_dataset(path, n_skus=N_SKUS, n_customers=N_CUSTOMERS, n_warehouses=N_WAREHOUSES, n_days=N_DAYS,
+                  start_date=START_DATE, seed=0, chunk_rows=CHUNK_ROWS, max_workers=None):
+    """
+    Write a generated dataset chunk by chunk, so memory stays at one chunk
+    per worker whatever the row count. A path ending in .csv gets one CSV
+    file (written in order); any other path becomes a directory of Parquet
+    part files, generated in a spawn process pool, which datastore reads as a
+    partitioned dataset. Returns the number of rows written.
+    """
+    blocks = day_blocks(n_days, n_skus, chunk_rows)
+    if path.lower().endswith(".csv"):
+        rows, writer = 0, None
+        try:
+            for df in iter_generate(n_skus, n_customers, n_warehouses, n_days, start_date, seed, chunk_rows):
+                table = _csv_table(df)
+                if writer is None:
+                    writer = pa_csv.CSVWriter(path, table.schema)
+                writer.write_table(table)
+                rows += len(df)
+        finally:
+            if writer is not None:
+                writer.close()
+        return rows
+
+    os.makedirs(path, exist_ok=True)
+    catalog_args = (n_skus, n_customers, n_warehouses)
+    args = [(path, i, catalog_args, first, days, n_days, start_date, seed) for i, (first, days) in enumerate(blocks)]
+    max_workers = max_workers or min(len(blocks), os.cpu_count() or 1)
+    if max_workers == 1:
+        return sum(_write_part(*a) for a in args)
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp.get_context("spawn")) as pool:
+        return sum(f.result() for f in [pool.submit(_write_part, *a) for a in args])
+
+
+if __name__ == "__main__":
+    # python datagenerator.py out.csv | out_dir [--rows 10000000] [--skus 380] [--customers 50] ...
+    parser = argparse.ArgumentParser(description="Generate a synthetic e-commerce supply chain dataset.")
+    parser.add_argument("path", help="output .csv file, or a directory for Parquet parts")
+    parser.add_argument("--rows", type=int, help="target row count (sets the number of days)")
+    parser.add_argument("--skus", type=int, default=N_SKUS)
+    parser.add_argument("--customers", type=int, default=N_CUSTOMERS)
+    parser.add_argument("--warehouses", type=int, default=N_WAREHOUSES)
+    parser.add_argument("--days", type=int, default=N_DAYS)
+    parser.add_argument("--start", default=START_DATE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    n_days = -(-args.rows // args.skus) if args.rows else args.days
+    written = write_dataset(
+        args.path, args.skus, args.customers, args.warehouses, n_days, args.start, args.seed,
+        args.chunk_rows, args.workers
+    )
+    print(f"{args.path}: {written:,} rows ({args.skus} SKUs x {n_days} days)")
@@ -0,0 +1,278 @@
+import os
+import glob
+import hashlib
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from instrumentation import timed
+
+# -------------------- CONFIG --------------------
+DATA_PATH = os.environ.get(
+    "SCM_DATA_PATH",
+    r"C:\Users\elroy\OneDrive\Desktop\Supplychain\ecommerce_supply_chain.csv"
+)
+CACHE_DIR_NAME = ".scm_cache"
+
+CATEGORICAL_COLS = [
+    "SKU", "Supplier", "Category", "Warehouse Location", "Customer ID", "Product_Family_Name"
+]
+DATE_COL = "Date"
+
+ROW_GROUP_SIZE = 128_000  # small row groups keep predicate pushdown selective
+
+# Streaming mode: aggregations are built chunk by chunk instead of from one
+# in-memory frame. On by default above the size threshold; SCM_STREAMING=1/0 forces it.
+STREAMING_THRESHOLD_BYTES = 256 << 20
+CHUNK_ROWS = 250_000
+
+
+# -------------------- FINGERPRINT --------------------
+def file_fingerprint(path, block_size=1 << 20):
+    """Cheap content fingerprint: size, mtime and a hash of the first/last block."""
+    if os.path.isdir(path):
+        # Partitioned dataset: names, sizes and mtimes of its Parquet files
+        digest = hashlib.sha1()
+        for part in _parquet_files(path):
+            stat = os.stat(part)
+            digest.update(f"{os.path.relpath(part, path)}:{stat.st_size}:{stat.st_mtime_ns}|".encode())
+        return digest.hexdigest()[:16]
+    stat = os.stat(path)
+    digest = hashlib.sha1(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    with open(path, "rb") as fh:
+        digest.update(fh.read(block_size))
+        if stat.st_size > block_size:
+            fh.seek(max(block_size, stat.st_size - block_size))
+            digest.update(fh.read(block_size))
+    return digest.hexdigest()[:16]
+
+
+def _parquet_files(directory):
+    return sorted(glob.glob(os.path.join(directory, "**", "*.parquet"), recursive=True))
+
+
+def cache_path(path, fingerprint):
+    cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR_NAME)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir, f"{stem}-{fingerprint}.parquet")
+
+
+def partition_dir(path):
+    """Day partitions appended after the base file, kept next to its columnar cache."""
+    cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR_NAME)
+    stem = os.path.splitext(os.path.basename(os.path.normpath(path)))[0]
+    return os.path.join(cache_dir, f"{stem}-partitions", file_fingerprint(path))
+
+
+def dataset_size(path):
+    """Bytes on disk of the base file (or of every file of a partitioned dataset)."""
+    if os.path.isdir(path):
+        return sum(os.path.getsize(part) for part in _parquet_files(path))
+    return os.path.getsize(path)
+
+
+def streaming_enabled(path=DATA_PATH):
+    flag = os.environ.get("SCM_STREAMING")
+    if flag is not None:
+        return flag.strip().lower() not in ("", "0", "false", "no")
+    return dataset_size(path) >= STREAMING_THRESHOLD_BYTES
+
+
+# -------------------- DTYPES --------------------
+def optimize_dtypes(df):
+    """Categoricals for the string keys, smallest numeric dtypes for the rest."""
+    for col in df.columns:
+        if col in CATEGORICAL_COLS:
+            df[col] = df[col].astype("category")
+        elif pd.api.types.is_integer_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast="integer")
+        elif pd.api.types.is_float_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast="float")
+    return df
+
+
+def stream_schema(schema):
+    """
+    Fixed Parquet schema for a CSV converted chunk by chunk, where dtypes cannot
+    be chosen from the whole column: dictionary-encoded keys, int64 integers
+    and float32 floats (what optimize_dtypes picks for this data).
+    """
+    fields = []
+    for field in schema:
+        if field.name in CATEGORICAL_COLS:
+            field = field.with_type(pa.dictionary(pa.int32(), pa.string()))
+        elif pa.types.is_integer(field.type):
+            field = field.with_type(pa.int64())
+        elif pa.types.is_floating(field.type):
+            field = field.with_type(pa.float32())
+        fields.append(field)
+    return pa.schema(fields)
+
+
+def _write_csv_chunked(path, target, chunk_rows=CHUNK_ROWS):
+    """CSV -> Parquet one chunk at a time, so conversion memory does not grow with the file."""
+    schema, writer = None, None
+    try:
+        for chunk in pd.read_csv(path, parse_dates=[DATE_COL], chunksize=chunk_rows):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                schema = stream_schema(table.schema)
+                writer = pq.ParquetWriter(target, schema)
+            writer.write_table(table.select(schema.names).cast(schema), row_group_size=ROW_GROUP_SIZE)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+# -------------------- COLUMNAR CACHE --------------------
+@timed()
+def build_cache(path, fingerprint):
+    target = cache_path(path, fingerprint)
+    if os.path.exists(target):
+        return target
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp = target + ".tmp"
+    if streaming_enabled(path):
+        _write_csv_chunked(path, tmp)
+    else:
+        df = pd.read_csv(path, parse_dates=[DATE_COL])
+        df = optimize_dtypes(df)
+        df.to_parquet(tmp, index=False, row_group_size=ROW_GROUP_SIZE)
+    os.replace(tmp, target)
+
+    # Drop caches built from older versions of the same file
+    stale_pattern = cache_path(path, "*")
+    for stale in glob.glob(stale_pattern):
+        if stale != target:
+            os.remove(stale)
+    return target
+
+
+def base_files(path, fingerprint):
+    """
+    Parquet files holding the base dataset: the columnar cache of a CSV, a
+    Parquet file as is, or every file under a partitioned directory (e.g. one
+    per month; the files must carry all columns themselves).
+    """
+    if os.path.isdir(path):
+        return tuple(_parquet_files(path))
+    if path.endswith(".parquet"):
+        return (path,)
+    return (build_cache(path, fingerprint),)
+
+
+def dataset_columns(path=DATA_PATH):
+    """Column names, read from the Parquet schema alone."""
+    return pq.read_schema(base_files(path, file_fingerprint(path))[0]).names
+
+
+# -------------------- DAY PARTITIONS --------------------
+def list_partitions(path=DATA_PATH):
+    """Appended partition files in ingestion order (names sort by day, then sequence)."""
+    return sorted(glob.glob(os.path.join(partition_dir(path), "day-*.parquet")))
+
+
+def append_partition(new_rows, path=DATA_PATH):
+    """
+    Append new rows (typically one day of sales) to the dataset without touching
+    the base file. The rows are written as one Parquet partition with the base
+    cache's schema; readers pick it up through load_dataset and the fingerprint.
+    """
+    base = base_files(path, file_fingerprint(path))[0]
+    schema = pq.read_schema(base)
+    df = new_rows.copy()
+    df[DATE_COL] = pd.to_datetime(df[DATE_COL])
+    table = pa.Table.from_pandas(df[schema.names], preserve_index=False).cast(schema)
+
+    target_dir = partition_dir(path)
+    os.makedirs(target_dir, exist_ok=True)
+    day = df[DATE_COL].max().strftime("%Y%m%d")
+    target = os.path.join(target_dir, f"day-{day}-{len(list_partitions(path)):06d}.parquet")
+    pq.write_table(table, target + ".tmp", row_group_size=ROW_GROUP_SIZE)
+    os.replace(target + ".tmp", target)
+    return target
+
+
+def read_partition(partition_path, columns=None):
+    df = pq.read_table(partition_path, columns=list(columns) if columns else None).to_pandas()
+    for col in df.select_dtypes("category").columns:
+        df[col] = df[col].cat.remove_unused_categories()
+    return df
+
+
+@timed()
+def load_dataset(columns=None, path=DATA_PATH, partitions=None):
+    """
+    Load the supply chain dataset from its columnar cache.
+
+    columns: optional list of columns to read (projection).
+    partitions: appended day partitions to include (all of them by default).
+
+    The rows are not cached here: every caller builds something smaller from
+    them (cube, running stats, test groupings) and caches that instead.
+    """
+    partitions = list_partitions(path) if partitions is None else partitions
+    parquet_paths = (*base_files(path, file_fingerprint(path)), *partitions)
+    tables = [pq.read_table(parquet_path, columns=list(columns) if columns else None) for parquet_path in parquet_paths]
+    # Files written separately (months, partitions) are read with the first one's types
+    tables = [tables[0]] + [t.cast(tables[0].schema) for t in tables[1:]]
+    df = pa.concat_tables(tables).to_pandas()
+    # Partitions can carry dictionary entries with no rows (categories of the frame they were written from)
+    for col in df.select_dtypes("category").columns:
+        df[col] = df[col].cat.remove_unused_categories()
+    return df
+
+
+# -------------------- STREAMING --------------------
+def iter_chunks(parquet_paths, columns=None, chunk_rows=CHUNK_ROWS):
+    """
+    DataFrames of at most chunk_rows rows, read batch by batch from each file in
+    turn with column projection. Only one chunk is materialised at a time, so
+    memory is bounded by chunk_rows x columns whatever the dataset size.
+    """
+    for parquet_path in parquet_paths:
+        parquet_file = pq.ParquetFile(parquet_path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=list(columns) if columns else None):
+            if batch.num_rows:
+                yield batch.to_pandas()
+
+
+def iter_dataset(columns=None, path=DATA_PATH, partitions=None, chunk_rows=CHUNK_ROWS):
+    """Streaming counterpart of load_dataset: the base files, then the day partitions, in chunks."""
+    partitions = list_partitions(path) if partitions is None else partitions
+    yield from iter_chunks((*base_files(path, file_fingerprint(path)), *partitions), columns, chunk_rows)
+
+
+def date_range(parquet_paths, column=DATE_COL):
+    """(min, max) of a date column from the Parquet row-group statistics, without reading data."""
+    bounds = []
+    for parquet_path in parquet_paths:
+        metadata = pq.ParquetFile(parquet_path).metadata
+        j = metadata.schema.to_arrow_schema().get_field_index(column)
+        stats = [metadata.row_group(i).column(j).statistics for i in range(metadata.num_row_groups)]
+        if all(s is not None and s.has_min_max for s in stats):
+            bounds += [(pd.Timestamp(s.min), pd.Timestamp(s.max)) for s in stats]
+        else:
+            # No statistics written: scan the one column
+            values = pq.read_table(parquet_path, columns=[column])[column]
+            bounds.append((pd.Timestamp(pc.min(values).as_py()), pd.Timestamp(pc.max(values).as_py())))
+    bounds = [(lo, hi) for lo, hi in bounds if pd.notna(lo)]
+    return min(lo for lo, _ in bounds), max(hi for _, hi in bounds)
+
+
+def dataset_date_range(path=DATA_PATH, partitions=None):
+    partitions = list_partitions(path) if partitions is None else partitions
+    return date_range((*base_files(path, file_fingerprint(path)), *partitions))
+
+
+def dataset_fingerprint(path=DATA_PATH):
+    """Version of the base file plus every partition appended to it."""
+    fingerprint = file_fingerprint(path)
+    partitions = list_partitions(path)
+    if not partitions:
+        return fingerprint
+    names = "|".join(os.path.basename(p) for p in partitions)
+    return f"{fingerprint}+{hashlib.sha1(names.encode()).hexdigest()[:8]}"
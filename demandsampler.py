@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+
+# -------------------- CONFIG --------------------
+BLOCK_LENGTH = 7       # days drawn consecutively from one historical start (keeps weekly patterns)
+SEASONAL_JITTER = 3    # +/- days around the same calendar day in earlier years
+DAYS_PER_YEAR = 365
+
+
+# -------------------- DEMAND INDEX --------------------
+class DemandIndex:
+    """
+    Historical daily demand of every member in one flat float32 array (CSR).
+
+    Member j's history is values[offsets[j]:offsets[j + 1]], running from its
+    first to its last day with rows (days without sales inside that range are
+    0). first_day[j] is the position of that first day in `dates`, so the
+    calendar date of any sampled value is known.
+    """
+
+    def __init__(self, members, dates, offsets, values, first_day):
+        self.members = members
+        self.dates = dates
+        self.offsets = offsets
+        self.values = values
+        self.first_day = first_day
+        self.lengths = np.diff(offsets)
+
+    def __len__(self):
+        return len(self.members)
+
+    def history(self, member):
+        j = list(self.members).index(member)
+        start = self.dates[self.first_day[j]]
+        return pd.Series(
+            self.values[self.offsets[j]:self.offsets[j + 1]],
+            index=pd.date_range(start, periods=self.lengths[j], freq="D"), name=str(member)
+        )
+
+
+def active_range(daily_cube):
+    """
+    First and last day position with rows per member, and the (dates, members)
+    mask of the days between them. Members without rows get an empty range.
+    """
+    active = daily_cube.counts > 0
+    has_rows = active.any(axis=0)
+    n_dates = len(daily_cube.dates)
+    first = np.where(has_rows, active.argmax(axis=0), 0)
+    last = np.where(has_rows, n_dates - 1 - active[::-1].argmax(axis=0), -1)
+    days = np.arange(n_dates)[:, None]
+    return first, last, (days >= first[None, :]) & (days <= last[None, :])
+
+
+def build_demand_index(daily_cube, measure="Sales Quantity"):
+    values = daily_cube.values(measure)                  # (dates, members)
+    first, _, in_range = active_range(daily_cube)
+    in_range = in_range.T                                # (members, dates)
+    lengths = in_range.sum(axis=1)
+    offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+    flat = np.ascontiguousarray(values.T[in_range], dtype=np.float32)    # member-major, date order
+    return DemandIndex(daily_cube.members, daily_cube.dates, offsets, flat, first.astype(np.int64))
+
+
+# -------------------- SAMPLER --------------------
+class BootstrapDemand:
+    """
+    Block bootstrap of historical daily demand, a drop-in for NormalDemand.
+
+    Every block_length days each (path, member) draws a new start in its own
+    history and then reads consecutive days from it, so weekly patterns and
+    customer-mix spikes come through as observed. With seasonal=True the start
+    is the same calendar day (+/- jitter) in a randomly chosen earlier year;
+    members without such a year fall back to a uniform start.
+    """
+
+    def __init__(self, index, block_length=BLOCK_LENGTH, seasonal=False, start_date=None,
+                 jitter=SEASONAL_JITTER):
+        self.index = index
+        self.block_length = max(int(block_length), 1)
+        self.seasonal = seasonal
+        self.jitter = jitter
+        # Simulation day 0 is the day after the history ends unless told otherwise
+        self.start_date = pd.Timestamp(start_date) if start_date is not None else index.dates[-1] + pd.Timedelta(days=1)
+        self._position = None
+
+    def _uniform_starts(self, rng, n_paths, span):
+        room = np.maximum(self.index.lengths - span + 1, 1)
+        u = rng.random((n_paths, len(self.index)), dtype=np.float32)
+        return np.minimum((u * room).astype(np.int64), room - 1)
+
+    def _seasonal_starts(self, rng, n_paths, day, span):
+        index = self.index
+        target = (self.start_date - index.dates[0]).days + day           # target day, in `dates` positions
+        rel = target - index.first_day                                   # (members,) days after each history start
+        # Earlier years m with rel - m * 365 inside [0, length - span]
+        lo = np.maximum(np.ceil((rel - (index.lengths - span)) / DAYS_PER_YEAR), 1).astype(np.int64)
+        hi = np.floor(rel / DAYS_PER_YEAR).astype(np.int64)
+        n_years = np.maximum(hi - lo + 1, 0)
+
+        years = lo + (rng.random((n_paths, len(index)), dtype=np.float32) * n_years).astype(np.int64)
+        jitter = rng.integers(-self.jitter, self.jitter + 1, size=(n_paths, len(index)))
+        starts = rel - years * DAYS_PER_YEAR + jitter
+        starts = np.clip(starts, 0, np.maximum(index.lengths - span, 0))
+        return np.where(n_years > 0, starts, self._uniform_starts(rng, n_paths, span))
+
+    def sample(self, rng, day, n_paths):
+        if day % self.block_length == 0 or self._position is None or self._position.shape[0] != n_paths:
+            span = self.block_length
+            if self.seasonal:
+                starts = self._seasonal_starts(rng, n_paths, day, span)
+            else:
+                starts = self._uniform_starts(rng, n_paths, span)
+            self._position = self.index.offsets[:-1] + starts
+        # Stay inside each member's history when it is shorter than a block
+        position = np.minimum(self._position, self.index.offsets[1:] - 1)
+        self._position = self._position + 1
+        demand = self.index.values[np.maximum(position, 0)]
+        empty = self.index.lengths == 0
+        if empty.any():
+            demand[:, empty] = 0
+        return demand
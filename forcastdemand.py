@@ -5,192 +5,397 @@ os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
 import streamlit as st
 import pandas as pd
 import numpy as np
-from keras.models import Sequential
-from keras.layers import LSTM, Dense, Dropout
-from keras.optimizers import Adam
-from sklearn.preprocessing import MinMaxScaler
-from sklearn.metrics import mean_absolute_percentage_error
-from statsmodels.tsa.stattools import adfuller
 import plotly.graph_objects as go
+from timeseriescube import load_cube
+from datastore import dataset_fingerprint
+from forecastmodels import fit_global_model, rolling_mean, RECURSIVE, DIRECT
+from forecastpipeline import forecast_single_series, run_single_series_job
+from modelregistry import ModelRegistry, HIT, WARM
+from trainingcontrol import TrainingBudget
+from trainingjobs import JobManager, QueueFull, ACTIVE_STATES, DONE, FAILED, LOST
+from classicalforecast import fit_classical
+from windowing import FEATURE_CHANNELS
+from backtesting import run_backtest, summarize_backtest, CLASSICAL_METHODS, GLOBAL_LSTM
+from hierarchy import (
+    Hierarchy, BottomForecast, reconcile_forecast, upper_base_forecasts, RECONCILIATION_METHODS, BOTTOM_UP,
+    BOTTOM_LEVEL
+)
+from chartdata import add_line
+from instrumentation import start_page, stage
 
 # -------------------- CONFIG --------------------
 st.set_page_config(page_title="Forecast Future Demand", page_icon="📊", layout="wide")
+with start_page("Forecast Future Demand"):
+    JOB_POLL_SECONDS = 2
 
-# Load dataset
-df = pd.read_csv(
-    r"C:\Users\elroy\OneDrive\Desktop\Supplychain\ecommerce_supply_chain.csv",
-    parse_dates=["Date"]
-)
+    # Background training job ids submitted from this session
+    if "training_jobs" not in st.session_state:
+        st.session_state["training_jobs"] = []
 
-# -------------------- SIDEBAR --------------------
-st.sidebar.header("Forecast Settings")
+    # Pre-aggregated daily/weekly series for every SKU, Category and Supplier
+    with stage("load_cube"):
+        cube = load_cube()
 
-# Forecast granularity
-forecast_level = st.sidebar.selectbox("Forecast by:", ["SKU", "Category", "Supplier"])
+    # -------------------- SIDEBAR --------------------
+    st.sidebar.header("Forecast Settings")
 
-# Unique list based on chosen granularity
-if forecast_level == "SKU":
-    options = df["SKU"].unique()
-elif forecast_level == "Category":
-    options = df["Category"].unique()
-else:
-    options = df["Supplier"].unique()
+    # Forecast granularity
+    forecast_level = st.sidebar.selectbox("Forecast by:", ["SKU", "Category", "Supplier"])
 
-selected_option = st.sidebar.selectbox(f"Choose {forecast_level}:", options)
+    # Unique list based on chosen granularity
+    options = cube.daily(forecast_level).members
 
-# Adjustable time_steps for LSTM sequence length
-time_steps = st.sidebar.slider("Time Steps (LSTM Sequence Length)", min_value=4, max_value=52, value=24, step=1)
+    selected_option = st.sidebar.selectbox(f"Choose {forecast_level}:", options)
 
-target_column = "Sales Quantity"  # fixed for demand forecasting
+    # Classical fits seasonal naive, SES, Holt-Winters and Croston to every series at once
+    forecast_method = st.sidebar.radio("Forecast Method", ["LSTM", "Classical (fast)"])
 
-# Instructions
-st.sidebar.markdown(
-    """
-    ### Instructions:
-    1. Select forecast level (SKU, Category, or Supplier).
-    2. Pick an item from the dropdown.
-    3. Adjust time steps if needed.
-    4. Click **Train Model and Forecast**.
-    """
-)
+    # Adjustable time_steps for LSTM sequence length
+    time_steps = st.sidebar.slider("Time Steps (LSTM Sequence Length)", min_value=4, max_value=52, value=24, step=1)
 
-# -------------------- FORECAST BUTTON --------------------
-if st.sidebar.button("Train Model and Forecast"):
-    # Filter data based on selection
-    df_filtered = df[df[forecast_level] == selected_option]
-
-    # Aggregate sales over time
-    df_forecast = df_filtered.groupby("Date")[target_column].sum().reset_index()
-    df_forecast.set_index("Date", inplace=True)
-
-    # -------------------- STATIONARITY CHECK --------------------
-    def check_stationarity(timeseries):
-        result = adfuller(timeseries)
-        return timeseries if result[1] <= 0.05 else timeseries.diff().dropna()
-
-    df_forecast[target_column] = check_stationarity(df_forecast[target_column])
-    df_forecast = df_forecast.resample('W').sum()  # Weekly aggregation
-    df_forecast["Rolling Sales"] = df_forecast[target_column].rolling(window=4, min_periods=1).mean()
-    df_forecast.dropna(subset=["Rolling Sales"], inplace=True)
-
-    # -------------------- SCALING --------------------
-    scaler = MinMaxScaler()
-    df_forecast["Scaled"] = scaler.fit_transform(df_forecast[["Rolling Sales"]])
-
-    # Train-Test Split
-    split_idx = int(len(df_forecast) * 0.8)
-    train_data = df_forecast.iloc[:split_idx]
-    test_data = df_forecast.iloc[split_idx:]
-
-    # Check for minimum data length
-    min_required_points = time_steps + 5  # buffer
-
-    if len(train_data) < min_required_points or len(test_data) < min_required_points:
-        st.error(
-            f"Not enough data points to forecast {forecast_level}: {selected_option}. "
-            f"Need at least {min_required_points} points in train and test sets, "
-            f"but got {len(train_data)} (train) and {len(test_data)} (test). "
-            "Try selecting another option or reducing time steps."
-        )
-        st.stop()
+    # Single series: one model for the selection. Global: one model for every member of the level.
+    # Hierarchical: SKU forecasts only (classical or global LSTM); every Category/Supplier sums them up.
+    forecast_mode = st.sidebar.radio(
+        "Forecast Mode", ["Single series", "Global (all members)", "Hierarchical (reconciled)"]
+    )
+    use_embedding = False
+    if forecast_mode != "Single series":
+        use_embedding = st.sidebar.checkbox("Learn a per-series embedding", value=True)
+    reconciliation = RECONCILIATION_METHODS[0]
+    if forecast_mode == "Hierarchical (reconciled)":
+        reconciliation = st.sidebar.radio("Reconciliation", RECONCILIATION_METHODS)
+
+    # Recursive feeds each weekly prediction back in; Direct predicts all 52 weeks in one pass
+    forecast_strategy = st.sidebar.radio("Forecast Strategy", [RECURSIVE, DIRECT])
+
+    # Extra LSTM input channels next to Rolling Sales (weekly means, last value held for the forecast)
+    extra_features = []
+    if forecast_mode == "Single series":
+        extra_features = st.sidebar.multiselect("Extra Input Features", FEATURE_CHANNELS)
+
+    # Background training keeps the page usable; results appear below once the job finishes
+    run_in_background = False
+    if forecast_mode == "Single series":
+        run_in_background = st.sidebar.checkbox("Train in background", value=False)
+
+    # Training budget: training stops at whichever limit is hit first
+    with st.sidebar.expander("Training Budget"):
+        max_epochs = st.slider("Max Epochs", min_value=10, max_value=300, value=200, step=10)
+        max_seconds = st.slider("Max Training Time (seconds)", min_value=10, max_value=600, value=120, step=10)
+        early_stopping = st.checkbox("Early stopping on validation loss", value=True)
+        patience = st.slider("Early Stopping Patience (epochs)", min_value=5, max_value=50, value=20, step=1)
+    budget_args = (max_epochs, max_seconds, patience, early_stopping)
+
+    # Rolling-origin backtest of every method over all members of the level
+    with st.sidebar.expander("Backtesting"):
+        backtest_horizon = st.slider("Backtest Horizon (weeks)", min_value=4, max_value=26, value=12, step=1)
+        backtest_origins = st.slider("Rolling Origins", min_value=2, max_value=12, value=6, step=1)
+        backtest_lstm = st.checkbox("Include Global LSTM (slower)", value=False)
+        run_backtest_clicked = st.button("Run Backtest")
+
+    target_column = "Sales Quantity"  # fixed for demand forecasting
+
+    # Instructions
+    st.sidebar.markdown(
+        """
+        ### Instructions:
+        1. Select forecast level (SKU, Category, or Supplier).
+        2. Pick an item from the dropdown.
+        3. Adjust time steps if needed.
+        4. Choose a forecast method (Classical picks the best statistical model per item in seconds).
+        5. Choose a forecast mode (Global trains once for every item of the level; Hierarchical
+           forecasts SKUs once and sums them up to every Category and Supplier).
+        6. Click **Train Model and Forecast**.
+        """
+    )
 
-    # Create LSTM sequences
-    def create_lstm_data(series, ts):
-        X, y = [], []
-        for i in range(len(series) - ts):
-            X.append(series[i: i + ts])
-            y.append(series[i + ts])
-        return np.array(X), np.array(y)
+    # -------------------- PLOTTING --------------------
+    def render_forecast(train_actual, test_actual, pred_series, future_series, mape, model_name="LSTM", label=None):
+        label = label or f"{forecast_level}: {selected_option}"
+        st.subheader(f"{model_name} Forecast for {label}")
+        st.metric("Forecast Accuracy (MAPE)", f"{mape * 100:.2f} %")
+
+        # Traces are downsampled to the chart's pixel budget and sent as typed arrays
+        fig = go.Figure()
+        add_line(fig, train_actual, mode='lines', name='Train Data', line=dict(color='blue', width=2))
+        add_line(fig, test_actual, mode='lines', name='Test Data', line=dict(color='green', width=2))
+        add_line(fig, pred_series, mode='lines', name='Predictions', line=dict(color='red', dash='dash'))
+        add_line(fig, future_series, mode='lines', name='Future Forecast', line=dict(color='purple', dash='dot'))
+
+        fig.update_layout(
+            title=f"1-Year {model_name} Forecast for {label}",
+            xaxis_title="Date", yaxis_title=target_column,
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+            template="plotly_white"
+        )
 
-    train_series = train_data["Scaled"].values
-    test_series = test_data["Scaled"].values
+        st.plotly_chart(fig)
+
+        # Forecast table
+        st.subheader("Forecasted Sales Data")
+        forecast_df = pd.DataFrame({"Date": future_series.index, "Predicted Sales": future_series.values})
+        st.dataframe(forecast_df.set_index("Date"))
+
+
+    def render_training_telemetry(telemetry):
+        if telemetry is None or telemetry.epochs_run == 0:
+            return
+        with st.expander("Training Telemetry"):
+            st.caption(telemetry.summary())
+            if not telemetry.validated:
+                st.warning("Too few training windows to hold out a validation set, so early stopping "
+                           "(if enabled) monitored the training loss.")
+            history = telemetry.to_frame()
+            fig = go.Figure()
+            add_line(fig, history["loss"], mode='lines', name='Training Loss')
+            if history["val_loss"].notna().any():
+                add_line(fig, history["val_loss"], mode='lines', name='Validation Loss')
+            fig.update_layout(xaxis_title="Epoch", yaxis_title="MSE", template="plotly_white")
+            st.plotly_chart(fig)
+
+
+    def render_single_series(result):
+        if result.model_status == HIT:
+            st.caption(
+                f"Loaded stored model trained on {result.stored['last_date']} data "
+                f"(MAPE {result.stored['mape'] * 100:.2f} %)."
+            )
+        elif result.model_status == WARM:
+            st.caption(f"Fine-tuned stored model from {result.stored['last_date']} on the new weeks of data.")
+        render_forecast(
+            result.train_actual, result.test_actual, result.pred_series, result.future_series, result.mape,
+            label=f"{result.level}: {result.member}"
+        )
+        render_training_telemetry(result.telemetry)
 
-    X_train, y_train = create_lstm_data(train_series, time_steps)
-    X_test, y_test = create_lstm_data(test_series, time_steps)
 
-    if X_train.size == 0 or X_test.size == 0:
-        st.error(f"Time steps ({time_steps}) too large for dataset size. Try lowering time steps.")
-        st.stop()
+    # -------------------- MODEL REGISTRY --------------------
+    @st.cache_resource
+    def get_model_registry():
+        return ModelRegistry()
 
-    X_train = X_train.reshape((X_train.shape[0], X_train.shape[1], 1))
-    X_test = X_test.reshape((X_test.shape[0], X_test.shape[1], 1))
 
-    # -------------------- LSTM MODEL --------------------
+    # -------------------- TRAINING JOBS --------------------
     @st.cache_resource
-    def build_lstm():
-        model = Sequential([
-            LSTM(100, return_sequences=True, input_shape=(time_steps, 1)),
-            Dropout(0.3),
-            LSTM(100, return_sequences=True),
-            Dropout(0.3),
-            LSTM(50),
-            Dense(1)
-        ])
-        model.compile(optimizer=Adam(learning_rate=0.001), loss='mse')
-        return model
-
-    lstm_model = build_lstm()
-    lstm_model.fit(X_train, y_train, epochs=200, batch_size=16, verbose=0)
-
-    # -------------------- PREDICTIONS --------------------
-    lstm_predictions = lstm_model.predict(X_test)
-    lstm_predictions = scaler.inverse_transform(lstm_predictions)
-
-    pred_series_lstm = pd.Series(lstm_predictions.flatten(), index=test_data.index[time_steps:])
-
-    mape_lstm = mean_absolute_percentage_error(test_data["Rolling Sales"].iloc[time_steps:], pred_series_lstm)
-
-    # -------------------- FUTURE FORECAST --------------------
-    forecast_steps = 52
-    lstm_forecast = []
-    last_data = test_data["Scaled"].values[-time_steps:]
-
-    for _ in range(forecast_steps):
-        input_data = last_data.reshape((1, time_steps, 1))
-        pred = lstm_model.predict(input_data)[0, 0]
-        lstm_forecast.append(pred)
-        last_data = np.append(last_data[1:], pred)
-
-    lstm_forecast = scaler.inverse_transform(np.array(lstm_forecast).reshape(-1, 1))
-    forecast_dates = pd.date_range(test_data.index[-1], periods=forecast_steps + 1, freq='W')[1:]
-    pred_series_future = pd.Series(lstm_forecast.flatten(), index=forecast_dates)
+    def get_job_manager():
+        return JobManager()
+
+
+    # -------------------- GLOBAL MODEL --------------------
+    @st.cache_resource(show_spinner="Training global model across all series...")
+    def train_global_model(level, time_steps, use_embedding, strategy, fingerprint,
+                           max_epochs, max_seconds, early_stopping, patience):
+        budget = TrainingBudget(max_epochs, max_seconds, patience, early_stopping)
+        return fit_global_model(
+            cube.weekly(level), target_column, time_steps, use_embedding=use_embedding, strategy=strategy,
+            budget=budget
+        )
 
-    # -------------------- PLOTTING --------------------
-    st.subheader(f"LSTM Forecast for {forecast_level}: {selected_option}")
-    st.metric("Forecast Accuracy (MAPE)", f"{mape_lstm * 100:.2f} %")
-
-    fig = go.Figure()
-
-    fig.add_trace(go.Scatter(
-        x=train_data.index, y=train_data["Rolling Sales"],
-        mode='lines', name='Train Data', line=dict(color='blue', width=2)
-    ))
-
-    fig.add_trace(go.Scatter(
-        x=test_data.index, y=test_data["Rolling Sales"],
-        mode='lines', name='Test Data', line=dict(color='green', width=2)
-    ))
-
-    fig.add_trace(go.Scatter(
-        x=pred_series_lstm.index, y=pred_series_lstm,
-        mode='lines', name='Predictions', line=dict(color='red', dash='dash')
-    ))
-
-    fig.add_trace(go.Scatter(
-        x=pred_series_future.index, y=pred_series_future,
-        mode='lines', name='Future Forecast', line=dict(color='purple', dash='dot')
-    ))
-
-    fig.update_layout(
-        title=f"1-Year LSTM Forecast for {forecast_level}: {selected_option}",
-        xaxis_title="Date", yaxis_title=target_column,
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-        template="plotly_white"
-    )
 
-    st.plotly_chart(fig)
+    # -------------------- CLASSICAL MODELS --------------------
+    @st.cache_resource(show_spinner="Fitting classical models to every series...")
+    def train_classical_models(level, fingerprint):
+        weekly = cube.weekly(level)
+        rolling = rolling_mean(weekly.values(target_column).astype(np.float64))
+        return fit_classical(rolling.T, weekly.members, weekly.dates, level=level)
+
+
+    # -------------------- HIERARCHICAL --------------------
+    @st.cache_resource(show_spinner=False)
+    def get_hierarchy(fingerprint):
+        return Hierarchy.from_cube(cube)
+
+
+    def bottom_level_forecast(fingerprint, lstm_settings=None):
+        """
+        SKU forecasts from the cached classical fit of the SKU level, or from the
+        cached global LSTM trained with lstm_settings (trained once).
+        """
+        if lstm_settings is None:
+            return BottomForecast.from_classical(train_classical_models(BOTTOM_LEVEL, fingerprint))
+        steps, embedding, strategy, *budget = lstm_settings
+        return BottomForecast.from_global(
+            train_global_model(BOTTOM_LEVEL, steps, embedding, strategy, fingerprint, *budget)
+        )
+
+
+    @st.cache_resource(show_spinner="Forecasting every aggregate...")
+    def aggregate_base_forecasts(fingerprint, lstm_settings=None):
+        """Classical forecasts of every aggregate node, fitted once per bottom model and shared by OLS and MinT."""
+        return upper_base_forecasts(get_hierarchy(fingerprint), bottom_level_forecast(fingerprint, lstm_settings))
+
+
+    @st.cache_resource(show_spinner="Reconciling forecasts across the hierarchy...")
+    def reconciled_forecast(method, fingerprint, lstm_settings=None):
+        bottom = bottom_level_forecast(fingerprint, lstm_settings)
+        upper = None if method == BOTTOM_UP else aggregate_base_forecasts(fingerprint, lstm_settings)
+        return reconcile_forecast(get_hierarchy(fingerprint), bottom, method, upper)
+
+
+    # -------------------- BACKTESTING --------------------
+    @st.cache_data(show_spinner="Backtesting every method across rolling origins...")
+    def backtest_level(level, horizon, n_origins, include_lstm, fingerprint):
+        weekly = cube.weekly(level)
+        rolling = rolling_mean(weekly.values(target_column).astype(np.float64))
+        methods = CLASSICAL_METHODS + ([GLOBAL_LSTM] if include_lstm else [])
+        return run_backtest(rolling.T, weekly.members, weekly.dates, horizon=horizon, methods=methods,
+                            n_origins=n_origins)
+
+
+    if run_backtest_clicked:
+        try:
+            with stage("backtest"):
+                backtest = backtest_level(
+                    forecast_level, backtest_horizon, backtest_origins, backtest_lstm, dataset_fingerprint()
+                )
+        except ValueError as exc:
+            st.error(str(exc))
+            st.stop()
+
+        by_horizon, by_member = summarize_backtest(backtest)
+        st.subheader(f"Backtest MAPE (%) by Horizon across {backtest['origin'].nunique()} Origins")
+        st.dataframe((by_horizon * 100).round(2))
+        st.subheader(f"Backtest MAPE by {forecast_level}")
+        st.dataframe(by_member)
+
+
+    # -------------------- FORECAST BUTTON --------------------
+    run_forecast = st.sidebar.button("Train Model and Forecast")
+
+    if run_forecast and forecast_mode == "Hierarchical (reconciled)":
+        lstm_settings = None if forecast_method == "Classical (fast)" else (
+            time_steps, use_embedding, forecast_strategy, max_epochs, max_seconds, early_stopping, patience
+        )
+        try:
+            with stage("hierarchical forecast"):
+                hierarchical = reconciled_forecast(reconciliation, dataset_fingerprint(), lstm_settings)
+        except ValueError as exc:
+            st.error(str(exc))
+            st.stop()
+
+        train_actual, test_actual, pred_series, future_series = hierarchical.member_frames(
+            forecast_level, selected_option
+        )
+        level_mape = hierarchical.mape(forecast_level)
+        render_forecast(
+            train_actual, test_actual, pred_series, future_series, level_mape[selected_option],
+            model_name=f"{hierarchical.source} + {reconciliation}"
+        )
+        st.caption(
+            f"{len(hierarchical.hierarchy.bottom_members)} SKU forecasts from one {hierarchical.source} fit; "
+            f"every Category, Supplier and Product Family forecast is their sum through the summing matrix, "
+            f"so the levels add up."
+        )
+
+        st.subheader(f"Forecast Accuracy for every {forecast_level}")
+        st.dataframe(level_mape.to_frame())
+        st.subheader(f"Forecasted Sales for every {forecast_level}")
+        st.dataframe(hierarchical.forecast_table(forecast_level))
+
+    elif run_forecast and forecast_method == "Classical (fast)":
+        with stage("classical models"):
+            classical_forecast = train_classical_models(forecast_level, dataset_fingerprint())
+
+        train_actual, test_actual, pred_series, future_series = classical_forecast.member_frames(selected_option)
+        best_method = classical_forecast.best_method[selected_option]
+        render_forecast(
+            train_actual, test_actual, pred_series, future_series,
+            classical_forecast.mape.loc[selected_option, best_method], model_name=best_method
+        )
 
-    # -------------------- SHOW FORECAST TABLE --------------------
-    st.subheader("Forecasted Sales Data")
-    forecast_df = pd.DataFrame({"Date": pred_series_future.index, "Predicted Sales": pred_series_future.values})
-    st.dataframe(forecast_df.set_index("Date"))
+        st.subheader(f"Holdout MAPE by Method for every {forecast_level}")
+        st.dataframe(classical_forecast.summary())
+        st.subheader(f"Forecasted Sales for every {forecast_level}")
+        st.dataframe(classical_forecast.forecast_table())
+
+    elif run_forecast and forecast_mode == "Global (all members)":
+        try:
+            with stage("global model"):
+                global_forecast = train_global_model(
+                    forecast_level, time_steps, use_embedding, forecast_strategy, dataset_fingerprint(),
+                    max_epochs, max_seconds, early_stopping, patience
+                )
+        except ValueError as exc:
+            st.error(str(exc))
+            st.stop()
+
+        train_actual, test_actual, pred_series, future_series = global_forecast.member_frames(selected_option)
+        render_forecast(train_actual, test_actual, pred_series, future_series, global_forecast.mape[selected_option])
+
+        render_training_telemetry(global_forecast.telemetry)
+
+        st.subheader(f"Forecast Accuracy for every {forecast_level}")
+        st.dataframe(global_forecast.mape.to_frame())
+        st.subheader(f"Forecasted Sales for every {forecast_level}")
+        st.dataframe(global_forecast.forecast_table())
+
+    elif run_forecast and run_in_background:
+        try:
+            job_id = get_job_manager().submit(
+                (forecast_level, selected_option, time_steps, forecast_strategy, extra_features, budget_args),
+                run_single_series_job, forecast_level, selected_option, time_steps, forecast_strategy,
+                tuple(extra_features), budget_args, label=f"{forecast_level}: {selected_option} ({time_steps} steps)"
+            )
+        except QueueFull as exc:
+            st.error(str(exc))
+            st.stop()
+        if job_id not in st.session_state["training_jobs"]:
+            st.session_state["training_jobs"].append(job_id)
+        st.rerun()
+
+    elif run_forecast:
+        try:
+            with st.spinner(f"Training LSTM for {forecast_level}: {selected_option}..."), stage("single series"):
+                result = forecast_single_series(
+                    cube, forecast_level, selected_option, time_steps, forecast_strategy, extra_features,
+                    budget=TrainingBudget(*budget_args), registry=get_model_registry(),
+                    fingerprint=dataset_fingerprint()
+                )
+        except ValueError as exc:
+            st.error(str(exc))
+            st.stop()
+
+        render_single_series(result)
+
+
+    # -------------------- BACKGROUND JOBS --------------------
+    def render_job(manager, status):
+        job_id = status["job_id"]
+        state = status["state"]
+        st.markdown(f"**{status.get('label', job_id)}** — {state}")
+
+        if state in ACTIVE_STATES:
+            st.progress(status["progress"], text=status["message"] or state)
+            if st.button("Cancel", key=f"cancel-{job_id}"):
+                manager.cancel(job_id)
+            return
+
+        if state == DONE:
+            render_single_series(manager.result(job_id))
+        elif state == FAILED:
+            st.error(status.get("error") or "Training job failed.")
+        elif state == LOST:
+            st.warning("This job was interrupted (the app restarted before it finished). Submit it again.")
+        if st.button("Dismiss", key=f"dismiss-{job_id}"):
+            st.session_state["training_jobs"].remove(job_id)
+            st.rerun()
+
+
+    job_statuses = [get_job_manager().status(job_id) for job_id in st.session_state["training_jobs"]]
+    jobs_running = any(status["state"] in ACTIVE_STATES for status in job_statuses)
+
+
+    # Poll only while something is queued or running; the last job finishing triggers a full rerun
+    @st.fragment(run_every=JOB_POLL_SECONDS if jobs_running else None)
+    def training_jobs_panel():
+        manager = get_job_manager()
+        statuses = [manager.status(job_id) for job_id in st.session_state["training_jobs"]]
+        if jobs_running and not any(status["state"] in ACTIVE_STATES for status in statuses):
+            st.rerun()
+        if statuses:
+            st.header("Background Training Jobs")
+        for status in statuses:
+            render_job(manager, status)
+
+
+    training_jobs_panel()
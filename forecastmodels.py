@@ -0,0 +1,241 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from trainingcontrol import TrainingBudget, train_with_budget
+from windowing import WindowSet, mape
+from lstmruntime import NumpyLSTM
+from instrumentation import timed
+
+# -------------------- CONFIG --------------------
+FORECAST_STEPS = 52
+ROLLING_WINDOW = 4
+TRAIN_FRACTION = 0.8
+
+RECURSIVE = "Recursive"  # one-step model fed back into itself
+DIRECT = "Direct"        # multi-output head emits every horizon in one pass
+
+
+# -------------------- MODEL --------------------
+def build_lstm(time_steps, n_features=1, n_series=None, embedding_dim=8, horizon=1):
+    """
+    Same 3-layer LSTM stack the forecasting page uses. When n_series is given the
+    model takes a second input (series id) whose embedding is fed at every step.
+    horizon > 1 gives a direct multi-output head (one unit per forecast week).
+    Keras is imported here, so only code paths that train pay for TensorFlow.
+    """
+    from keras.models import Model
+    from keras.layers import Input, LSTM, Dense, Dropout, Embedding, Flatten, RepeatVector, Concatenate
+    from keras.optimizers import Adam
+
+    window = Input(shape=(time_steps, n_features), name="window")
+    inputs = [window]
+    x = window
+    if n_series:
+        series_id = Input(shape=(1,), dtype="int32", name="series_id")
+        emb = Flatten()(Embedding(n_series, embedding_dim)(series_id))
+        x = Concatenate()([x, RepeatVector(time_steps)(emb)])
+        inputs.append(series_id)
+
+    x = LSTM(100, return_sequences=True)(x)
+    x = Dropout(0.3)(x)
+    x = LSTM(100, return_sequences=True)(x)
+    x = Dropout(0.3)(x)
+    x = LSTM(50)(x)
+    output = Dense(horizon)(x)
+
+    model = Model(inputs=inputs if n_series else window, outputs=output)
+    model.compile(optimizer=Adam(learning_rate=0.001), loss="mse")
+    return model
+
+
+def architecture_id(horizon=1, n_series=None, embedding_dim=8, features=()):
+    """Short name for build_lstm's configuration, used as part of the model registry key."""
+    name = f"lstm100-100-50-h{horizon}"
+    if features:
+        name += "-x" + "+".join("".join(ch for ch in f if ch.isalnum()) for f in features)
+    if n_series:
+        name += f"-emb{n_series}x{embedding_dim}"
+    return name
+
+
+# -------------------- PREPROCESSING --------------------
+def rolling_mean(values, window=ROLLING_WINDOW):
+    """Trailing mean along axis 0 with min_periods=1 (pandas .rolling(window).mean())."""
+    csum = np.cumsum(values, axis=0)
+    out = csum.copy()
+    out[window:] = csum[window:] - csum[:-window]
+    periods = np.minimum(np.arange(1, len(values) + 1), window)
+    return out / periods[:, None]
+
+
+def minmax_scale(values, active):
+    """Per-column min/max scaling over the active cells; returns scaled, min, range."""
+    masked = np.where(active, values, np.nan)
+    with np.errstate(invalid="ignore"):
+        col_min = np.nanmin(masked, axis=0)
+        col_range = np.nanmax(masked, axis=0) - col_min
+    col_min = np.nan_to_num(col_min)
+    col_range = np.where(np.isfinite(col_range) & (col_range > 0), col_range, 1.0)
+    return (values - col_min) / col_range, col_min, col_range
+
+
+def pooled_windows(scaled, active, time_steps, horizon=1):
+    """
+    Windows from every column of a (weeks x series) matrix, pooled into one
+    training set. Windows touching inactive weeks are dropped.
+    Returns X (n, time_steps, 1), y (n,) or (n, horizon), series ids (n,).
+    """
+    windows = WindowSet(scaled.T[:, :, None], time_steps, horizon, active=active.T)
+    return windows.arrays()
+
+
+# -------------------- MULTI-STEP FORECAST --------------------
+def as_window_batch(last_windows):
+    window = np.asarray(last_windows, dtype=np.float32)
+    return window[:, :, None] if window.ndim == 2 else window
+
+
+@lru_cache(maxsize=16)
+def _recursive_forecaster(model, steps, use_embedding):
+    """Compiled recursive loop; predictions go into a preallocated TensorArray."""
+    import tensorflow as tf
+
+    @tf.function(reduce_retracing=True)
+    def run(window, series_ids):
+        buffer = tf.TensorArray(window.dtype, size=steps)
+        for step in tf.range(steps):
+            inputs = [window, series_ids] if use_embedding else window
+            pred = model(inputs, training=False)[:, :1]
+            buffer = buffer.write(step, pred[:, 0])
+            # Extra input channels carry their last observed value forward
+            next_row = tf.concat([pred[:, None, :], window[:, -1:, 1:]], axis=2)
+            window = tf.concat([window[:, 1:, :], next_row], axis=1)
+        return tf.transpose(buffer.stack())
+
+    return run
+
+
+@timed()
+def forecast_recursive(model, last_windows, steps=FORECAST_STEPS, series_ids=None):
+    """
+    Roll a one-step model forward for a batch of series.
+    last_windows: (n_series, time_steps) or (n_series, time_steps, channels) scaled
+    history, target in channel 0. Returns (n_series, steps).
+    A NumpyLSTM runs the same loop in NumPy, without TensorFlow.
+    """
+    if isinstance(model, NumpyLSTM):
+        return model.forecast_recursive(as_window_batch(last_windows), steps, series_ids)
+    import tensorflow as tf
+
+    window = tf.convert_to_tensor(as_window_batch(last_windows))
+    use_embedding = series_ids is not None
+    ids = tf.convert_to_tensor(
+        np.asarray(series_ids if use_embedding else np.zeros(len(window)), dtype=np.int32)[:, None]
+    )
+    return _recursive_forecaster(model, steps, use_embedding)(window, ids).numpy()
+
+
+@timed()
+def forecast_direct(model, last_windows, series_ids=None):
+    """All horizons for a batch of series from one forward pass. Returns (n_series, horizon)."""
+    window = as_window_batch(last_windows)
+    inputs = [window, np.asarray(series_ids, dtype=np.int32)[:, None]] if series_ids is not None else window
+    return np.asarray(model(inputs, training=False))
+
+
+# -------------------- GLOBAL MODEL --------------------
+class GlobalForecast:
+    """Outputs of one global model fitted across every member of a level."""
+
+    def __init__(self, members, dates, actual, split_idx, time_steps, test_pred, future, future_dates, mape,
+                 telemetry=None):
+        self.members = members
+        self.dates = dates
+        self.actual = actual
+        self.split_idx = split_idx
+        self.time_steps = time_steps
+        self.test_pred = test_pred
+        self.future = future
+        self.future_dates = future_dates
+        self.mape = mape
+        self.telemetry = telemetry
+
+    def member_frames(self, member):
+        """Train/test actuals, test predictions and future forecast for one member."""
+        j = list(self.members).index(member)
+        actual = pd.Series(self.actual[:, j], index=self.dates)
+        train = actual.iloc[:self.split_idx]
+        test = actual.iloc[self.split_idx:]
+        pred = pd.Series(self.test_pred[:, j], index=test.index[self.time_steps:])
+        future = pd.Series(self.future[:, j], index=self.future_dates)
+        return train, test, pred, future
+
+    def forecast_table(self):
+        return pd.DataFrame(self.future, index=pd.Index(self.future_dates, name="Date"), columns=self.members)
+
+
+def model_inputs(X, series_ids, use_embedding):
+    return [X, series_ids[:, None]] if use_embedding else X
+
+
+@timed()
+def fit_global_model(weekly_cube, measure, time_steps, use_embedding=False, strategy=RECURSIVE,
+                     budget=None, forecast_steps=FORECAST_STEPS):
+    """
+    Train one LSTM on windows pooled from every member of a weekly LevelCube and
+    forecast all members with batched predict calls.
+    """
+    horizon = forecast_steps if strategy == DIRECT else 1
+    members = weekly_cube.members
+    n_series = len(members)
+    active = weekly_cube.counts > 0
+    rolling = rolling_mean(weekly_cube.values(measure).astype(np.float64))
+    scaled, col_min, col_range = minmax_scale(rolling, active)
+
+    split_idx = int(len(scaled) * TRAIN_FRACTION)
+    X_train, y_train, ids_train = pooled_windows(scaled[:split_idx], active[:split_idx], time_steps, horizon)
+    if len(X_train) == 0 or len(scaled) - split_idx <= time_steps:
+        raise ValueError(
+            f"Time steps ({time_steps}) too large for {len(scaled)} weeks of data"
+            + (f" with a {horizon}-week direct horizon" if horizon > 1 else "")
+            + ". Try lowering time steps."
+        )
+
+    model = build_lstm(time_steps, n_series=n_series if use_embedding else None, horizon=horizon)
+    # Shuffle once so the controller's trailing validation windows span all series
+    order = np.random.default_rng(0).permutation(len(y_train))
+    X_train, y_train, ids_train = X_train[order], y_train[order], ids_train[order]
+    telemetry = train_with_budget(
+        model, model_inputs(X_train, ids_train, use_embedding), y_train,
+        budget or TrainingBudget(max_epochs=50)
+    )
+
+    # Test windows for every series in one predict call
+    test_scaled = scaled[split_idx:]
+    test_windows = np.lib.stride_tricks.sliding_window_view(test_scaled, time_steps, axis=0)[:-1]
+    n_test = test_windows.shape[0]
+    X_test = test_windows.reshape(-1, time_steps)[:, :, None]  # (n_test * n_series, ts, 1)
+    ids_test = np.tile(np.arange(n_series, dtype=np.int32), n_test)
+    test_pred = model.predict(model_inputs(X_test, ids_test, use_embedding), verbose=0)
+    # One-step-ahead accuracy in both strategies (first horizon of the direct head)
+    test_pred = test_pred[:, 0].reshape(n_test, n_series) * col_range + col_min
+
+    actual_test = rolling[split_idx + time_steps:]
+    scores = pd.Series(
+        mape(actual_test, test_pred), index=pd.Index(members, name=weekly_cube.level), name="MAPE"
+    )
+
+    ids_all = np.arange(n_series, dtype=np.int32) if use_embedding else None
+    last_data = test_scaled[-time_steps:].T  # (n_series, ts)
+    if strategy == DIRECT:
+        future = forecast_direct(model, last_data, ids_all)
+    else:
+        future = forecast_recursive(model, last_data, forecast_steps, ids_all)
+    future = future.T * col_range + col_min
+
+    dates = weekly_cube.dates
+    future_dates = pd.date_range(dates[-1], periods=forecast_steps + 1, freq="W")[1:]
+    return GlobalForecast(members, dates, rolling, split_idx, time_steps, test_pred, future, future_dates, scores,
+                          telemetry)
@@ -0,0 +1,202 @@
+import numpy as np
+import pandas as pd
+
+from datastore import dataset_fingerprint, DATA_PATH
+from forecastmodels import (
+    build_lstm, architecture_id, forecast_recursive, forecast_direct, FORECAST_STEPS, RECURSIVE, DIRECT
+)
+from modelregistry import ModelRegistry, HIT, WARM, WARM_START_EPOCHS
+from trainingcontrol import TrainingBudget, train_with_budget
+from windowing import sliding_windows, minmax_channels, ChannelScaler, mape
+from instrumentation import timed, stage
+
+TARGET_COLUMN = "Sales Quantity"
+
+
+class SingleSeriesForecast:
+    """
+    Everything the forecasting page renders for one trained (or loaded) model.
+    stored is the registry meta the model was loaded from (None when trained from scratch).
+    """
+
+    def __init__(self, level, member, train_actual, test_actual, pred_series, future_series, mape,
+                 telemetry=None, model_status=None, stored=None):
+        self.level = level
+        self.member = member
+        self.train_actual = train_actual
+        self.test_actual = test_actual
+        self.pred_series = pred_series
+        self.future_series = future_series
+        self.mape = mape
+        self.telemetry = telemetry
+        self.model_status = model_status
+        self.stored = stored
+
+
+@timed("adfuller")
+def is_stationary(timeseries):
+    from statsmodels.tsa.stattools import adfuller
+
+    return adfuller(timeseries)[1] <= 0.05
+
+
+def check_stationarity(timeseries, differenced=None):
+    """
+    Difference the series unless the ADF test finds it stationary. A decision
+    already stored with a model of the same data (differenced) skips the test.
+    Returns the series and whether it was differenced.
+    """
+    if differenced is None:
+        differenced = not is_stationary(timeseries)
+    return (timeseries.diff().dropna() if differenced else timeseries), bool(differenced)
+
+
+def forecast_single_series(cube, level, member, time_steps, strategy=RECURSIVE, extra_features=(),
+                           budget=None, registry=None, fingerprint=None, callbacks=(),
+                           target_column=TARGET_COLUMN, forecast_steps=FORECAST_STEPS):
+    """
+    The single-series LSTM pipeline of the forecasting page: stationarity check,
+    weekly rolling sales, scaling, 80/20 split, windows, registry-aware training,
+    test predictions and the 52-week forecast. Raises ValueError when the series
+    is too short for the chosen settings.
+
+    A registry HIT is served by the NumPy runtime: TensorFlow, statsmodels and
+    sklearn are only imported when a model is actually trained.
+    """
+    budget = budget or TrainingBudget()
+    registry = registry or ModelRegistry()
+    fingerprint = fingerprint or dataset_fingerprint()
+
+    # Daily sales for the selection, sliced from the cube
+    df_forecast = cube.daily(level).series(target_column, member).to_frame()
+    df_forecast.index.name = "Date"
+
+    # Registry entry for this selection; the weekly index ends on the Sunday of the last day
+    horizon = forecast_steps if strategy == DIRECT else 1
+    architecture = architecture_id(horizon, features=tuple(extra_features))
+    last_date = pd.offsets.Week(weekday=6).rollforward(df_forecast.index[-1])
+    stored = registry.lookup(level, member, time_steps, architecture)
+    model_status = registry.status(stored, fingerprint, last_date)
+
+    # -------------------- STATIONARITY CHECK --------------------
+    df_forecast[target_column], differenced = check_stationarity(
+        df_forecast[target_column], stored.get("differenced") if model_status == HIT else None
+    )
+    df_forecast = df_forecast.resample('W').sum()  # Weekly aggregation
+    df_forecast["Rolling Sales"] = df_forecast[target_column].rolling(window=4, min_periods=1).mean()
+    df_forecast.dropna(subset=["Rolling Sales"], inplace=True)
+
+    # -------------------- SCALING --------------------
+    scaler = ChannelScaler()
+    df_forecast["Scaled"] = scaler.fit_transform(df_forecast[["Rolling Sales"]])
+
+    # Train-Test Split
+    split_idx = int(len(df_forecast) * 0.8)
+    train_data = df_forecast.iloc[:split_idx]
+    test_data = df_forecast.iloc[split_idx:]
+
+    # Check for minimum data length
+    min_required_points = time_steps + 5  # buffer
+
+    if len(train_data) < min_required_points or len(test_data) < min_required_points:
+        raise ValueError(
+            f"Not enough data points to forecast {level}: {member}. "
+            f"Need at least {min_required_points} points in train and test sets, "
+            f"but got {len(train_data)} (train) and {len(test_data)} (test). "
+            "Try selecting another option or reducing time steps."
+        )
+
+    # Input channels: Scaled rolling sales first, then the selected extra features
+    channels = df_forecast[["Scaled"]].to_numpy()
+    if extra_features:
+        weekly_cube = cube.weekly(level)
+        extras = np.column_stack([
+            weekly_cube.series(feature, member, trim=False)
+            .reindex(df_forecast.index).ffill().bfill().fillna(0).to_numpy()
+            for feature in extra_features
+        ])
+        channels = np.column_stack([channels, minmax_channels(extras)[0]])
+
+    train_series = channels[:split_idx]
+    test_series = channels[split_idx:]
+
+    # Create LSTM sequences (strided window views, gathered once)
+    X_train, y_train = sliding_windows(train_series, time_steps)
+    X_test, y_test = sliding_windows(test_series, time_steps)
+
+    if X_train.size == 0 or X_test.size == 0:
+        raise ValueError(f"Time steps ({time_steps}) too large for dataset size. Try lowering time steps.")
+
+    if strategy == DIRECT:
+        # Targets are the next 52 weeks after each window
+        X_train, y_train = sliding_windows(train_series, time_steps, forecast_steps)
+        if X_train.size == 0:
+            raise ValueError(
+                f"Direct forecasting needs at least {time_steps + forecast_steps} training weeks, "
+                f"but got {len(train_series)}. Lower time steps or use the Recursive strategy."
+            )
+
+    # -------------------- LSTM MODEL --------------------
+    # Reuse a stored model for this selection, fine-tune it when only new weeks
+    # arrived, otherwise train from scratch.
+    telemetry = None
+    if model_status == HIT:
+        lstm_model, scaler, stored = registry.load_inference(level, member, time_steps, architecture)
+    elif model_status == WARM:
+        lstm_model, _, stored = registry.load(level, member, time_steps, architecture)
+        warm_budget = TrainingBudget(
+            min(budget.max_epochs, WARM_START_EPOCHS), budget.max_seconds, budget.patience, budget.early_stopping
+        )
+        telemetry = train_with_budget(lstm_model, X_train, y_train, warm_budget, callbacks=callbacks)
+    else:
+        lstm_model = build_lstm(time_steps, n_features=channels.shape[1], horizon=horizon)
+        telemetry = train_with_budget(lstm_model, X_train, y_train, budget, callbacks=callbacks)
+    epochs_trained = telemetry.epochs_run if telemetry else 0
+
+    # -------------------- PREDICTIONS --------------------
+    with stage("predict"):
+        lstm_predictions = lstm_model.predict(X_test, verbose=0)[:, :1]  # one-step-ahead for both strategies
+    lstm_predictions = scaler.inverse_transform(lstm_predictions)
+
+    pred_series_lstm = pd.Series(lstm_predictions.flatten(), index=test_data.index[time_steps:])
+
+    mape_lstm = mape(test_data["Rolling Sales"].iloc[time_steps:], pred_series_lstm)
+
+    if model_status != HIT:
+        registry.save(
+            level, member, time_steps, architecture, lstm_model, scaler,
+            fingerprint, last_date, mape_lstm, epochs_trained, warm_started=model_status == WARM,
+            differenced=differenced
+        )
+
+    # -------------------- FUTURE FORECAST --------------------
+    last_data = test_series[-time_steps:][None, :, :]
+
+    if strategy == DIRECT:
+        lstm_forecast = forecast_direct(lstm_model, last_data)[0]
+    else:
+        lstm_forecast = forecast_recursive(lstm_model, last_data, forecast_steps)[0]
+
+    lstm_forecast = scaler.inverse_transform(np.array(lstm_forecast).reshape(-1, 1))
+    forecast_dates = pd.date_range(test_data.index[-1], periods=forecast_steps + 1, freq='W')[1:]
+    pred_series_future = pd.Series(lstm_forecast.flatten(), index=forecast_dates)
+
+    return SingleSeriesForecast(
+        level, member, train_data["Rolling Sales"], test_data["Rolling Sales"], pred_series_lstm,
+        pred_series_future, mape_lstm, telemetry, model_status, stored
+    )
+
+
+def run_single_series_job(level, member, time_steps, strategy, extra_features, budget_args,
+                          data_path=DATA_PATH, job=None):
+    """Entry point for background training jobs (see trainingjobs)."""
+    from timeseriescube import load_cube
+
+    callbacks = []
+    if job is not None:
+        job.progress(0.05, "loading data")
+        callbacks.append(job.epoch_callback(budget_args[0]))
+    return forecast_single_series(
+        load_cube(data_path), level, member, time_steps, strategy, extra_features,
+        budget=TrainingBudget(*budget_args), fingerprint=dataset_fingerprint(data_path), callbacks=callbacks
+    )
@@ -0,0 +1,236 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.linalg import LinearOperator, cg
+
+from timeseriescube import BOTTOM_LEVEL, PARENT_LEVELS
+from classicalforecast import fit_classical
+from windowing import mape
+from instrumentation import timed
+
+# -------------------- CONFIG --------------------
+TOTAL = "Total"
+BOTTOM_UP = "Bottom-up"
+OLS = "OLS"
+MINT = "MinT (diagonal)"
+RECONCILIATION_METHODS = [BOTTOM_UP, OLS, MINT]
+CG_TOLERANCE = 1e-10
+MIN_VARIANCE = 1e-9  # relative floor so a perfectly fitted node does not get infinite weight
+
+# Every node of the hierarchy (the grand total, each Category / Supplier /
+# Product Family and each SKU) is a row of the sparse summing matrix S, with
+# one column per SKU. Forecasts are produced for the SKUs only; any node's
+# forecast is the matching row of S @ bottom, so aggregates are coherent by
+# construction and cost one sparse mat-vec.
+
+
+# -------------------- SUMMING MATRIX --------------------
+class Hierarchy:
+    """
+    Summing matrix S (nodes x SKUs, CSR) over the SKU -> parent mapping of a
+    cube. Nodes are ordered Total, then every parent level, then the SKUs
+    themselves (the identity block); `nodes` labels them as (level, member).
+    Parent members keep the order given in level_members (sorted by default).
+    """
+
+    def __init__(self, bottom_members, parent_maps, level_members=None):
+        self.bottom_members = np.asarray(bottom_members)
+        n_bottom = len(self.bottom_members)
+        cols = np.arange(n_bottom)
+
+        blocks = [sparse.csr_matrix(np.ones((1, n_bottom)))]
+        labels = [(TOTAL, TOTAL)]
+        self.level_rows = {TOTAL: slice(0, 1)}
+        for level, parents in parent_maps.items():
+            parents = parents.reindex(self.bottom_members)
+            members = np.sort(parents.dropna().unique()) if level_members is None else level_members[level]
+            codes = pd.Index(members).get_indexer(parents.to_numpy())
+            mapped = codes >= 0
+            blocks.append(sparse.csr_matrix(
+                (np.ones(mapped.sum()), (codes[mapped], cols[mapped])), shape=(len(members), n_bottom)
+            ))
+            start = len(labels)
+            labels += [(level, m) for m in members]
+            self.level_rows[level] = slice(start, len(labels))
+        self.n_upper = len(labels)
+        blocks.append(sparse.identity(n_bottom, format="csr"))
+        labels += [(BOTTOM_LEVEL, m) for m in self.bottom_members]
+        self.level_rows[BOTTOM_LEVEL] = slice(self.n_upper, len(labels))
+
+        self.S = sparse.vstack(blocks, format="csr")
+        self.upper = self.S[:self.n_upper]
+        self.nodes = pd.MultiIndex.from_tuples(labels, names=["Level", "Member"])
+
+    @classmethod
+    def from_cube(cls, cube, levels=PARENT_LEVELS):
+        """SKU columns in the order of the weekly SKU cube (the order bottom forecasts come in)."""
+        levels = [level for level in levels if level in cube.links]
+        return cls(
+            cube.weekly(BOTTOM_LEVEL).members, {level: cube.parent_map(level) for level in levels},
+            {level: cube.weekly(level).members for level in levels}
+        )
+
+    @property
+    def levels(self):
+        return list(self.level_rows)
+
+    def members(self, level):
+        return self.nodes.get_level_values("Member")[self.level_rows[level]]
+
+    def aggregate(self, bottom):
+        """Every node's values from the SKU rows of `bottom` (SKUs x ...): S @ bottom."""
+        return self.S @ np.asarray(bottom, dtype=np.float64)
+
+    # -------------------- RECONCILIATION --------------------
+    def reconcile(self, base, method=BOTTOM_UP, variances=None):
+        """
+        Coherent SKU-level forecasts from base forecasts of every node
+        (nodes x horizon). Bottom-up keeps the SKU rows. OLS and MinT solve
+        (S' W^-1 S) b = S' W^-1 y per horizon column by conjugate gradients with
+        S applied as a sparse operator: W = I for OLS, W = diag(variances) of
+        each node's holdout errors for MinT (its diagonal/WLS form; the full
+        covariance would be a dense nodes x nodes matrix).
+        """
+        base = np.asarray(base, dtype=np.float64)
+        bottom_base = base[self.n_upper:]
+        if method == BOTTOM_UP:
+            return bottom_base.copy()
+        if method == OLS:
+            weights = np.ones(len(base))
+        elif method == MINT:
+            if variances is None:
+                raise ValueError("MinT reconciliation needs the holdout error variance of every node.")
+            variances = np.asarray(variances, dtype=np.float64)
+            floor = MIN_VARIANCE * max(float(np.nanmean(variances)), 1.0)
+            weights = 1.0 / np.maximum(np.nan_to_num(variances, nan=floor), floor)
+        else:
+            raise ValueError(f"Unknown reconciliation method: {method}")
+
+        w_upper, w_bottom = weights[:self.n_upper], weights[self.n_upper:]
+        n_bottom = len(self.bottom_members)
+
+        def normal_matvec(v):
+            return w_bottom * v + self.upper.T @ (w_upper * (self.upper @ v))
+
+        normal = LinearOperator((n_bottom, n_bottom), matvec=normal_matvec, dtype=np.float64)
+        jacobi_diag = w_bottom + self.upper.T.power(2) @ w_upper
+        preconditioner = LinearOperator((n_bottom, n_bottom), matvec=lambda v: v / jacobi_diag, dtype=np.float64)
+        rhs = w_bottom[:, None] * bottom_base + self.upper.T @ (w_upper[:, None] * base[:self.n_upper])
+
+        out = np.empty_like(bottom_base)
+        for h in range(base.shape[1]):
+            solution, info = cg(normal, rhs[:, h], x0=bottom_base[:, h], rtol=CG_TOLERANCE, atol=0.0,
+                                M=preconditioner, maxiter=10 * n_bottom)
+            if info > 0:
+                raise RuntimeError(f"Reconciliation did not converge for horizon {h + 1}.")
+            out[:, h] = solution
+        return out
+
+
+# -------------------- FORECASTS --------------------
+class BottomForecast:
+    """
+    SKU-level forecasts in (SKUs x weeks) orientation, from either a classical
+    fit or a global LSTM of the SKU level. Holdout predictions start at week
+    pred_start (the LSTM needs time_steps weeks of test history first).
+    """
+
+    def __init__(self, members, dates, actual, split_idx, pred_start, pred, future, future_dates, source):
+        self.members = members
+        self.dates = dates
+        self.actual = actual
+        self.split_idx = split_idx
+        self.pred_start = pred_start
+        self.pred = pred
+        self.future = future
+        self.future_dates = future_dates
+        self.source = source
+
+    @classmethod
+    def from_classical(cls, result):
+        return cls(result.members, result.dates, result.actual, result.split_idx, result.split_idx,
+                   result.holdout, result.future, result.future_dates, "Classical")
+
+    @classmethod
+    def from_global(cls, result):
+        return cls(result.members, result.dates, result.actual.T, result.split_idx,
+                   result.split_idx + result.time_steps, result.test_pred.T, result.future.T,
+                   result.future_dates, "Global LSTM")
+
+
+class HierarchicalForecast:
+    """Coherent holdout and future forecasts for every node, from one set of SKU forecasts."""
+
+    def __init__(self, hierarchy, dates, actual, split_idx, pred_start, pred, future, future_dates, method,
+                 source):
+        self.hierarchy = hierarchy
+        self.dates = dates
+        self.actual = actual
+        self.split_idx = split_idx
+        self.pred_start = pred_start
+        self.pred = pred
+        self.future = future
+        self.future_dates = future_dates
+        self.method = method
+        self.source = source
+
+    def _row(self, level, member):
+        return self.hierarchy.nodes.get_loc((level, member))
+
+    def member_frames(self, level, member):
+        """Train/test actuals, holdout forecast and future forecast for one node."""
+        i = self._row(level, member)
+        actual = pd.Series(self.actual[i], index=self.dates)
+        train = actual.iloc[:self.split_idx]
+        test = actual.iloc[self.split_idx:]
+        pred = pd.Series(self.pred[i], index=self.dates[self.pred_start:])
+        future = pd.Series(self.future[i], index=self.future_dates)
+        return train, test, pred, future
+
+    def mape(self, level):
+        rows = self.hierarchy.level_rows[level]
+        return pd.Series(
+            mape(self.actual[rows, self.pred_start:].T, self.pred[rows].T),
+            index=pd.Index(self.hierarchy.members(level), name=level), name="MAPE"
+        )
+
+    def forecast_table(self, level):
+        rows = self.hierarchy.level_rows[level]
+        return pd.DataFrame(self.future[rows].T, index=pd.Index(self.future_dates, name="Date"),
+                            columns=self.hierarchy.members(level))
+
+
+def upper_base_forecasts(hierarchy, bottom):
+    """
+    Independent classical forecasts of every aggregate node (one vectorized fit
+    over all of them), aligned with the bottom forecast's holdout window.
+    Returns holdout predictions and the future forecast, both (upper nodes x weeks).
+    """
+    actual = hierarchy.upper @ np.asarray(bottom.actual, dtype=np.float64)
+    fitted = fit_classical(actual, np.arange(hierarchy.n_upper), bottom.dates, horizon=bottom.future.shape[1])
+    return fitted.holdout[:, bottom.pred_start - bottom.split_idx:], fitted.future
+
+
+@timed()
+def reconcile_forecast(hierarchy, bottom, method=BOTTOM_UP, upper=None):
+    """
+    Forecasts for every node of `hierarchy` from SKU-level forecasts. Bottom-up
+    is a sparse mat-vec; OLS and MinT additionally combine independent
+    classical forecasts of the aggregates (`upper`, as returned by
+    upper_base_forecasts; fitted here when not given) and map the reconciled
+    SKU forecasts back up through S.
+    """
+    actual = hierarchy.aggregate(bottom.actual)
+    pred_bottom, future_bottom = bottom.pred, bottom.future
+    if method != BOTTOM_UP:
+        upper_pred, upper_future = upper if upper is not None else upper_base_forecasts(hierarchy, bottom)
+        base_pred = np.vstack([upper_pred, bottom.pred])
+        errors = base_pred - actual[:, bottom.pred_start:]
+        variances = np.mean(errors ** 2, axis=1)
+        pred_bottom = hierarchy.reconcile(base_pred, method, variances)
+        future_bottom = hierarchy.reconcile(np.vstack([upper_future, bottom.future]), method, variances)
+
+    return HierarchicalForecast(
+        hierarchy, bottom.dates, actual, bottom.split_idx, bottom.pred_start, hierarchy.aggregate(pred_bottom),
+        hierarchy.aggregate(future_bottom), bottom.future_dates, method, bottom.source
+    )
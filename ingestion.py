@@ -0,0 +1,220 @@
+import os
+import sys
+import threading
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from datastore import (
+    load_dataset, iter_chunks, streaming_enabled, base_files, append_partition, list_partitions,
+    read_partition, dataset_fingerprint, file_fingerprint, DATA_PATH, DATE_COL
+)
+from onlinestats import GroupedMoments, GroupedMax, CoMoments
+from sketches import QuantileSketch, GroupedSketch
+from instrumentation import timed
+
+# -------------------- CONFIG --------------------
+SALES_COL = "Sales Quantity"
+REVENUE_COL = "Revenue (USD)"
+LEAD_TIME_COL = "Lead Time (days)"
+RETURN_QTY_COL = "Return Quantity"
+RETURNED_COL = "Returned"  # derived: Return Quantity > 0
+
+STATS_COLUMNS = [
+    DATE_COL, "SKU", "Category", "Supplier", "Warehouse Location", "Customer ID",
+    "Stock Level", SALES_COL, REVENUE_COL, LEAD_TIME_COL, RETURN_QTY_COL
+]
+RFM_KEYS = ["Customer ID", "SKU"]
+CORRELATION_COLUMNS = ["Stock Level", SALES_COL, LEAD_TIME_COL, REVENUE_COL]
+
+
+# -------------------- RUNNING STATISTICS --------------------
+class DatasetStats:
+    """
+    Sufficient statistics behind the pages' groupbys, kept up to date batch by
+    batch: per-customer and per-SKU activity and last purchase date (RFM segments),
+    revenue and lead-time moments by Category and Supplier (ANOVA, t-test),
+    Category x Returned counts (chi-square), SKU x lead time counts
+    (simulation), numeric co-moments (Pearson, regression) and quantile
+    sketches of sales and of revenue by warehouse and supplier (approximate
+    KS, Mann-Whitney, Kruskal-Wallis).
+
+    Every statistic merges batch results, so the same object is built from one
+    frame, from chunks streamed off disk, from ingested partitions, or from
+    per-partition objects combined with merge().
+    """
+
+    def __init__(self):
+        self.customers = GroupedMoments(["Customer ID"], [REVENUE_COL, SALES_COL, RETURN_QTY_COL])
+        self.skus = GroupedMoments(["SKU"], [REVENUE_COL, SALES_COL, RETURN_QTY_COL])
+        self.last_purchase = {key: GroupedMax([key], DATE_COL) for key in RFM_KEYS}
+        self.category_revenue = GroupedMoments(["Category"], [REVENUE_COL])
+        self.supplier_lead_time = GroupedMoments(["Supplier"], [LEAD_TIME_COL])
+        self.returns = GroupedMoments(["Category", RETURNED_COL])
+        self.lead_times = GroupedMoments(["SKU", LEAD_TIME_COL])
+        self.correlations = CoMoments(CORRELATION_COLUMNS)
+        self.sales_sketch = QuantileSketch()
+        self.warehouse_revenue = GroupedSketch("Warehouse Location", REVENUE_COL)
+        self.supplier_revenue = GroupedSketch("Supplier", REVENUE_COL)
+        self.n_rows = 0
+        self.applied_partitions = []
+        self.fingerprint = None
+        self._lock = threading.Lock()
+
+    def update(self, df):
+        df = df.assign(**{RETURNED_COL: df[RETURN_QTY_COL] > 0})
+        self.customers.update(df)
+        self.skus.update(df)
+        for last_purchase in self.last_purchase.values():
+            last_purchase.update(df)
+        self.category_revenue.update(df)
+        self.supplier_lead_time.update(df)
+        self.returns.update(df)
+        self.lead_times.update(df)
+        self.correlations.update(df)
+        self.sales_sketch.update(df[SALES_COL].to_numpy())
+        self.warehouse_revenue.update(df)
+        self.supplier_revenue.update(df)
+        self.n_rows += len(df)
+        return self
+
+    def _parts(self):
+        return [
+            self.customers, self.skus, *self.last_purchase.values(), self.category_revenue,
+            self.supplier_lead_time, self.returns, self.lead_times, self.correlations, self.sales_sketch, self.warehouse_revenue, self.supplier_revenue,
+        ]
+
+    def merge(self, other):
+        """Fold in statistics built over other rows (e.g. another partition, in another process)."""
+        for mine, theirs in zip(self._parts(), other._parts()):
+            mine.merge(theirs)
+        self.n_rows += other.n_rows
+        return self
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @timed("stats.sync")
+    def sync(self, path=DATA_PATH):
+        """Fold in day partitions appended since the last sync."""
+        with self._lock:
+            for partition in list_partitions(path):
+                if partition not in self.applied_partitions:
+                    self.update(read_partition(partition, STATS_COLUMNS))
+                    self.applied_partitions.append(partition)
+            self.fingerprint = dataset_fingerprint(path)
+        return self
+
+    # ---------- Views used by the pages ----------
+    def customer_revenue(self):
+        return self.customers.frame("total")[REVENUE_COL]
+
+    def rfm(self, key="Customer ID"):
+        """
+        Recency (days from the last row to the dataset's last day), Frequency
+        (rows), Monetary (revenue) and Return Rate (returned / sold units) per
+        customer or per SKU, read off the running statistics in one pass.
+        """
+        activity = {"Customer ID": self.customers, "SKU": self.skus}[key]
+        totals = activity.frame("total")
+        last = self.last_purchase[key].series().reindex(totals.index)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return_rate = np.where(totals[SALES_COL] > 0, totals[RETURN_QTY_COL] / totals[SALES_COL], 0.0)
+        return pd.DataFrame({
+            "Recency": (last.max() - last).dt.days,
+            "Frequency": activity.counts(),
+            "Monetary": totals[REVENUE_COL],
+            "Return Rate": return_rate,
+        }, index=totals.index)
+
+    def returns_table(self):
+        return self.returns.counts().unstack(fill_value=0)
+
+    def lead_time_counts(self):
+        """Rows per (SKU, lead time), the input of inventorysim.lead_time_pmf_from_counts."""
+        return self.lead_times.counts()
+
+
+@timed()
+def build_stats(df):
+    return DatasetStats().update(df)
+
+
+@timed()
+def build_stats_chunked(chunks):
+    """Streaming build: the same statistics as build_stats on the concatenated chunks."""
+    dataset_stats = DatasetStats()
+    for chunk in chunks:
+        dataset_stats.update(chunk)
+    return dataset_stats
+
+
+def _file_stats(parquet_path):
+    return build_stats_chunked(iter_chunks([parquet_path], STATS_COLUMNS))
+
+
+@timed()
+def build_stats_partitioned(parquet_paths, max_workers=None):
+    """
+    Statistics of several Parquet files (e.g. one per month), each built from
+    its own chunks in a spawn process pool and merged in file order.
+    """
+    max_workers = max_workers or min(len(parquet_paths), os.cpu_count() or 1)
+    if max_workers == 1 or len(parquet_paths) == 1:
+        parts = [_file_stats(p) for p in parquet_paths]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp.get_context("spawn")) as pool:
+            parts = list(pool.map(_file_stats, parquet_paths))
+    dataset_stats = DatasetStats()
+    for part in parts:
+        dataset_stats.merge(part)
+    return dataset_stats
+
+
+@st.cache_resource(show_spinner=False)
+def _cached_stats(path, base_fingerprint):
+    partitions = list_partitions(path)
+    if streaming_enabled(path):
+        parquet_paths = [*base_files(path, base_fingerprint), *partitions]
+        dataset_stats = build_stats_partitioned(parquet_paths)
+    else:
+        dataset_stats = build_stats(load_dataset(columns=STATS_COLUMNS, path=path, partitions=partitions))
+    dataset_stats.applied_partitions = list(partitions)
+    return dataset_stats
+
+
+def load_stats(path=DATA_PATH):
+    """Shared running statistics, built once per base file and synced with new partitions."""
+    return _cached_stats(path, file_fingerprint(path)).sync(path)
+
+
+# -------------------- INGESTION --------------------
+def ingest(new_rows, path=DATA_PATH):
+    """
+    Append-only ingestion of new day(s) of sales. The rows become one Parquet
+    partition; open pages pick it up on their next run, when the shared cube and
+    running statistics fold in just that partition (load_cube / load_stats).
+    """
+    new_rows = new_rows.copy()
+    new_rows[DATE_COL] = pd.to_datetime(new_rows[DATE_COL])
+    partitions = []
+    for _, day_rows in new_rows.groupby(new_rows[DATE_COL].dt.normalize(), sort=True):
+        partitions.append(append_partition(day_rows, path=path))
+    return partitions
+
+
+if __name__ == "__main__":
+    # python ingestion.py new_days.csv [more.csv ...]
+    for csv_path in sys.argv[1:]:
+        written = ingest(pd.read_csv(csv_path), path=DATA_PATH)
+        print(f"{csv_path}: {len(written)} day partition(s) appended")
+    print(f"dataset version {dataset_fingerprint(DATA_PATH)}")
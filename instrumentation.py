@@ -0,0 +1,310 @@
+import os
+import io
+import sys
+import json
+import time
+import uuid
+import pstats
+import cProfile
+import threading
+import functools
+import contextlib
+import tracemalloc
+
+import pandas as pd
+import streamlit as st
+
+# -------------------- CONFIG --------------------
+# SCM_PERF=1 records (and logs) every run without ticking the panel; SCM_PERF_LOG overrides the log file
+PERF_ENV = "SCM_PERF"
+LOG_DIR_NAME = ".scm_perf"
+LOG_FILE_NAME = "perf.jsonl"
+PROFILE_ROWS = 25          # cProfile functions shown in the panel (by cumulative time)
+TRACEMALLOC_ROWS = 10      # allocation sites shown in the panel
+TRACEMALLOC_FRAMES = 1
+
+PANEL_KEY = "perf_panel"
+ARM_KEY = "perf_arm"
+ARMED_KEY = "_perf_armed"
+SESSION_KEY = "_perf_session"
+
+
+def default_log_path(path=None):
+    from datastore import DATA_PATH
+
+    path = path or DATA_PATH
+    return os.environ.get(
+        "SCM_PERF_LOG", os.path.join(os.path.dirname(os.path.abspath(path)), LOG_DIR_NAME, LOG_FILE_NAME)
+    )
+
+
+# -------------------- MEMORY --------------------
+def _status_mb(field):
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def rss_mb():
+    """Resident set size of this process in MB (Linux /proc; None elsewhere)."""
+    return _status_mb("VmRSS")
+
+
+def peak_rss_mb():
+    """Peak resident set size in MB since start or the last reset_peak_rss()."""
+    peak = _status_mb("VmHWM")
+    if peak is None:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 if sys.platform != "darwin" else 1024 ** 2)
+    return peak
+
+
+def reset_peak_rss():
+    """Reset the kernel's peak-RSS counter (Linux), so a measurement reports its own peak."""
+    try:
+        with open("/proc/self/clear_refs", "w") as fh:
+            fh.write("5")
+        return True
+    except OSError:
+        return False
+
+
+# -------------------- RECORDER --------------------
+class RunRecorder:
+    """
+    Stage timings of one page run: per stage name the call count, inclusive
+    wall time and summed RSS change. Stages nest, so a parent's time includes
+    its children's; cached calls show up with their (short) hit time.
+    """
+
+    def __init__(self, page, session=None):
+        self.page = page
+        self.session = session
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self.stages = {}
+        self.total_s = None
+        self.profile = None
+        self.allocations = None
+        self.profile_path = None
+
+    def record(self, name, wall_s, rss_delta_mb):
+        calls, total, rss = self.stages.get(name, (0, 0.0, 0.0))
+        self.stages[name] = (calls + 1, total + wall_s, rss + rss_delta_mb)
+
+    def frame(self):
+        return pd.DataFrame(
+            [(name, calls, total * 1000, rss) for name, (calls, total, rss) in self.stages.items()],
+            columns=["Stage", "Calls", "Time (ms)", "Memory Δ (MB)"]
+        ).set_index("Stage")
+
+    def to_record(self):
+        return {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "page": self.page,
+            "session": self.session,
+            "total_ms": round((self.total_s or 0.0) * 1000, 3),
+            "rss_mb": rss_mb(),
+            "stages": [
+                {"stage": name, "calls": calls, "ms": round(total * 1000, 3), "rss_delta_mb": round(rss, 3)}
+                for name, (calls, total, rss) in self.stages.items()
+            ],
+            "profile": self.profile_path,
+        }
+
+
+class _RunLocal(threading.local):
+    recorder = None  # class default: a missing attribute would cost an exception per lookup
+
+
+_local = _RunLocal()
+_log_lock = threading.Lock()
+
+
+def active_recorder():
+    return _local.recorder
+
+
+class _Stage:
+    __slots__ = ("recorder", "name", "_start", "_rss")
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self._rss = rss_mb() or 0.0
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self._start
+        self.recorder.record(self.name, wall, (rss_mb() or 0.0) - self._rss)
+        return False
+
+
+_NULL_STAGE = contextlib.nullcontext()
+
+
+def stage(name):
+    """
+    Context manager timing a block as stage `name` of the current page run.
+    Outside an instrumented run it is a shared no-op context, so leaving
+    stages in place costs one thread-local lookup.
+    """
+    recorder = _local.recorder
+    if recorder is None:
+        return _NULL_STAGE
+    return _Stage(recorder, name)
+
+
+def timed(name=None):
+    """Decorator form of stage(); the stage is named after the function unless given."""
+    def decorate(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            recorder = _local.recorder
+            if recorder is None:
+                return func(*args, **kwargs)
+            with _Stage(recorder, label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# -------------------- PAGE RUNS --------------------
+class PageRun:
+    """
+    Instrumentation of one Streamlit rerun, used as a context manager around
+    the page body (`with start_page(...):`). Leaving the block always stops a
+    profiling capture, appends the run to the JSON-lines log and clears the
+    thread's recorder, including when the body ends in st.stop(), st.rerun()
+    or an exception. The panel's controls are drawn on entry, so they survive
+    an early stop; its timing table is filled in when the body completes.
+    With the panel off and SCM_PERF unset nothing is recorded.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        state = st.session_state
+        if SESSION_KEY not in state:
+            state[SESSION_KEY] = uuid.uuid4().hex[:12]
+        # One interaction is captured: the rerun after the one in which the box was ticked
+        self.capture = bool(state.get(ARMED_KEY))
+        if self.capture:
+            state[ARM_KEY] = False
+            state[ARMED_KEY] = False
+        self._panel_box, self.show = self._controls()
+        self.enabled = self.show or os.environ.get(PERF_ENV) == "1" or self.capture
+        self.recorder = RunRecorder(page, state[SESSION_KEY]) if self.enabled else None
+        self._profiler = None
+        _local.recorder = self.recorder
+        if self.capture:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def _stop_capture(self):
+        self._profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        out = io.StringIO()
+        profile_stats = pstats.Stats(self._profiler, stream=out)
+        profile_stats.sort_stats("cumulative").print_stats(PROFILE_ROWS)
+        self.recorder.profile = out.getvalue()
+        self.recorder.allocations = "\n".join(
+            str(s) for s in snapshot.statistics("lineno")[:TRACEMALLOC_ROWS]
+        )
+        log_dir = os.path.dirname(default_log_path())
+        try:
+            os.makedirs(log_dir, exist_ok=True)
+            target = os.path.join(log_dir, f"profile-{self.recorder.session}-{int(self.recorder.started)}.prof")
+            profile_stats.dump_stats(target)
+            self.recorder.profile_path = target
+        except OSError:
+            pass
+
+    def _write_log(self):
+        target = default_log_path()
+        line = json.dumps(self.recorder.to_record())
+        try:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with _log_lock, open(target, "a") as fh:
+                fh.write(line + "\n")
+        except OSError:
+            pass
+
+    def _controls(self):
+        box = st.sidebar.expander("⏱ Performance")
+        with box:
+            show = st.checkbox("Show stage timings", key=PANEL_KEY)
+            armed = st.checkbox("Profile next interaction (cProfile + tracemalloc)", key=ARM_KEY)
+        st.session_state[ARMED_KEY] = armed
+        return box, show
+
+    def _panel(self):
+        if self.recorder is None or not (self.show or self.capture):
+            return
+        with self._panel_box:
+            st.caption(f"This run: {self.recorder.total_s * 1000:,.0f} ms, RSS {rss_mb() or 0:,.0f} MB")
+            st.dataframe(self.recorder.frame().style.format(
+                {"Time (ms)": "{:,.1f}", "Memory Δ (MB)": "{:+,.1f}"}
+            ))
+            if self.recorder.profile:
+                st.markdown("**cProfile (cumulative)**")
+                st.code(self.recorder.profile, language=None)
+                st.markdown("**Top allocations (tracemalloc)**")
+                st.code(self.recorder.allocations, language=None)
+                if self.recorder.profile_path:
+                    st.caption(f"Saved to {self.recorder.profile_path}")
+
+    def finish(self):
+        """Close the run: stop profiling, log it and detach the recorder. Safe to call more than once."""
+        try:
+            if self.recorder is not None and self.recorder.total_s is None:
+                self.recorder.total_s = time.perf_counter() - self.recorder._start
+                if self._profiler is not None:
+                    self._stop_capture()
+                self._write_log()
+        finally:
+            if self._profiler is not None:
+                self._profiler.disable()
+                self._profiler = None
+                tracemalloc.stop()
+            _local.recorder = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish()
+        # After st.stop() or st.rerun() no further elements can be sent
+        if exc_type is None:
+            self._panel()
+        return False
+
+
+def start_page(page):
+    """Instrument this rerun of `page`: `with start_page(page):` around the page body."""
+    return PageRun(page)
+
+
+# -------------------- LOG ANALYSIS --------------------
+def read_log(path=None):
+    """The JSON-lines log as one row per (run, stage), for aggregation with pandas."""
+    rows = []
+    with open(path or default_log_path()) as fh:
+        for line in fh:
+            record = json.loads(line)
+            for entry in record["stages"]:
+                rows.append({"ts": record["ts"], "page": record["page"], "session": record["session"],
+                             "total_ms": record["total_ms"], **entry})
+    return pd.DataFrame(rows)
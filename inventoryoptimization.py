@@ -1,140 +1,181 @@
 import numpy as np
-import pandas as pd
 import streamlit as st
 import plotly.express as px
-import scipy.stats as stats
+from datastore import dataset_columns, dataset_fingerprint, iter_dataset, DATA_PATH, DATE_COL
+from ingestion import load_stats
+from inventorypolicy import (
+    PolicyGrid, cube_demand_stats, daily_totals, demand_stats_from_totals, ORDERING_COST_GRID, HOLDING_COST_GRID,
+    SERVICE_LEVEL_GRID
+)
+from inventorysim import daily_demand_stats, lead_time_pmf_from_counts, reorder_policy, NormalDemand, run_simulation
+from demandsampler import build_demand_index, BootstrapDemand, BLOCK_LENGTH
+from timeseriescube import load_cube
+from chartdata import histogram_figure
+from instrumentation import start_page, stage
 
 # ------------------ CONFIG ------------------
 st.set_page_config(page_title="Inventory Optimization", page_icon="📦", layout="wide")
-
-# --------- USER SETTINGS (Update if your csv columns differ) ------------
-SKU_COL = "SKU"
-SALES_COL = "Sales Quantity"
-LEAD_TIME_COL = "Lead Time (days)"
-CATEGORY_COL = "Category"  # optional
-
-# --------- Load dataset ------------
-@st.cache_data
-def load_data(path):
-    df = pd.read_csv(path, parse_dates=["Date"])
-    # Drop rows with missing critical data
-    df_clean = df.dropna(subset=[SKU_COL, SALES_COL, LEAD_TIME_COL])
-    return df_clean
-
-data_path = r"C:\Users\elroy\OneDrive\Desktop\Supplychain\ecommerce_supply_chain.csv"
-df = load_data(data_path)
-
-st.title("📦 Inventory Optimization Tool")
-
-# -------- Sidebar Inputs for Cost Parameters ----------
-st.sidebar.header("Settings")
-
-ordering_cost = st.sidebar.number_input(
-    "Ordering Cost per order (€)", min_value=0.0, value=50.0, step=1.0,
-    help="Cost incurred every time an order is placed"
-)
-holding_cost = st.sidebar.number_input(
-    "Holding Cost per unit per year (€)", min_value=0.0, value=2.0, step=0.1,
-    help="Cost to hold one unit in inventory for a year"
-)
-service_level = st.sidebar.slider(
-    "Service Level (Confidence for Safety Stock)", min_value=0.80, max_value=0.99,
-    value=0.95, step=0.01,
-    help="Probability of not running out of stock"
-)
-
-# ---------- Aggregations per SKU ----------
-df_grouped = df.groupby(SKU_COL).agg(
-    avg_demand=(SALES_COL, "mean"),
-    std_demand=(SALES_COL, "std"),
-    avg_lead_time=(LEAD_TIME_COL, "mean")
-).reset_index()
-
-# Fill any NaN std_dev with 0 (e.g., constant demand)
-df_grouped["std_demand"] = df_grouped["std_demand"].fillna(0)
-
-# ---------- EOQ Calculation ----------
-def calculate_eoq(demand, ordering_cost, holding_cost):
-    if demand <= 0 or holding_cost == 0:
-        return 0
-    return round(np.sqrt((2 * demand * ordering_cost) / holding_cost), 2)
-
-df_grouped["EOQ"] = df_grouped.apply(
-    lambda row: calculate_eoq(row["avg_demand"], ordering_cost, holding_cost),
-    axis=1
-)
-
-# ---------- Safety Stock Calculation ----------
-def calculate_safety_stock(std_dev_demand, lead_time_days, service_level=0.95):
-    z_score = stats.norm.ppf(service_level)
-    if std_dev_demand <= 0 or lead_time_days <= 0:
-        return 0
-    return round(z_score * std_dev_demand * np.sqrt(lead_time_days), 2)
-
-df_grouped["Safety Stock"] = df_grouped.apply(
-    lambda row: calculate_safety_stock(row["std_demand"], row["avg_lead_time"], service_level),
-    axis=1
-)
-
-# ---------- Optional: Category-level Inventory ----------
-if CATEGORY_COL in df.columns:
-    st.markdown("### Category-level Inventory Summary")
-    df_cat = df.groupby(CATEGORY_COL).agg(
-        avg_demand=(SALES_COL, "mean"),
-        std_demand=(SALES_COL, "std"),
-        avg_lead_time=(LEAD_TIME_COL, "mean")
-    ).reset_index()
-    df_cat["std_demand"] = df_cat["std_demand"].fillna(0)
-    df_cat["EOQ"] = df_cat.apply(
-        lambda row: calculate_eoq(row["avg_demand"], ordering_cost, holding_cost),
-        axis=1
+with start_page("Inventory Optimization"):
+    # --------- USER SETTINGS (Update if your csv columns differ) ------------
+    SKU_COL = "SKU"
+    SALES_COL = "Sales Quantity"
+    LEAD_TIME_COL = "Lead Time (days)"
+    CATEGORY_COL = "Category"  # optional
+    WAREHOUSE_COL = "Warehouse Location"  # optional
+
+    # --------- Dataset ------------
+    # Everything below reads the shared running statistics and cube, so no row-level frame is loaded here
+    data_path = DATA_PATH
+    columns = dataset_columns(data_path)
+
+    st.title("📦 Inventory Optimization Tool")
+
+    # -------- Sidebar Inputs for Cost Parameters ----------
+    st.sidebar.header("Settings")
+
+    # Sliders snap to the precomputed policy grid, so moving them is a lookup
+    ordering_cost = st.sidebar.select_slider(
+        "Ordering Cost per order (€)", options=ORDERING_COST_GRID.tolist(), value=50.0,
+        help="Cost incurred every time an order is placed"
+    )
+    holding_cost = st.sidebar.select_slider(
+        "Holding Cost per unit per year (€)", options=HOLDING_COST_GRID.tolist(), value=2.0,
+        help="Cost to hold one unit in inventory for a year"
     )
-    df_cat["Safety Stock"] = df_cat.apply(
-        lambda row: calculate_safety_stock(row["std_demand"], row["avg_lead_time"], service_level),
-        axis=1
+    service_level = st.sidebar.select_slider(
+        "Service Level (Confidence for Safety Stock)", options=SERVICE_LEVEL_GRID.tolist(), value=0.95,
+        help="Probability of not running out of stock"
     )
-    st.dataframe(df_cat.set_index(CATEGORY_COL)[["EOQ", "Safety Stock"]])
-
-# ---------- Show SKU Inventory Table ----------
-st.markdown("### Inventory Parameters per SKU")
-st.dataframe(df_grouped.set_index(SKU_COL)[["EOQ", "Safety Stock"]])
-
-# ---------- Monte Carlo Simulation Function ----------
-def monte_carlo_simulation(avg_demand, std_dev, days=30, sims=1000):
-    # Generate random demand based on normal distribution (clip at 0)
-    simulated = np.random.normal(loc=avg_demand, scale=std_dev, size=(sims, days))
-    simulated = np.clip(simulated, a_min=0, a_max=None)
-    means = simulated.mean(axis=1)
-    return simulated, means
-
-# ---------- Monte Carlo Simulation UI ----------
-st.markdown("### Monte Carlo Simulation of Future Demand")
-
-sku_list = df_grouped[SKU_COL].tolist()
-selected_sku = st.selectbox("Select SKU to simulate demand:", sku_list)
-
-if selected_sku:
-    sku_data = df_grouped[df_grouped[SKU_COL] == selected_sku].iloc[0]
-    st.write(f"Average demand: {sku_data['avg_demand']:.2f}")
-    st.write(f"Demand Std Dev: {sku_data['std_demand']:.2f}")
-    st.write(f"Average Lead Time (days): {sku_data['avg_lead_time']:.2f}")
-
-    days_sim = st.number_input("Days to simulate:", min_value=7, max_value=90, value=30, step=1)
-    sims = st.number_input("Number of simulations:", min_value=100, max_value=10000, value=1000, step=100)
-
-    if st.button("Run Simulation"):
-        simulated_demands, means = monte_carlo_simulation(
-            sku_data["avg_demand"], sku_data["std_demand"], days=days_sim, sims=sims
+
+    # ---------- Policy grids (EOQ, Safety Stock, Reorder Point, Total Annual Cost per parameter tuple) ----------
+    # Policies use daily demand per group: cube levels read the shared daily cube (the same moments as the
+    # simulation below); SKU x Warehouse has no cube level, so its daily totals are streamed from the rows once
+    @st.cache_resource(show_spinner="Precomputing inventory policies...")
+    def get_policy_grid(level, fingerprint):
+        return PolicyGrid(cube_demand_stats(load_cube(data_path).daily(level), SALES_COL, LEAD_TIME_COL))
+
+    @st.cache_resource(show_spinner="Precomputing inventory policies per SKU and warehouse...")
+    def get_pair_policy_grid(keys, fingerprint):
+        chunks = iter_dataset(columns=[DATE_COL, *keys, SALES_COL, LEAD_TIME_COL], path=data_path)
+        return PolicyGrid(demand_stats_from_totals(daily_totals(chunks, keys, SALES_COL, LEAD_TIME_COL), keys))
+
+    fingerprint = dataset_fingerprint(data_path)
+    with stage("policy grid"):
+        sku_grid = get_policy_grid(SKU_COL, fingerprint)
+
+    # ---------- Aggregations per SKU ----------
+    with stage("policy lookup"):
+        df_grouped = sku_grid.stats.join(sku_grid.lookup(ordering_cost, holding_cost, service_level)).reset_index()
+
+    # ---------- Optional: Category-level Inventory ----------
+    if CATEGORY_COL in columns:
+        st.markdown("### Category-level Inventory Summary")
+        category_grid = get_policy_grid(CATEGORY_COL, fingerprint)
+        st.dataframe(category_grid.lookup(ordering_cost, holding_cost, service_level))
+
+    # ---------- Show SKU Inventory Table ----------
+    st.markdown("### Inventory Parameters per SKU")
+    st.dataframe(df_grouped.set_index(SKU_COL)[["EOQ", "Safety Stock", "Reorder Point", "Total Annual Cost"]])
+
+    # ---------- Optional: SKU x Warehouse Inventory ----------
+    if WAREHOUSE_COL in columns:
+        with st.expander("Inventory Parameters per SKU and Warehouse"):
+            # One row per SKU and warehouse pair, so the grid is only built once asked for
+            if st.checkbox("Compute per SKU and warehouse"):
+                with stage("warehouse policy grid"):
+                    warehouse_grid = get_pair_policy_grid((SKU_COL, WAREHOUSE_COL), fingerprint)
+                st.dataframe(warehouse_grid.lookup(ordering_cost, holding_cost, service_level))
+
+    # ---------- Sensitivity Analysis ----------
+    st.markdown("### Sensitivity Analysis (all SKUs)")
+    with stage("sensitivity curves"):
+        service_curve = sku_grid.service_level_curve(ordering_cost, holding_cost).sum()
+        eoq_curve, holding_curve = sku_grid.holding_cost_curve(ordering_cost, service_level)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        fig = px.line(
+            x=service_curve.index, y=service_curve.values, markers=True,
+            title=f"Total Annual Cost vs Service Level (ordering €{ordering_cost:g}, holding €{holding_cost:g})"
+        )
+        fig.update_layout(xaxis_title="Service Level", yaxis_title="Total Annual Cost", template="plotly_white")
+        st.plotly_chart(fig)
+    with col2:
+        holding_total = holding_curve.sum()
+        fig = px.line(
+            x=holding_total.index, y=holding_total.values,
+            title=f"Total Annual Cost vs Holding Cost "
+                  f"(ordering €{ordering_cost:g}, service level {service_level:.0%})"
         )
-        fig = px.histogram(
-            means,
-            nbins=30,
-            title=f"Monte Carlo Simulation: Avg Demand Distribution for {selected_sku}",
-            labels={"value": "Average Demand"},
-            opacity=0.75,
+        fig.update_layout(
+            xaxis_title="Holding Cost per unit per year", yaxis_title="Total Annual Cost", template="plotly_white"
         )
-        fig.update_layout(xaxis_title="Simulated Average Demand", yaxis_title="Frequency", template="plotly_white")
         st.plotly_chart(fig)
 
-        st.success(f"Simulation completed for SKU **{selected_sku}**!")
-
+    # ---------- Monte Carlo Simulation Inputs (daily SKU demand from the cube) ----------
+    @st.cache_data
+    def simulation_inputs(fingerprint):
+        daily_sku = load_cube(data_path).daily(SKU_COL)
+        mean, std = daily_demand_stats(daily_sku, SALES_COL)
+        lead_pmf = lead_time_pmf_from_counts(load_stats(data_path).lead_time_counts(), daily_sku.members)
+        return daily_sku.members, mean, std, lead_pmf, build_demand_index(daily_sku, SALES_COL)
+
+    # ---------- Monte Carlo Simulation UI ----------
+    st.markdown("### Monte Carlo Simulation of (s, Q) Inventory Policies")
+
+    with stage("simulation inputs"):
+        sim_members, daily_mean, daily_std, lead_pmf, demand_index = simulation_inputs(fingerprint)
+    sku_list = list(sim_members)
+    selected_sku = st.selectbox("Select SKU to simulate demand:", sku_list)
+
+    if selected_sku:
+        j = sku_list.index(selected_sku)
+        st.write(f"Average daily demand: {daily_mean[j]:.2f}")
+        st.write(f"Daily Demand Std Dev: {daily_std[j]:.2f}")
+        st.write(f"Average Lead Time (days): {lead_pmf[j] @ np.arange(lead_pmf.shape[1]):.2f}")
+
+        days_sim = st.number_input("Days to simulate:", min_value=7, max_value=365, value=30, step=1)
+        sims = st.number_input("Number of simulations:", min_value=100, max_value=200_000, value=10_000, step=1000)
+        seed = st.number_input("Random seed:", min_value=0, value=0, step=1)
+
+        # Bootstrap replays blocks of observed daily demand instead of assuming a normal distribution
+        demand_model = st.radio(
+            "Demand Model", ["Normal", "Bootstrap (block)", "Bootstrap (seasonal)"], horizontal=True
+        )
+        if demand_model == "Normal":
+            demand_sampler = NormalDemand(daily_mean, daily_std)
+        else:
+            block_length = st.number_input("Bootstrap block length (days):", min_value=1, max_value=28,
+                                           value=BLOCK_LENGTH, step=1)
+            demand_sampler = BootstrapDemand(
+                demand_index, block_length=block_length, seasonal=demand_model == "Bootstrap (seasonal)"
+            )
+
+        if st.button("Run Simulation"):
+            # Every SKU runs its reorder point / EOQ policy at the sidebar's cost and service settings
+            s, Q = reorder_policy(daily_mean, daily_std, lead_pmf, ordering_cost, holding_cost, service_level)
+            with st.spinner(f"Simulating {int(sims):,} paths x {len(sku_list)} SKUs..."):
+                result = run_simulation(
+                    sim_members, demand_sampler, s, Q, lead_pmf,
+                    n_paths=int(sims), days=int(days_sim), seed=int(seed), track=j
+                )
+
+            row = result.table.loc[selected_sku]
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Fill Rate", f"{row['Fill Rate']:.2%}")
+            col2.metric("Stockout Probability (per day)", f"{row['Stockout Probability']:.2%}")
+            col3.metric("Average On Hand", f"{row['Average On Hand']:.1f}")
+
+            # Binned here: 30 bars go to the browser however many paths were simulated
+            fig = histogram_figure(
+                result.track_fill_rate,
+                nbins=30,
+                title=f"Monte Carlo Simulation: Fill Rate Distribution for {selected_sku}",
+                x_title="Simulated Fill Rate per Path",
+            )
+            st.plotly_chart(fig)
+
+            st.markdown("#### Simulated Service Levels per SKU")
+            st.dataframe(result.table.round(4))
+
+            st.success(f"Simulation completed for SKU **{selected_sku}**!")
@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+from scipy.special import ndtri
+
+from inventorysim import daily_demand_stats
+
+# -------------------- CONFIG --------------------
+# Parameter grids behind the page's sliders; every combination is an O(N) lookup
+ORDERING_COST_GRID = np.round(np.arange(0.0, 500.0 + 1e-9, 5.0), 2)
+HOLDING_COST_GRID = np.round(np.arange(0.0, 10.0 + 1e-9, 0.1), 2)
+SERVICE_LEVEL_GRID = np.round(np.arange(0.80, 0.99 + 1e-9, 0.01), 2)
+DAYS_PER_YEAR = 365  # demand moments are per day, holding cost is per unit per year
+DATE_COL = "Date"
+
+# Every policy input is daily demand: rows are summed per group and day first,
+# and the moments run over each group's active range (first to last day with
+# rows; days without rows inside it count as 0), as inventorysim's
+# daily_demand_stats computes them for the Monte Carlo simulation.
+
+
+# -------------------- DEMAND STATISTICS --------------------
+def cube_demand_stats(daily_cube, sales_col="Sales Quantity", lead_time_col="Lead Time (days)"):
+    """Daily demand mean/std and mean lead time per member of a daily cube level."""
+    mean, std = daily_demand_stats(daily_cube, sales_col)
+    return pd.DataFrame({
+        "avg_demand": mean,
+        "std_demand": std,
+        "avg_lead_time": daily_cube.totals(lead_time_col).to_numpy(),
+    }, index=pd.Index(daily_cube.members, name=daily_cube.level)).sort_index()
+
+
+def daily_totals(chunks, keys, sales_col="Sales Quantity", lead_time_col="Lead Time (days)", date_col=DATE_COL):
+    """
+    Sales sum, lead-time sum and row count per (group, day) from row-level frames,
+    one frame or chunks streamed off disk (a day split across chunks is added up).
+    For groupings the cube has no level for, e.g. SKU x Warehouse.
+    """
+    keys = list(keys)
+    parts = []
+    for chunk in chunks:
+        chunk = chunk.dropna(subset=[*keys, sales_col, lead_time_col, date_col])
+        day = chunk[date_col].dt.normalize().rename(date_col)
+        parts.append(chunk.groupby([*keys, day], observed=True).agg(
+            sales=(sales_col, "sum"), lead_time=(lead_time_col, "sum"), rows=(sales_col, "size")
+        ))
+    totals = pd.concat(parts)
+    return totals.groupby(level=[*keys, date_col], observed=True).sum() if len(parts) > 1 else totals
+
+
+def demand_stats_from_totals(totals, keys):
+    """Daily demand mean/std and mean lead time per group from daily_totals()."""
+    keys = list(keys)
+    days = totals.index.get_level_values(-1)
+    agg = totals.assign(day=days).groupby(level=keys, observed=True).agg(
+        first=("day", "min"), last=("day", "max"), sales=("sales", "sum"), lead_time=("lead_time", "sum"),
+        rows=("rows", "sum"), days_with_rows=("rows", "size")
+    )
+    n_days = (agg["last"] - agg["first"]).dt.days + 1
+    mean = agg["sales"] / n_days
+    # Squared deviations of the days with rows, plus mean^2 for every empty day of the range
+    group_mean = mean.reindex(totals.index.droplevel(-1)).to_numpy()
+    squares = ((totals["sales"] - group_mean) ** 2).groupby(level=keys, observed=True).sum()
+    squares += (n_days - agg["days_with_rows"]) * mean ** 2
+    return pd.DataFrame({
+        "avg_demand": mean,
+        "std_demand": np.sqrt(squares / np.maximum(n_days - 1, 1)),
+        "avg_lead_time": agg["lead_time"] / agg["rows"],
+    }).sort_index()
+
+
+def demand_stats(df, keys, sales_col="Sales Quantity", lead_time_col="Lead Time (days)"):
+    """Daily demand mean/std and mean lead time per group of a row-level frame."""
+    return demand_stats_from_totals(daily_totals([df], keys, sales_col, lead_time_col), keys)
+
+
+# -------------------- POLICY GRID --------------------
+class PolicyGrid:
+    """
+    EOQ, safety stock, reorder point and total annual cost for N groups over the
+    full (ordering cost x holding cost x service level) grid.
+
+    The formulas separate: EOQ = sqrt(2 D S / H) = sqrt(2 D) * sqrt(S / H) with
+    D the annual demand, so it is stored as an (N,) demand factor and an (A, B)
+    cost factor and any EOQ slice is an outer product over N. Safety stock and
+    reorder point only depend on service level and are stored as (N, C). At
+    Q = EOQ the ordering + cycle-stock cost (D / Q) * S + (Q / 2) * H equals
+    EOQ * H, so any grid point's total annual cost is O(N).
+    """
+
+    def __init__(self, stats, ordering_costs=ORDERING_COST_GRID, holding_costs=HOLDING_COST_GRID,
+                 service_levels=SERVICE_LEVEL_GRID):
+        self.stats = stats
+        self.index = stats.index
+        self.ordering_costs = np.asarray(ordering_costs, dtype=np.float64)
+        self.holding_costs = np.asarray(holding_costs, dtype=np.float64)
+        self.service_levels = np.asarray(service_levels, dtype=np.float64)
+
+        demand = stats["avg_demand"].to_numpy(np.float64)
+        std = stats["std_demand"].to_numpy(np.float64)
+        lead_time = stats["avg_lead_time"].to_numpy(np.float64)
+
+        # ---------- EOQ factors: (N,) and (A, B) ----------
+        self.demand_factor = np.sqrt(2 * np.maximum(demand, 0) * DAYS_PER_YEAR)
+        S = self.ordering_costs[:, None]
+        H = self.holding_costs[None, :]
+        self.cost_factor = np.where(H > 0, np.sqrt(S / np.where(H > 0, H, 1)), 0.0)
+
+        # ---------- Safety stock and reorder point: (N, C) ----------
+        z = ndtri(self.service_levels)[None, :]          # one ppf per grid level, not per row
+        sigma_lt = np.where((std > 0) & (lead_time > 0), std * np.sqrt(np.maximum(lead_time, 0)), 0.0)
+        self.safety_stock = (z * sigma_lt[:, None]).astype(np.float32)
+        self.reorder_point = (demand[:, None] * lead_time[:, None] + self.safety_stock).astype(np.float32)
+
+    def __len__(self):
+        return len(self.index)
+
+    def grid_position(self, ordering_cost, holding_cost, service_level):
+        """Nearest grid indices for a parameter tuple (exact for slider values)."""
+        return (
+            int(np.abs(self.ordering_costs - ordering_cost).argmin()),
+            int(np.abs(self.holding_costs - holding_cost).argmin()),
+            int(np.abs(self.service_levels - service_level).argmin()),
+        )
+
+    def eoq(self, a, b=slice(None)):
+        """(N,) EOQ at grid point (a, b), or (N, B) over every holding cost by default."""
+        return np.multiply.outer(self.demand_factor, self.cost_factor[a, b])
+
+    def total_cost(self, a, b, c):
+        """(N,) annual ordering + cycle-stock + safety-stock holding cost at grid point (a, b, c)."""
+        return (self.eoq(a, b) + self.safety_stock[:, c]) * self.holding_costs[b]
+
+    def lookup(self, ordering_cost, holding_cost, service_level):
+        """Policy table for one parameter tuple, read from the precomputed grid."""
+        a, b, c = self.grid_position(ordering_cost, holding_cost, service_level)
+        table = pd.DataFrame({
+            "EOQ": self.eoq(a, b),
+            "Safety Stock": self.safety_stock[:, c],
+            "Reorder Point": self.reorder_point[:, c],
+            "Total Annual Cost": self.total_cost(a, b, c),
+        }, index=self.index)
+        return table.astype(np.float64).round(2)
+
+    def service_level_curve(self, ordering_cost, holding_cost):
+        """(N, C) total cost over every service level with the cost parameters held fixed."""
+        a, b, _ = self.grid_position(ordering_cost, holding_cost, self.service_levels[0])
+        return pd.DataFrame(
+            (self.eoq(a, b)[:, None] + self.safety_stock) * self.holding_costs[b],
+            index=self.index, columns=pd.Index(self.service_levels, name="Service Level")
+        )
+
+    def holding_cost_curve(self, ordering_cost, service_level):
+        """(N, B) EOQ and total cost over every holding cost with the other parameters held fixed."""
+        a, _, c = self.grid_position(ordering_cost, self.holding_costs[0], service_level)
+        columns = pd.Index(self.holding_costs, name="Holding Cost")
+        eoq = self.eoq(a)
+        cost = pd.DataFrame(
+            (eoq + self.safety_stock[:, c, None]) * self.holding_costs[None, :],
+            index=self.index, columns=columns
+        )
+        return pd.DataFrame(eoq, index=self.index, columns=columns), cost
+
+
+def build_policy_grid(df, keys, sales_col="Sales Quantity", lead_time_col="Lead Time (days)", **grids):
+    return PolicyGrid(demand_stats(df, keys, sales_col, lead_time_col), **grids)
@@ -0,0 +1,217 @@
+import os
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtri
+
+from demandsampler import active_range
+from instrumentation import timed
+
+# -------------------- CONFIG --------------------
+CHUNK_PATHS = 2048   # paths simulated together; bounds memory at ~CHUNK_PATHS x SKUs x lead-time slots
+DAYS_PER_YEAR = 365
+
+# Worker-side simulation inputs, set once per process
+_shared = {}
+
+
+# -------------------- INPUTS --------------------
+def daily_demand_stats(daily_cube, measure="Sales Quantity"):
+    """
+    Mean and std of daily demand per member over its active range, the first to
+    the last day it has rows (the history build_demand_index samples from).
+    Days without sales inside the range count as 0; days before a member's
+    first sale or after its last do not count at all.
+    """
+    _, _, in_range = active_range(daily_cube)
+    n_days = in_range.sum(axis=0)
+    values = np.where(in_range, daily_cube.values(measure), 0.0)
+    mean = values.sum(axis=0) / np.maximum(n_days, 1)
+    squares = np.where(in_range, values - mean, 0.0) ** 2
+    std = np.sqrt(squares.sum(axis=0) / np.maximum(n_days - 1, 1))
+    return mean, std
+
+
+def lead_time_pmf(df, members, key_col="SKU", lead_time_col="Lead Time (days)"):
+    """
+    Empirical lead-time distribution per member: (N, max_lead + 1) probabilities
+    over whole days, from the observed order rows. Members without rows fall
+    back to the distribution over all rows.
+    """
+    codes = pd.Categorical(df[key_col], categories=members).codes.astype(np.int64)
+    lead = df[lead_time_col].to_numpy(np.float64)
+    return _lead_time_pmf(codes, lead, np.ones(len(codes)), len(members))
+
+
+def lead_time_pmf_from_counts(counts, members):
+    """lead_time_pmf from row counts per (member, lead time), e.g. DatasetStats.lead_time_counts()."""
+    codes = pd.Categorical(counts.index.get_level_values(0), categories=members).codes.astype(np.int64)
+    lead = np.asarray(counts.index.get_level_values(1), dtype=np.float64)
+    return _lead_time_pmf(codes, lead, counts.to_numpy(np.float64), len(members))
+
+
+def _lead_time_pmf(codes, lead, weights, n_members):
+    lead = np.clip(np.rint(lead), 0, None)
+    valid = (codes >= 0) & ~np.isnan(lead)
+    lead = np.where(valid, lead, 0).astype(np.int64)
+    width = int(lead[valid].max()) + 1 if valid.any() else 1
+    counts = np.bincount(codes[valid] * width + lead[valid], weights=weights[valid], minlength=n_members * width)
+    counts = counts.reshape(n_members, width)
+    overall = counts.sum(axis=0) if counts.sum() else np.eye(1, width, 1)[0]
+    counts[counts.sum(axis=1) == 0] = overall
+    return counts / counts.sum(axis=1, keepdims=True)
+
+
+def reorder_policy(mean, std, lead_pmf, ordering_cost, holding_cost, service_level, days_per_year=DAYS_PER_YEAR):
+    """(s, Q) per member: s = d * L + z * sigma * sqrt(L), Q = EOQ on annual demand (at least one day's demand)."""
+    lead_mean = lead_pmf @ np.arange(lead_pmf.shape[1])
+    z = ndtri(service_level)
+    s = mean * lead_mean + z * std * np.sqrt(lead_mean)
+    annual = mean * days_per_year
+    with np.errstate(divide="ignore", invalid="ignore"):
+        eoq = np.where(holding_cost > 0, np.sqrt(2 * annual * ordering_cost / holding_cost), 0.0)
+    Q = np.maximum(eoq, np.maximum(mean, 1.0))
+    return s, Q
+
+
+class NormalDemand:
+    """Daily demand ~ Normal(mean, std) clipped at zero, the page's original assumption."""
+
+    def __init__(self, mean, std):
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.std = np.asarray(std, dtype=np.float32)
+
+    def sample(self, rng, day, n_paths):
+        draw = rng.standard_normal((n_paths, len(self.mean)), dtype=np.float32)
+        return np.maximum(draw * self.std + self.mean, 0)
+
+
+# -------------------- SIMULATION --------------------
+def simulate_chunk(demand, s, Q, lead_cdf, n_paths, days, seed, track=None):
+    """
+    Lost-sales (s, Q) simulation of n_paths x SKUs for `days` days in float32.
+
+    Each day: orders due today arrive, demand is served from stock, then every
+    (path, SKU) whose inventory position is at or below s orders enough
+    multiples of Q to rise above it, with a lead time drawn from its SKU's
+    distribution. Outstanding orders sit in a ring buffer indexed by arrival day.
+    Returns per-SKU sums, plus per-path fill rates for the `track` column.
+    """
+    rng = np.random.default_rng(seed)
+    n_skus, slots = lead_cdf.shape
+    slots = max(slots, 2)
+    s = s.astype(np.float32)
+    Q = Q.astype(np.float32)
+
+    on_hand = np.broadcast_to(s + Q, (n_paths, n_skus)).copy()
+    on_order = np.zeros((n_paths, n_skus), dtype=np.float32)
+    pipeline = np.zeros((n_paths, n_skus, slots), dtype=np.float32)
+
+    totals = {name: np.zeros(n_skus) for name in ["demand", "served", "stockout_days", "on_hand", "orders"]}
+    if track is not None:
+        track_demand = np.zeros(n_paths)
+        track_served = np.zeros(n_paths)
+
+    for day in range(days):
+        slot = day % slots
+        arrived = pipeline[:, :, slot]
+        on_hand += arrived
+        on_order -= arrived
+        arrived[:] = 0
+
+        d = demand.sample(rng, day, n_paths)
+        served = np.minimum(on_hand, d)
+        on_hand -= served
+
+        position = on_hand + on_order
+        need = position <= s
+        rows, cols = np.nonzero(need)  # orders are sparse: sample lead times only where one is placed
+        qty = (np.floor((s[cols] - position[rows, cols]) / Q[cols]) + 1) * Q[cols]
+        u = rng.random(len(rows), dtype=np.float32)
+        lead = np.maximum((u[:, None] > lead_cdf[cols]).sum(axis=1), 1)  # at least next day
+        pipeline[rows, cols, (day + lead) % slots] += qty
+        on_order[rows, cols] += qty
+
+        totals["demand"] += d.sum(axis=0, dtype=np.float64)
+        totals["served"] += served.sum(axis=0, dtype=np.float64)
+        totals["stockout_days"] += (served < d).sum(axis=0)
+        totals["on_hand"] += on_hand.sum(axis=0, dtype=np.float64)
+        totals["orders"] += need.sum(axis=0)
+        if track is not None:
+            track_demand += d[:, track]
+            track_served += served[:, track]
+
+    if track is not None:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            totals["track_fill_rate"] = np.where(track_demand > 0, track_served / track_demand, 1.0)
+    return totals
+
+
+def _init_worker(demand, s, Q, lead_cdf):
+    _shared.update(demand=demand, s=s, Q=Q, lead_cdf=lead_cdf)
+
+
+def _run_chunk(n_paths, days, seed, track):
+    return simulate_chunk(
+        _shared["demand"], _shared["s"], _shared["Q"], _shared["lead_cdf"], n_paths, days, seed, track
+    )
+
+
+def _merge(results):
+    merged = {name: sum(r[name] for r in results) for name in ["demand", "served", "stockout_days", "on_hand", "orders"]}
+    if "track_fill_rate" in results[0]:
+        merged["track_fill_rate"] = np.concatenate([r["track_fill_rate"] for r in results])
+    return merged
+
+
+class SimulationResult:
+    """Per-SKU service metrics of one simulation run."""
+
+    def __init__(self, members, s, Q, totals, n_paths, days):
+        self.members = members
+        self.n_paths = n_paths
+        self.days = days
+        path_days = n_paths * days
+        with np.errstate(invalid="ignore", divide="ignore"):
+            fill_rate = np.where(totals["demand"] > 0, totals["served"] / totals["demand"], 1.0)
+        self.table = pd.DataFrame({
+            "Reorder Point (s)": s,
+            "Order Quantity (Q)": Q,
+            "Fill Rate": fill_rate,
+            "Stockout Probability": totals["stockout_days"] / path_days,
+            "Average On Hand": totals["on_hand"] / path_days,
+            "Orders per Path": totals["orders"] / n_paths,
+        }, index=pd.Index(members, name="SKU"))
+        self.track_fill_rate = totals.get("track_fill_rate")
+
+
+@timed()
+def run_simulation(members, demand, s, Q, lead_pmf, n_paths=10_000, days=30, seed=0, track=None,
+                   chunk_paths=CHUNK_PATHS, max_workers=None):
+    """
+    Simulate every SKU's (s, Q) policy over n_paths demand paths.
+
+    Paths are split into chunks of at most chunk_paths, each with its own seed
+    spawned from `seed`, so results do not depend on how chunks are spread over
+    workers. Chunks run in a spawn process pool (inline when there is only one),
+    and only per-SKU sums come back, so memory stays bounded by the chunk size.
+    """
+    lead_cdf = np.cumsum(lead_pmf, axis=1).astype(np.float32)
+    lead_cdf[:, -1] = 1.0
+    sizes = [min(chunk_paths, n_paths - start) for start in range(0, n_paths, chunk_paths)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    if len(sizes) == 1 or max_workers == 1:
+        results = [simulate_chunk(demand, s, Q, lead_cdf, size, days, sd, track) for size, sd in zip(sizes, seeds)]
+    else:
+        max_workers = max_workers or min(len(sizes), os.cpu_count() or 1)
+        with ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=mp.get_context("spawn"),
+            initializer=_init_worker, initargs=(demand, s, Q, lead_cdf)
+        ) as pool:
+            futures = [pool.submit(_run_chunk, size, days, sd, track) for size, sd in zip(sizes, seeds)]
+            results = [f.result() for f in futures]
+
+    return SimulationResult(members, s, Q, _merge(results), n_paths, days)
@@ -0,0 +1,130 @@
+import os
+
+import numpy as np
+
+# -------------------- CONFIG --------------------
+WEIGHTS_FILE_NAME = "weights.npz"
+
+# Keras packs the four LSTM gates side by side in this order: input, forget, cell, output.
+# Activations are the Keras defaults build_lstm relies on (tanh, sigmoid recurrent activation);
+# dropout is inactive at inference, so a forecast is a plain forward pass.
+
+
+def _sigmoid(x):
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)  # no overflow warnings for large |x|
+
+
+def _lstm_layer(x, kernel, recurrent, bias, return_sequences):
+    """One LSTM layer over a (batch, time, features) array, zero initial state."""
+    n, steps, _ = x.shape
+    units = recurrent.shape[0]
+    # Input projections of every step in one matmul; only the recurrence is sequential
+    gates_x = x @ kernel + bias
+    h = np.zeros((n, units), dtype=x.dtype)
+    c = np.zeros((n, units), dtype=x.dtype)
+    out = np.empty((n, steps, units), dtype=x.dtype) if return_sequences else None
+    for t in range(steps):
+        z = gates_x[:, t] + h @ recurrent
+        i = _sigmoid(z[:, :units])
+        f = _sigmoid(z[:, units:2 * units])
+        g = np.tanh(z[:, 2 * units:3 * units])
+        o = _sigmoid(z[:, 3 * units:])
+        c = f * c + i * g
+        h = o * np.tanh(c)
+        if return_sequences:
+            out[:, t] = h
+    return out if return_sequences else h
+
+
+# -------------------- RUNTIME --------------------
+class NumpyLSTM:
+    """
+    Inference-only copy of a build_lstm model: the stacked LSTM layers, the
+    dense head and the optional series embedding as float32 arrays. predict()
+    and __call__ accept the same inputs as the Keras model, so forecast code
+    can serve stored models without importing TensorFlow.
+    """
+
+    def __init__(self, lstm_layers, dense_kernel, dense_bias, embedding=None):
+        self.lstm_layers = [tuple(np.asarray(w, dtype=np.float32) for w in layer) for layer in lstm_layers]
+        self.dense_kernel = np.asarray(dense_kernel, dtype=np.float32)
+        self.dense_bias = np.asarray(dense_bias, dtype=np.float32)
+        self.embedding = None if embedding is None else np.asarray(embedding, dtype=np.float32)
+
+    @classmethod
+    def from_keras(cls, model):
+        """Export the weights of a trained build_lstm model (layer types, in graph order)."""
+        lstm_layers, dense, embedding = [], None, None
+        for layer in model.layers:
+            kind = type(layer).__name__
+            if kind == "LSTM":
+                lstm_layers.append(layer.get_weights())
+            elif kind == "Dense":
+                dense = layer.get_weights()
+            elif kind == "Embedding":
+                embedding = layer.get_weights()[0]
+        if not lstm_layers or dense is None:
+            raise ValueError("Model has no LSTM/Dense layers to export.")
+        return cls(lstm_layers, dense[0], dense[1], embedding)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            lstm_layers = [
+                (data[f"lstm{k}_kernel"], data[f"lstm{k}_recurrent"], data[f"lstm{k}_bias"])
+                for k in range(int(data["n_lstm"]))
+            ]
+            embedding = data["embedding"] if "embedding" in data.files else None
+            return cls(lstm_layers, data["dense_kernel"], data["dense_bias"], embedding)
+
+    def save(self, path):
+        arrays = {"n_lstm": np.array(len(self.lstm_layers)),
+                  "dense_kernel": self.dense_kernel, "dense_bias": self.dense_bias}
+        for k, (kernel, recurrent, bias) in enumerate(self.lstm_layers):
+            arrays.update({f"lstm{k}_kernel": kernel, f"lstm{k}_recurrent": recurrent, f"lstm{k}_bias": bias})
+        if self.embedding is not None:
+            arrays["embedding"] = self.embedding
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+
+    @property
+    def nbytes(self):
+        arrays = [w for layer in self.lstm_layers for w in layer] + [self.dense_kernel, self.dense_bias]
+        return sum(a.nbytes for a in arrays) + (0 if self.embedding is None else self.embedding.nbytes)
+
+    def _forward(self, window, series_ids=None):
+        x = np.asarray(window, dtype=np.float32)
+        if self.embedding is not None:
+            if series_ids is None:
+                raise ValueError("This model takes series ids next to the window.")
+            emb = self.embedding[np.asarray(series_ids, dtype=np.int64).reshape(-1)]
+            x = np.concatenate([x, np.broadcast_to(emb[:, None, :], (len(x), x.shape[1], emb.shape[1]))], axis=2)
+        for k, (kernel, recurrent, bias) in enumerate(self.lstm_layers):
+            x = _lstm_layer(x, kernel, recurrent, bias, return_sequences=k < len(self.lstm_layers) - 1)
+        return x @ self.dense_kernel + self.dense_bias
+
+    def predict(self, inputs, verbose=0, batch_size=None):
+        """Same inputs as the Keras model: a window batch, or [window, series_ids]."""
+        window, series_ids = (inputs[0], inputs[1]) if isinstance(inputs, (list, tuple)) else (inputs, None)
+        n = len(window)
+        batch_size = batch_size or n or 1
+        return np.concatenate([
+            self._forward(window[start:start + batch_size],
+                          None if series_ids is None else series_ids[start:start + batch_size])
+            for start in range(0, n, batch_size)
+        ]) if n else np.empty((0, self.dense_bias.shape[0]), dtype=np.float32)
+
+    def __call__(self, inputs, training=False):
+        return self.predict(inputs)
+
+    def forecast_recursive(self, window, steps, series_ids=None):
+        """Feed one-step predictions back into channel 0; other channels hold their last value."""
+        window = np.array(window, dtype=np.float32)
+        out = np.empty((len(window), steps), dtype=np.float32)
+        for step in range(steps):
+            pred = self._forward(window, series_ids)[:, 0]
+            out[:, step] = pred
+            window[:, :-1] = window[:, 1:]
+            window[:, -1, 0] = pred
+        return out
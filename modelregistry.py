@@ -0,0 +1,156 @@
+import os
+import json
+import time
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from datastore import DATA_PATH
+from lstmruntime import NumpyLSTM, WEIGHTS_FILE_NAME
+
+# -------------------- CONFIG --------------------
+REGISTRY_DIR_NAME = ".scm_models"
+WARM_START_EPOCHS = 20  # fine-tuning budget when only new weeks arrived
+MEMORY_CACHE_SIZE = 16  # loaded (model, scaler) pairs kept in memory, least recently used evicted
+
+HIT = "hit"      # same data version: reuse as-is
+WARM = "warm"    # same series, newer data: fine-tune from stored weights
+MISS = "miss"    # nothing usable stored: train from scratch
+
+
+def default_registry_dir(path=DATA_PATH):
+    return os.environ.get(
+        "SCM_MODEL_DIR", os.path.join(os.path.dirname(os.path.abspath(path)), REGISTRY_DIR_NAME)
+    )
+
+
+# -------------------- REGISTRY --------------------
+class ModelRegistry:
+    """
+    On-disk store of trained forecasting models.
+
+    Entries are keyed by (forecast level, member, time_steps, architecture); each
+    holds the Keras model, its weights exported for the NumPy runtime, the
+    fitted scaler and a meta.json with the data fingerprint, last training date
+    and validation MAPE. The last MEMORY_CACHE_SIZE loaded models are also kept
+    in memory (LRU, shared by every session) so repeat requests in the same
+    process skip deserialisation.
+
+    load() returns the Keras model (for fine-tuning); load_inference() returns a
+    NumpyLSTM and never imports TensorFlow unless an entry predates the
+    exported weights, which are then written once.
+    """
+
+    def __init__(self, root=None):
+        self.root = root or default_registry_dir()
+        self._memory = OrderedDict()
+        self._memory_lock = threading.Lock()
+
+    def _entry_dir(self, level, member, time_steps, architecture):
+        key = json.dumps([level, str(member), int(time_steps), architecture])
+        return os.path.join(self.root, hashlib.sha1(key.encode()).hexdigest()[:20])
+
+    def lookup(self, level, member, time_steps, architecture):
+        meta_path = os.path.join(self._entry_dir(level, member, time_steps, architecture), "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as fh:
+            return json.load(fh)
+
+    def status(self, meta, fingerprint, last_date):
+        if meta is None:
+            return MISS
+        if meta["fingerprint"] == fingerprint:
+            return HIT
+        if pd.Timestamp(meta["last_date"]) < pd.Timestamp(last_date):
+            return WARM
+        return MISS
+
+    def _load_scaler(self, entry_dir):
+        with open(os.path.join(entry_dir, "scaler.pkl"), "rb") as fh:
+            return pickle.load(fh)
+
+    def load(self, level, member, time_steps, architecture):
+        from keras.models import load_model
+
+        entry_dir = self._entry_dir(level, member, time_steps, architecture)
+        meta = self.lookup(level, member, time_steps, architecture)
+        cached = self._recall((entry_dir, meta["fingerprint"], "keras"))
+        if cached is None:
+            model = load_model(os.path.join(entry_dir, "model.keras"))
+            cached = self._remember(entry_dir, meta["fingerprint"], "keras", model, self._load_scaler(entry_dir))
+        model, scaler = cached
+        return model, scaler, meta
+
+    def load_inference(self, level, member, time_steps, architecture):
+        entry_dir = self._entry_dir(level, member, time_steps, architecture)
+        meta = self.lookup(level, member, time_steps, architecture)
+        cached = self._recall((entry_dir, meta["fingerprint"], "numpy"))
+        if cached is None:
+            weights_path = os.path.join(entry_dir, WEIGHTS_FILE_NAME)
+            if not os.path.exists(weights_path):
+                NumpyLSTM.from_keras(self.load(level, member, time_steps, architecture)[0]).save(weights_path)
+            model = NumpyLSTM.load(weights_path)
+            cached = self._remember(entry_dir, meta["fingerprint"], "numpy", model, self._load_scaler(entry_dir))
+        model, scaler = cached
+        return model, scaler, meta
+
+    def _recall(self, key):
+        with self._memory_lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                self._memory.move_to_end(key)
+            return cached
+
+    def _remember(self, entry_dir, fingerprint, runtime, model, scaler):
+        with self._memory_lock:
+            for key in [k for k in self._memory if k[0] == entry_dir and k[1] != fingerprint]:
+                del self._memory[key]
+            key = (entry_dir, fingerprint, runtime)
+            self._memory[key] = (model, scaler)
+            self._memory.move_to_end(key)
+            while len(self._memory) > MEMORY_CACHE_SIZE:
+                self._memory.popitem(last=False)
+            return model, scaler
+
+    def save(self, level, member, time_steps, architecture, model, scaler,
+             fingerprint, last_date, mape, epochs_trained, warm_started=False, differenced=None):
+        entry_dir = self._entry_dir(level, member, time_steps, architecture)
+        os.makedirs(entry_dir, exist_ok=True)
+
+        # meta.json is written last and marks the entry as complete
+        model_path = os.path.join(entry_dir, "model.keras")
+        model.save(model_path + ".tmp.keras")
+        os.replace(model_path + ".tmp.keras", model_path)
+        runtime_model = NumpyLSTM.from_keras(model)
+        runtime_model.save(os.path.join(entry_dir, WEIGHTS_FILE_NAME))
+
+        scaler_path = os.path.join(entry_dir, "scaler.pkl")
+        with open(scaler_path + ".tmp", "wb") as fh:
+            pickle.dump(scaler, fh)
+        os.replace(scaler_path + ".tmp", scaler_path)
+
+        meta = {
+            "level": level,
+            "member": str(member),
+            "time_steps": int(time_steps),
+            "architecture": architecture,
+            "fingerprint": fingerprint,
+            "last_date": str(pd.Timestamp(last_date).date()),
+            "mape": float(mape),
+            "epochs_trained": int(epochs_trained),
+            "warm_started": bool(warm_started),
+            "differenced": differenced,  # stationarity decision, reused on a HIT instead of re-testing
+            "saved_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        meta_path = os.path.join(entry_dir, "meta.json")
+        with open(meta_path + ".tmp", "w") as fh:
+            json.dump(meta, fh, indent=2)
+        os.replace(meta_path + ".tmp", meta_path)
+
+        self._remember(entry_dir, fingerprint, "keras", model, scaler)
+        self._remember(entry_dir, fingerprint, "numpy", runtime_model, scaler)
+        return meta
@@ -0,0 +1,218 @@
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+
+# -------------------- GROUPED MOMENTS --------------------
+class GroupedMoments:
+    """
+    Count, sum, mean and M2 (sum of squared deviations) of value columns per
+    group, updated batch by batch.
+
+    Each batch is summarised with one groupby and merged into the running
+    arrays with the pairwise (Chan et al.) form of Welford's update, so the
+    cost of an update depends on the batch, not on the rows seen so far.
+    Groups keep the order in which they first appear.
+    """
+
+    def __init__(self, keys, columns=()):
+        self.keys = list(keys)
+        self.columns = list(columns)
+        self.labels = []
+        self._row = {}
+        self.count = np.zeros(0)
+        self.total = np.zeros((0, len(self.columns)))
+        self.mean = np.zeros((0, len(self.columns)))
+        self.m2 = np.zeros((0, len(self.columns)))
+
+    def _rows(self, labels):
+        new = [label for label in labels if label not in self._row]
+        if new:
+            for label in new:
+                self._row[label] = len(self.labels)
+                self.labels.append(label)
+            pad = len(new)
+            self.count = np.concatenate([self.count, np.zeros(pad)])
+            self.total, self.mean, self.m2 = (
+                np.vstack([arr, np.zeros((pad, len(self.columns)))]) for arr in (self.total, self.mean, self.m2)
+            )
+        return np.array([self._row[label] for label in labels], dtype=np.int64)
+
+    def update(self, df):
+        if df.empty:
+            return self
+        grouped = df.groupby(self.keys, observed=True, sort=False)
+        n_b = grouped.size()
+        sums = m2_b = None
+        if self.columns:
+            sums = grouped[self.columns].sum().to_numpy(np.float64)
+            m2_b = grouped[self.columns].var(ddof=0).to_numpy(np.float64) * n_b.to_numpy(np.float64)[:, None]
+        return self._merge_groups(list(n_b.index), n_b.to_numpy(np.float64), sums, m2_b)
+
+    def merge(self, other):
+        """Fold in moments built elsewhere (another partition or chunk)."""
+        if other.labels:
+            self._merge_groups(other.labels, other.count, other.total, other.m2)
+        return self
+
+    def _merge_groups(self, labels, n_b, sums, m2_b):
+        rows = self._rows(labels)
+        n_a = self.count[rows]
+        n = n_a + n_b
+        self.count[rows] = n
+        if self.columns:
+            mean_b = sums / n_b[:, None]
+            delta = mean_b - self.mean[rows]
+            self.total[rows] += sums
+            self.mean[rows] += delta * (n_b / n)[:, None]
+            self.m2[rows] += m2_b + delta ** 2 * (n_a * n_b / n)[:, None]
+        return self
+
+    def index(self):
+        if len(self.keys) == 1:
+            return pd.Index(self.labels, name=self.keys[0])
+        return pd.MultiIndex.from_tuples(self.labels, names=self.keys)
+
+    def counts(self):
+        return pd.Series(self.count, index=self.index(), name="count")
+
+    def frame(self, stat="mean"):
+        """Per-group 'mean', 'total', 'std' (sample) or 'var' (sample) of every column."""
+        if stat in ("std", "var"):
+            with np.errstate(invalid="ignore", divide="ignore"):
+                values = np.where(self.count[:, None] > 1, self.m2 / (self.count[:, None] - 1), np.nan)
+            values = np.sqrt(values) if stat == "std" else values
+        else:
+            values = getattr(self, stat)
+        return pd.DataFrame(values, index=self.index(), columns=self.columns)
+
+
+class GroupedMax:
+    """Running maximum of one column per group (e.g. each customer's last purchase date), mergeable."""
+
+    def __init__(self, keys, column):
+        self.keys = list(keys)
+        self.column = column
+        self.labels = []
+        self._row = {}
+        self.values = np.zeros(0)
+        self._dtype = None
+
+    def _rows(self, labels):
+        new = [label for label in labels if label not in self._row]
+        for label in new:
+            self._row[label] = len(self.labels)
+            self.labels.append(label)
+        if new:
+            self.values = np.concatenate([self.values, np.full(len(new), -np.inf)])
+        return np.array([self._row[label] for label in labels], dtype=np.int64)
+
+    def update(self, df):
+        if df.empty:
+            return self
+        column = df[self.column]
+        if pd.api.types.is_datetime64_any_dtype(column):
+            # Compared as int64 nanoseconds; series() converts back
+            self._dtype = column.dtype
+            column = column.astype("int64")
+        batch = column.groupby([df[k] for k in self.keys], observed=True, sort=False).max()
+        return self._merge_groups(list(batch.index), batch.to_numpy(np.float64))
+
+    def merge(self, other):
+        if other.labels:
+            self._dtype = self._dtype or other._dtype
+            self._merge_groups(other.labels, other.values)
+        return self
+
+    def _merge_groups(self, labels, values):
+        rows = self._rows(labels)
+        self.values[rows] = np.maximum(self.values[rows], values)
+        return self
+
+    def series(self):
+        if len(self.keys) == 1:
+            index = pd.Index(self.labels, name=self.keys[0])
+        else:
+            index = pd.MultiIndex.from_tuples(self.labels, names=self.keys)
+        values = pd.Series(self.values, index=index, name=self.column)
+        if self._dtype is not None:
+            values = pd.Series(values.to_numpy(np.int64).astype(self._dtype), index=index, name=self.column)
+        return values
+
+
+# -------------------- CO-MOMENTS --------------------
+class CoMoments:
+    """Running count, means and co-moment matrix of several columns (for correlations)."""
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        p = len(self.columns)
+        self.n = 0
+        self.mean = np.zeros(p)
+        self.comoment = np.zeros((p, p))
+
+    def update(self, df):
+        X = df[self.columns].to_numpy(np.float64)
+        X = X[~np.isnan(X).any(axis=1)]
+        n_b = len(X)
+        if n_b == 0:
+            return self
+        mean_b = X.mean(axis=0)
+        centered = X - mean_b
+        return self._merge(n_b, mean_b, centered.T @ centered)
+
+    def merge(self, other):
+        if other.n:
+            self._merge(other.n, other.mean, other.comoment)
+        return self
+
+    def _merge(self, n_b, mean_b, c_b):
+        n = self.n + n_b
+        delta = mean_b - self.mean
+        self.comoment += c_b + np.outer(delta, delta) * (self.n * n_b / n)
+        self.mean += delta * (n_b / n)
+        self.n = n
+        return self
+
+    def cov(self, ddof=1):
+        return pd.DataFrame(self.comoment / (self.n - ddof), index=self.columns, columns=self.columns)
+
+    def corr(self):
+        sd = np.sqrt(np.diag(self.comoment))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            r = self.comoment / np.outer(sd, sd)
+        return pd.DataFrame(r, index=self.columns, columns=self.columns)
+
+    def pearson(self, x, y):
+        """(r, two-sided p-value), as scipy.stats.pearsonr on the full data."""
+        i, j = self.columns.index(x), self.columns.index(y)
+        r = self.comoment[i, j] / np.sqrt(self.comoment[i, i] * self.comoment[j, j])
+        r = float(np.clip(r, -1.0, 1.0))
+        dof = self.n - 2
+        if abs(r) == 1.0:
+            return r, 0.0
+        t = r * np.sqrt(dof / (1 - r ** 2))
+        return r, float(2 * stats.t.sf(abs(t), dof))
+
+
+# -------------------- TESTS FROM MOMENTS --------------------
+def anova_from_moments(moments, column):
+    """One-way ANOVA F and p-value from per-group count/mean/M2 (same as scipy.stats.f_oneway)."""
+    j = moments.columns.index(column)
+    n, mean, m2 = moments.count, moments.mean[:, j], moments.m2[:, j]
+    k, N = len(n), n.sum()
+    grand = (n * mean).sum() / N
+    ss_between = (n * (mean - grand) ** 2).sum()
+    ss_within = m2.sum()
+    F = (ss_between / (k - 1)) / (ss_within / (N - k))
+    return float(F), float(stats.f.sf(F, k - 1, N - k))
+
+
+def welch_from_moments(moments, column, first, second):
+    """Welch's t-test between two groups from their moments (same as ttest_ind(equal_var=False))."""
+    std = moments.frame("std")[column]
+    mean = moments.frame("mean")[column]
+    count = moments.counts()
+    return stats.ttest_ind_from_stats(
+        mean[first], std[first], count[first], mean[second], std[second], count[second], equal_var=False
+    )
@@ -0,0 +1,170 @@
+import os
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+# -------------------- CONFIG --------------------
+RESAMPLES = 2000
+BATCH_CELLS = 1 << 21   # resample matrix cells per batch (float64); bounds memory at ~16 MB per worker
+DISCRETE_VALUES = 64    # samples with at most this many distinct values are permuted by composition
+INLINE_CELLS = 1 << 26  # less total resampling work than this runs inline (pool startup would dominate)
+PERMUTATION = "permutation"
+BOOTSTRAP = "bootstrap"
+
+
+# -------------------- MULTIPLE TESTING --------------------
+def holm(p_values):
+    """Holm step-down adjusted p-values (family-wise error rate)."""
+    p = np.asarray(p_values, dtype=np.float64)
+    m = len(p)
+    order = np.argsort(p, kind="stable")
+    adjusted = np.empty(m)
+    adjusted[order] = np.minimum(np.maximum.accumulate((m - np.arange(m)) * p[order]), 1.0)
+    return adjusted
+
+
+def benjamini_hochberg(p_values):
+    """Benjamini-Hochberg adjusted p-values (false discovery rate)."""
+    p = np.asarray(p_values, dtype=np.float64)
+    m = len(p)
+    order = np.argsort(p, kind="stable")[::-1]
+    rank = m - np.arange(m)
+    adjusted = np.empty(m)
+    adjusted[order] = np.minimum(np.minimum.accumulate(p[order] * m / rank), 1.0)
+    return adjusted
+
+
+# -------------------- RESAMPLING --------------------
+def permutation_pvalue(first, second, n_resamples=RESAMPLES, seed=0, batch_cells=BATCH_CELLS):
+    """
+    Two-sided permutation p-value of the difference between two samples.
+
+    The statistic is the first sample's sum (a monotone function of the mean
+    difference, or of U when the samples are ranks). Each batch draws a
+    (batch x n) matrix of random keys, marks the n1 smallest per row with one
+    partition as the permuted first group, and gets every permuted sum from
+    one matrix-vector product. With few distinct values (lead times,
+    quantities) only the first group's composition matters, and it is drawn
+    exactly from the multivariate hypergeometric in O(distinct values).
+    """
+    rng = np.random.default_rng(seed)
+    x = np.concatenate([first, second]).astype(np.float64)
+    n, n1 = len(x), len(first)
+    center = n1 * x.mean()
+    observed = abs(x[:n1].sum() - center)
+    values, counts = np.unique(x, return_counts=True)
+
+    if _is_discrete(values):
+        batch = max(1, batch_cells // len(values))
+
+        def permuted_sums(size):
+            return rng.multivariate_hypergeometric(counts, n1, size=size) @ values
+    else:
+        batch = max(1, batch_cells // n)
+
+        def permuted_sums(size):
+            keys = rng.random((size, n))
+            threshold = np.partition(keys, n1 - 1, axis=1)[:, n1 - 1:n1]
+            return (keys <= threshold) @ x
+
+    extreme, done = 0, 0
+    while done < n_resamples:
+        size = min(batch, n_resamples - done)
+        extreme += int((np.abs(permuted_sums(size) - center) >= observed * (1 - 1e-12)).sum())
+        done += size
+    return (extreme + 1) / (n_resamples + 1)
+
+
+def bootstrap_pvalue(first, second, n_resamples=RESAMPLES, seed=0, batch_cells=BATCH_CELLS):
+    """
+    Two-sided bootstrap p-value of Welch's t. Both samples are shifted to a
+    common mean (the null) and resampled with replacement, a (batch x n)
+    index matrix per sample at a time.
+    """
+    rng = np.random.default_rng(seed)
+    a = np.asarray(first, dtype=np.float64)
+    b = np.asarray(second, dtype=np.float64)
+    n_a, n_b = len(a), len(b)
+    t_obs = abs(stats.ttest_ind(a, b, equal_var=False).statistic)
+    a0, b0 = a - a.mean(), b - b.mean()
+
+    batch = max(1, min(n_resamples, batch_cells // (n_a + n_b)))
+    extreme, done = 0, 0
+    while done < n_resamples:
+        size = min(batch, n_resamples - done)
+        ra = a0[rng.integers(0, n_a, (size, n_a))]
+        rb = b0[rng.integers(0, n_b, (size, n_b))]
+        se = np.sqrt(ra.var(axis=1, ddof=1) / n_a + rb.var(axis=1, ddof=1) / n_b)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            t = (ra.mean(axis=1) - rb.mean(axis=1)) / se
+        extreme += int((np.abs(t) >= t_obs * (1 - 1e-12)).sum())
+        done += size
+    return (extreme + 1) / (n_resamples + 1)
+
+
+RESAMPLERS = {PERMUTATION: permutation_pvalue, BOOTSTRAP: bootstrap_pvalue}
+
+
+def _is_discrete(values):
+    return len(values) <= DISCRETE_VALUES
+
+
+def _cells(method, first, second, n_resamples):
+    """Rough size of the resampling matrices for one pair."""
+    if method == PERMUTATION:
+        distinct = np.unique(np.concatenate([first, second]))
+        if _is_discrete(distinct):
+            return n_resamples * len(distinct)
+    return n_resamples * (len(first) + len(second))
+
+
+def _resample(method, first, second, n_resamples, seed):
+    return RESAMPLERS[method](first, second, n_resamples, seed)
+
+
+def resample_pairs(method, samples, n_resamples=RESAMPLES, seed=0, max_workers=None):
+    """
+    Resampled p-value for every (first, second) sample pair. Each pair gets its
+    own seed spawned from `seed`, so results do not depend on the number of
+    workers; pairs run in a spawn process pool unless the work is small or
+    there is a single worker.
+    """
+    seeds = np.random.SeedSequence(seed).spawn(len(samples))
+    max_workers = max_workers or min(len(samples), os.cpu_count() or 1)
+    work = sum(_cells(method, a, b, n_resamples) for a, b in samples)
+    if max_workers == 1 or work < INLINE_CELLS:
+        return [_resample(method, a, b, n_resamples, sd) for (a, b), sd in zip(samples, seeds)]
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp.get_context("spawn")) as pool:
+        futures = [pool.submit(_resample, method, a, b, n_resamples, sd) for (a, b), sd in zip(samples, seeds)]
+        return [f.result() for f in futures]
+
+
+# -------------------- ALL PAIRS --------------------
+def pair_table(labels, statistics, p_values, samples, alpha=0.05, method=None, n_resamples=RESAMPLES,
+               seed=0, max_workers=None, statistic="Statistic"):
+    """
+    One row per pair: its test statistic and p-value, the optional resampled
+    p-value, and Holm / Benjamini-Hochberg adjusted p-values with decisions.
+    Corrections apply to the resampled p-values when they are computed.
+    """
+    table = pd.DataFrame({
+        "Group A": [a for a, _ in labels],
+        "Group B": [b for _, b in labels],
+        "n A": [len(a) for a, _ in samples],
+        "n B": [len(b) for _, b in samples],
+        statistic: statistics,
+        "P-value": p_values,
+    })
+    primary = "P-value"
+    if method:
+        primary = f"{method.capitalize()} P-value"
+        table[primary] = resample_pairs(method, samples, n_resamples, seed, max_workers)
+    table["Holm P-value"] = holm(table[primary])
+    table["BH P-value"] = benjamini_hochberg(table[primary])
+    table["Reject H₀ (Holm)"] = table["Holm P-value"] < alpha
+    table["Reject H₀ (BH)"] = table["BH P-value"] < alpha
+    return table
+
@@ -0,0 +1,71 @@
+import numpy as np
+import streamlit as st
+from sklearn.cluster import MiniBatchKMeans
+
+from datastore import dataset_fingerprint, DATA_PATH
+from ingestion import load_stats
+from instrumentation import timed
+
+# -------------------- CONFIG --------------------
+N_SEGMENTS = 4
+SEGMENT_OPTIONS = range(2, 9)
+BATCH_SIZE = 4096        # rows per MiniBatchKMeans step; memory stays flat however many customers there are
+N_INIT = 3
+FEATURES = ["Recency", "Frequency", "Monetary", "Return Rate"]
+LOG_FEATURES = ["Frequency", "Monetary"]  # heavy-tailed: clustered on a log scale
+# Value score of a segment centre (standardised units): frequent, high-spend and recent ranks first
+VALUE_WEIGHTS = {"Recency": -1.0, "Frequency": 1.0, "Monetary": 1.0, "Return Rate": 0.0}
+
+
+# -------------------- FEATURES --------------------
+def feature_matrix(rfm):
+    """Standardised (n, features) float matrix of the RFM frame, log1p on the heavy-tailed columns."""
+    X = rfm[FEATURES].to_numpy(np.float64, copy=True)
+    for j, feature in enumerate(FEATURES):
+        if feature in LOG_FEATURES:
+            X[:, j] = np.log1p(np.maximum(X[:, j], 0))
+    X = np.nan_to_num(X)
+    std = X.std(axis=0)
+    return (X - X.mean(axis=0)) / np.where(std > 0, std, 1.0)
+
+
+# -------------------- CLUSTERING --------------------
+@timed()
+def segment(rfm, n_segments=N_SEGMENTS, seed=0, batch_size=BATCH_SIZE):
+    """
+    RFM frame with a "Segment" column from MiniBatchKMeans on the standardised
+    features. Segments are renumbered by the value score of their centres, so
+    Segment 1 is always the most valuable and labels are stable across runs.
+    """
+    X = feature_matrix(rfm)
+    n_segments = max(1, min(n_segments, len(X)))
+    model = MiniBatchKMeans(
+        n_clusters=n_segments, batch_size=batch_size, n_init=N_INIT, random_state=seed
+    ).fit(X)
+    score = model.cluster_centers_ @ np.array([VALUE_WEIGHTS[f] for f in FEATURES])
+    rank = np.empty(n_segments, dtype=np.int64)
+    rank[np.argsort(-score, kind="stable")] = np.arange(1, n_segments + 1)
+    return rfm.assign(Segment=rank[model.labels_])
+
+
+def segment_summary(assignments):
+    """Size and mean RFM features per segment."""
+    grouped = assignments.groupby("Segment")
+    summary = grouped[FEATURES].mean()
+    summary.insert(0, "Members", grouped.size())
+    summary.insert(1, "Share", summary["Members"] / summary["Members"].sum())
+    return summary
+
+
+# -------------------- SHARED ASSIGNMENTS --------------------
+@st.cache_data(show_spinner="Segmenting...")
+def _cached_segments(path, fingerprint, key, n_segments, seed):
+    return segment(load_stats(path).rfm(key), n_segments, seed)
+
+
+def load_segments(key="Customer ID", n_segments=N_SEGMENTS, seed=0, path=DATA_PATH):
+    """
+    Segment assignments per customer (or SKU), cached by dataset version so
+    every page reads the same clustering without recomputing it.
+    """
+    return _cached_segments(path, dataset_fingerprint(path), key, n_segments, seed)
@@ -0,0 +1,247 @@
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+# -------------------- CONFIG --------------------
+REL_ERROR = 0.005   # quantiles within +/-0.5% of the true value
+MIN_VALUE = 1e-9    # smaller magnitudes fall in the zero bucket
+
+
+# -------------------- BUCKET STORE --------------------
+class _BucketStore:
+    """Dense int64 counts over a contiguous key range that grows as keys arrive."""
+
+    def __init__(self):
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def _extend(self, lo, hi):
+        if not self.counts.size:
+            self.offset, self.counts = lo, np.zeros(hi - lo + 1, dtype=np.int64)
+            return
+        new_lo, new_hi = min(lo, self.offset), max(hi, self.offset + len(self.counts) - 1)
+        if new_lo < self.offset or new_hi >= self.offset + len(self.counts):
+            grown = np.zeros(new_hi - new_lo + 1, dtype=np.int64)
+            grown[self.offset - new_lo:self.offset - new_lo + len(self.counts)] = self.counts
+            self.offset, self.counts = new_lo, grown
+
+    def add(self, keys):
+        if not len(keys):
+            return
+        self._extend(int(keys.min()), int(keys.max()))
+        self.counts += np.bincount(keys - self.offset, minlength=len(self.counts))
+
+    def merge(self, other):
+        if other.counts.size:
+            self._extend(other.offset, other.offset + len(other.counts) - 1)
+            start = other.offset - self.offset
+            self.counts[start:start + len(other.counts)] += other.counts
+
+    def items(self):
+        nonzero = np.flatnonzero(self.counts)
+        return nonzero + self.offset, self.counts[nonzero]
+
+
+# -------------------- QUANTILE SKETCH --------------------
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with relative-error buckets (DDSketch).
+
+    A value x > 0 falls in bucket k = ceil(log_gamma(x)), i.e. (gamma^(k-1),
+    gamma^k] with gamma = (1 + a) / (1 - a); negatives mirror this and tiny
+    magnitudes share a zero bucket. Any quantile is returned within relative
+    error a of a true value at that rank, buckets from different partitions
+    add up exactly, and memory is a few thousand counts whatever the row
+    count. Exact count, mean and M2 ride along for tests that need moments.
+    """
+
+    def __init__(self, rel_error=REL_ERROR):
+        self.rel_error = rel_error
+        self.gamma = (1 + rel_error) / (1 - rel_error)
+        self._log_gamma = np.log(self.gamma)
+        # Ordinal shift that keeps every bucket above MIN_VALUE positive
+        self._shift = int(np.ceil(-np.log(MIN_VALUE) / self._log_gamma)) + 1
+        self._positive = _BucketStore()
+        self._negative = _BucketStore()
+        self.zero = 0
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def _keys(self, magnitudes):
+        return np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+
+    def _merge_moments(self, n_b, mean_b, m2_b, min_b, max_b):
+        n = self.count + n_b
+        delta = mean_b - self.mean
+        self.m2 += m2_b + delta ** 2 * self.count * n_b / n
+        self.mean += delta * n_b / n
+        self.count = n
+        self.min, self.max = min(self.min, min_b), max(self.max, max_b)
+
+    def update(self, values):
+        x = np.asarray(values, dtype=np.float64)
+        x = x[~np.isnan(x)]
+        if not len(x):
+            return self
+        positive, negative = x > MIN_VALUE, x < -MIN_VALUE
+        self._positive.add(self._keys(x[positive]))
+        self._negative.add(self._keys(-x[negative]))
+        self.zero += int(len(x) - positive.sum() - negative.sum())
+        self._merge_moments(len(x), x.mean(), ((x - x.mean()) ** 2).sum(), x.min(), x.max())
+        return self
+
+    def merge(self, other):
+        if other.rel_error != self.rel_error:
+            raise ValueError("Only sketches with the same relative error can be merged.")
+        if other.count:
+            self._positive.merge(other._positive)
+            self._negative.merge(other._negative)
+            self.zero += other.zero
+            self._merge_moments(other.count, other.mean, other.m2, other.min, other.max)
+        return self
+
+    @property
+    def std(self):
+        return np.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.nan
+
+    # ---------- Buckets ----------
+    def histogram(self):
+        """(ordinals, counts) of non-empty buckets; ordinals sort like the values they hold."""
+        pos_keys, pos_counts = self._positive.items()
+        neg_keys, neg_counts = self._negative.items()
+        ordinals = [-(neg_keys[::-1] + self._shift), [0] if self.zero else [], pos_keys + self._shift]
+        counts = [neg_counts[::-1], [self.zero] if self.zero else [], pos_counts]
+        return np.concatenate(ordinals).astype(np.int64), np.concatenate(counts).astype(np.int64)
+
+    def bounds(self, ordinals):
+        """Lower and upper value of each bucket ordinal."""
+        ordinals = np.asarray(ordinals, dtype=np.int64)
+        magnitude_hi = self.gamma ** (np.abs(ordinals) - self._shift).astype(np.float64)
+        magnitude_lo = magnitude_hi / self.gamma
+        lower = np.where(ordinals > 0, magnitude_lo, np.where(ordinals < 0, -magnitude_hi, -MIN_VALUE))
+        upper = np.where(ordinals > 0, magnitude_hi, np.where(ordinals < 0, -magnitude_lo, MIN_VALUE))
+        return np.maximum(lower, self.min), np.minimum(upper, self.max)
+
+    def representative(self, ordinals):
+        """Value reported for a bucket: within rel_error of anything in it."""
+        ordinals = np.asarray(ordinals, dtype=np.int64)
+        magnitude = 2 * self.gamma ** (np.abs(ordinals) - self._shift).astype(np.float64) / (self.gamma + 1)
+        return np.clip(np.sign(ordinals) * magnitude, self.min, self.max)
+
+    def quantile(self, q):
+        """Value at quantile q (scalar or array), within rel_error of the exact (lower) quantile."""
+        ordinals, counts = self.histogram()
+        if not len(counts):
+            return np.full(np.shape(q), np.nan)
+        rank = np.asarray(q, dtype=np.float64) * (self.count - 1)
+        position = np.searchsorted(np.cumsum(counts), rank, side="right")
+        return self.representative(ordinals[np.minimum(position, len(ordinals) - 1)])
+
+    def median(self):
+        return float(self.quantile(0.5))
+
+
+class GroupedSketch:
+    """One QuantileSketch of a value column per group, updated batch by batch and mergeable."""
+
+    def __init__(self, key, column, rel_error=REL_ERROR):
+        self.key = key
+        self.column = column
+        self.rel_error = rel_error
+        self.sketches = {}
+
+    def _sketch(self, label):
+        if label not in self.sketches:
+            self.sketches[label] = QuantileSketch(self.rel_error)
+        return self.sketches[label]
+
+    def update(self, df):
+        for label, values in df.groupby(self.key, observed=True, sort=False)[self.column]:
+            self._sketch(label).update(values.to_numpy())
+        return self
+
+    def merge(self, other):
+        for label, sketch in other.sketches.items():
+            self._sketch(label).merge(sketch)
+        return self
+
+    @property
+    def labels(self):
+        return list(self.sketches)
+
+    def quantiles(self, qs=(0.25, 0.5, 0.75)):
+        """Per-group quantiles, each within rel_error of the exact value."""
+        return pd.DataFrame(
+            [self.sketches[label].quantile(qs) for label in self.labels],
+            index=pd.Index(self.labels, name=self.key), columns=[f"q{q:g}" for q in qs]
+        )
+
+
+# -------------------- TESTS FROM SKETCHES --------------------
+def _aligned(sketches):
+    """Counts of several sketches on their common bucket grid: (ordinals, (k, buckets) counts)."""
+    histograms = [s.histogram() for s in sketches]
+    ordinals = np.unique(np.concatenate([o for o, _ in histograms]))
+    counts = np.zeros((len(sketches), len(ordinals)))
+    for i, (o, c) in enumerate(histograms):
+        counts[i, np.searchsorted(ordinals, o)] = c
+    return ordinals, counts
+
+
+def ks_normal_sketch(sketch):
+    """
+    KS statistic against a normal with the sample mean and std, from the
+    buckets: (D, p-value, bound). The empirical CDF is known exactly at bucket
+    edges, so D lies within +/-bound of the reported value; the p-value is
+    taken at the reported D.
+    """
+    ordinals, counts = sketch.histogram()
+    n = sketch.count
+    lower, upper = sketch.bounds(ordinals)
+    after = np.cumsum(counts) / n
+    before = after - counts / n
+    cdf_lo = stats.norm.cdf(lower, sketch.mean, sketch.std)
+    cdf_hi = stats.norm.cdf(upper, sketch.mean, sketch.std)
+    # At the edges the empirical CDF is exact; inside a bucket it can be anywhere between them
+    d_low = max(np.abs(after - cdf_hi).max(), np.abs(before - cdf_lo).max())
+    d_high = max((after - cdf_lo).max(), (cdf_hi - before).max(), d_low)
+    d = (d_low + d_high) / 2
+    return float(d), float(stats.kstwo.sf(d, n)), float((d_high - d_low) / 2)
+
+
+def mannwhitney_sketch(first, second):
+    """
+    Mann-Whitney U of `first` vs `second` from their buckets: (U, p-value, bound).
+    Pairs in different buckets are ordered exactly; pairs sharing a bucket
+    count 1/2, so U is within +/- half their number. The p-value uses the
+    normal approximation without tie correction (slightly conservative).
+    """
+    _, (c1, c2) = _aligned([first, second])
+    below2 = np.cumsum(c2) - c2
+    u1 = float((c1 * (below2 + 0.5 * c2)).sum())
+    bound = float(0.5 * (c1 * c2).sum())
+    n1, n2 = first.count, second.count
+    u = max(u1, n1 * n2 - u1)
+    z = (u - n1 * n2 / 2 - 0.5) / np.sqrt(n1 * n2 * (n1 + n2 + 1) / 12)
+    return u1, float(np.clip(2 * stats.norm.sf(z), 0, 1)), bound
+
+
+def kruskal_sketch(grouped):
+    """
+    Kruskal-Wallis H from per-group buckets, ranking every value at its
+    bucket's mid-rank (values sharing a bucket are treated as ties).
+    Returns (H, p-value); with REL_ERROR buckets the ranks are close but no
+    tight bound on H is available.
+    """
+    _, counts = _aligned([grouped.sketches[label] for label in grouped.labels])
+    pooled = counts.sum(axis=0)
+    N = pooled.sum()
+    mid_rank = np.cumsum(pooled) - pooled + (pooled + 1) / 2
+    r_i = counts @ mid_rank
+    n_i = counts.sum(axis=1)
+    h = 12.0 / (N * (N + 1)) * (r_i ** 2 / n_i).sum() - 3 * (N + 1)
+    h /= 1 - (pooled ** 3 - pooled).sum() / (N ** 3 - N)
+    return float(h), float(stats.chi2.sf(h, len(n_i) - 1))
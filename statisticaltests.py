@@ -1,128 +1,118 @@
 import streamlit as st
 import numpy as np
-import pandas as pd
-import scipy.stats as stats
-from sklearn.linear_model import LinearRegression
+from datastore import load_dataset, dataset_fingerprint, streaming_enabled
+from ingestion import load_stats
+from statreport import TestData, TESTS, TESTS_BY_NAME, TEST_COLUMNS, ALPHA, ALPHA_OPTIONS, run_all_tests
+from pairwise import RESAMPLES
+from sketches import REL_ERROR
+from segmentation import load_segments, segment_summary
+from instrumentation import start_page, stage
 
 # -------------------- CONFIG --------------------
 st.set_page_config(page_title="Statistical Tests", page_icon="🧮", layout="wide")
+with start_page("Statistical Tests"):
+    # -------------------- LOAD DATA --------------------
+    # Groupings, sorts and running statistics are built once per dataset version and shared by every test
+    @st.cache_resource(show_spinner="Preparing test data...")
+    def get_test_data(fingerprint, approximate=False):
+        # Only the exact rank-based tests need rows; everything else reads the running statistics and sketches
+        if approximate:
+            return TestData(None, load_stats())
+        df = load_dataset(columns=TEST_COLUMNS)
+        return TestData(df, load_stats())
 
-# -------------------- LOAD DATA --------------------
-df = pd.read_csv(
-    r"C:\Users\elroy\OneDrive\Desktop\Supplychain\ecommerce_supply_chain.csv",
-    parse_dates=["Date"]
-)
 
-# -------------------- PARAMETERS --------------------
-alpha = 0.05
+    @st.cache_data(show_spinner="Running all tests...")
+    def full_report(fingerprint, alpha, approximate):
+        return run_all_tests(get_test_data(fingerprint, approximate), alpha, approximate=approximate)
 
-# -------------------- SIDEBAR --------------------
-st.sidebar.header("Select Statistical Test")
-test_options = [
-    "Stockouts reduce sales (Pearson Correlation)",
-    "Longer lead times lower sales (Linear Regression)",
-    "Supplier revenue distribution (Kruskal-Wallis Test)",
-    "Frequent buyers generate higher revenue (Spearman Correlation)",
-    "Certain categories generate higher revenue (ANOVA)",
-    "Category vs Returns (Chi-Square Test)",
-    "Warehouse revenue difference (Mann-Whitney U Test)",
-    "Sales distribution normality (Kolmogorov–Smirnov Test)",
-    "Lead time difference between two suppliers (T-Test)"
-]
-selected_test = st.sidebar.selectbox("Choose a test to perform:", test_options)
 
-# -------------------- TEST LOGIC --------------------
+    @st.cache_data(show_spinner="Comparing all pairs...")
+    def all_pairs(fingerprint, test_name, alpha, method, n_resamples, seed):
+        return TESTS_BY_NAME[test_name].run_pairs(
+            get_test_data(fingerprint), alpha, method=method, n_resamples=n_resamples, seed=seed
+        )
 
-if selected_test == "Stockouts reduce sales (Pearson Correlation)":
-    st.title("Stockouts Reduce Sales (Pearson Correlation)")
-    pearson_corr, p_val = stats.pearsonr(df["Stock Level"], df["Sales Quantity"])
-    decision = "Reject H₀" if p_val < alpha else "Fail to Reject H₀"
-    st.write(f"Correlation Coefficient (r): {pearson_corr:.4f}")
-    st.write(f"P-value: {p_val:.4f}")
-    st.write(f"Decision: {decision}")
 
-elif selected_test == "Longer lead times lower sales (Linear Regression)":
-    st.title("Longer Lead Times Lower Sales (Linear Regression)")
-    X = df["Lead Time (days)"].values.reshape(-1, 1)
-    y = df["Sales Quantity"].values
-    model = LinearRegression().fit(X, y)
-    r_sq = model.score(X, y)
-    p_val = stats.pearsonr(df["Lead Time (days)"], df["Sales Quantity"])[1]
-    decision = "Reject H₀" if p_val < alpha else "Fail to Reject H₀"
-    st.write(f"R²: {r_sq:.4f}")
-    st.write(f"P-value: {p_val:.4f}")
-    st.write(f"Decision: {decision}")
+    # Running moments, counts and co-moments (updated in place as new days are ingested)
+    with stage("load_stats"):
+        load_stats()
+    fingerprint = dataset_fingerprint()
 
-elif selected_test == "Supplier revenue distribution (Kruskal-Wallis Test)":
-    st.title("Supplier Revenue Distribution (Kruskal-Wallis Test)")
-    groups = [df[df["Supplier"] == s]["Revenue (USD)"] for s in df["Supplier"].unique()]
-    stat, p_val = stats.kruskal(*groups)
-    decision = "Reject H₀" if p_val < alpha else "Fail to Reject H₀"
-    st.write(f"Kruskal-Wallis Statistic: {stat:.4f}")
-    st.write(f"P-value: {p_val:.4f}")
-    st.write(f"Decision: {decision}")
+    # -------------------- SIDEBAR --------------------
+    st.sidebar.header("Select Statistical Test")
+    alpha = st.sidebar.select_slider("Significance level (α)", options=ALPHA_OPTIONS, value=ALPHA)
+    # Sketches keep the rank tests memory-bounded on very large data; on by default in streaming mode
+    approximate = st.sidebar.checkbox(
+        "Approximate (sketches)", value=streaming_enabled(),
+        help=f"KS, Mann-Whitney and Kruskal-Wallis from mergeable quantile sketches (±{REL_ERROR:.1%} values)"
+    )
+    with stage("test data"):
+        test_data = get_test_data(fingerprint, approximate)
+    run_all = st.sidebar.checkbox("Run all tests", help="One report with every test below")
+    test_options = [test.name for test in TESTS]
+    selected_test = st.sidebar.selectbox("Choose a test to perform:", test_options, disabled=run_all)
 
-elif selected_test == "Frequent buyers generate higher revenue (Spearman Correlation)":
-    st.title("Frequent Buyers Generate Higher Revenue (Spearman Correlation)")
-    rfm = df.groupby("Customer ID").agg({"Customer ID": "count", "Revenue (USD)": "sum"})
-    rfm.columns = ["Frequency", "Monetary"]
-    corr, p_val = stats.spearmanr(rfm["Frequency"], rfm["Monetary"])
-    decision = "Reject H₀" if p_val < alpha else "Fail to Reject H₀"
-    st.write(f"Spearman Correlation (ρ): {corr:.4f}")
-    st.write(f"P-value: {p_val:.4f}")
-    st.write(f"Decision: {decision}")
+    # Two-group tests can compare every pair of groups instead of the first two
+    compare_pairs, method, n_resamples, seed = False, None, RESAMPLES, 0
+    if not run_all and not approximate and TESTS_BY_NAME[selected_test].pairs is not None:
+        compare_pairs = st.sidebar.checkbox("Compare all pairs", help="Every pairwise comparison, Holm / BH corrected")
+        if compare_pairs:
+            resampling = st.sidebar.radio(
+                "Resampled p-values", ["None"] + [m.capitalize() for m in TESTS_BY_NAME[selected_test].resampling],
+                horizontal=True
+            )
+            method = None if resampling == "None" else resampling.lower()
+            if method:
+                n_resamples = st.sidebar.number_input(
+                    "Resamples per pair", min_value=100, max_value=100_000, value=RESAMPLES, step=500
+                )
+                seed = st.sidebar.number_input("Random seed", min_value=0, value=0, step=1)
 
-elif selected_test == "Certain categories generate higher revenue (ANOVA)":
-    st.title("Certain Categories Generate Higher Revenue (ANOVA)")
-    groups = [df[df["Category"] == c]["Revenue (USD)"] for c in df["Category"].unique()]
-    stat, p_val = stats.f_oneway(*groups)
-    decision = "Reject H₀" if p_val < alpha else "Fail to Reject H₀"
-    st.write(f"F-Statistic: {stat:.4f}")
-    st.write(f"P-value: {p_val:.4f}")
-    st.write(f"Decision: {decision}")
-
-elif selected_test == "Category vs Returns (Chi-Square Test)":
-    st.title("Category vs Returns (Chi-Square Test)")
-    contingency_table = pd.crosstab(df["Category"], df["Return Quantity"] > 0)
-    chi2, p_val, dof, expected = stats.chi2_contingency(contingency_table)
-    decision = "Reject H₀" if p_val < alpha else "Fail to Reject H₀"
-    st.write(f"Chi-Square Statistic: {chi2:.4f}")
-    st.write(f"P-value: {p_val:.4f}")
-    st.write(f"Decision: {decision}")
-
-elif selected_test == "Warehouse revenue difference (Mann-Whitney U Test)":
-    st.title("Warehouse Revenue Difference (Mann-Whitney U Test)")
-    warehouses = df["Warehouse Location"].unique()
-    if len(warehouses) >= 2:
-        group1 = df[df["Warehouse Location"] == warehouses[0]]["Revenue (USD)"]
-        group2 = df[df["Warehouse Location"] == warehouses[1]]["Revenue (USD)"]
-        stat, p_val = stats.mannwhitneyu(group1, group2)
-        decision = "Reject H₀" if p_val < alpha else "Fail to Reject H₀"
-        st.write(f"Mann-Whitney U Statistic: {stat:.4f}")
-        st.write(f"P-value: {p_val:.4f}")
-        st.write(f"Decision: {decision}")
-    else:
-        st.write("Not enough warehouse locations for comparison.")
-
-elif selected_test == "Sales distribution normality (Kolmogorov–Smirnov Test)":
-    st.title("Sales Distribution Normality (Kolmogorov–Smirnov Test)")
-    sales = df["Sales Quantity"]
-    stat, p_val = stats.kstest(sales, 'norm', args=(sales.mean(), sales.std()))
-    decision = "Reject H₀" if p_val < alpha else "Fail to Reject H₀"
-    st.write(f"KS Statistic: {stat:.4f}")
-    st.write(f"P-value: {p_val:.4f}")
-    st.write(f"Decision: {decision}")
-
-elif selected_test == "Lead time difference between two suppliers (T-Test)":
-    st.title("Lead Time Difference Between Two Suppliers (T-Test)")
-    suppliers = df["Supplier"].unique()
-    if len(suppliers) >= 2:
-        group1 = df[df["Supplier"] == suppliers[0]]["Lead Time (days)"]
-        group2 = df[df["Supplier"] == suppliers[1]]["Lead Time (days)"]
-        stat, p_val = stats.ttest_ind(group1, group2, equal_var=False)
-        decision = "Reject H₀" if p_val < alpha else "Fail to Reject H₀"
-        st.write(f"T-Statistic: {stat:.4f}")
-        st.write(f"P-value: {p_val:.4f}")
-        st.write(f"Decision: {decision}")
+    # -------------------- TEST LOGIC --------------------
+    if run_all:
+        st.title("Statistical Test Report")
+        with stage("full report"):
+            report = full_report(fingerprint, alpha, approximate)
+        st.dataframe(report.style.format(
+            {"Value": "{:.4f}", "P-value": "{:.4f}", "Error Bound": "±{:.4g}"}, na_rep="-"
+        ))
+        rejected = (report["Decision"] == "Reject H₀").sum()
+        st.write(f"{rejected} of {len(report)} null hypotheses rejected at α = {alpha:g}")
+    elif compare_pairs:
+        test = TESTS_BY_NAME[selected_test]
+        st.title(f"{test.title}: All Pairs")
+        with stage("all pairs"):
+            pairs = all_pairs(fingerprint, selected_test, alpha, method, int(n_resamples), int(seed))
+        p_columns = [c for c in pairs.columns if c.endswith("P-value")]
+        st.dataframe(pairs.style.format({test.statistic: "{:.4f}", **{c: "{:.4f}" for c in p_columns}}))
+        st.write(
+            f"{pairs['Reject H₀ (Holm)'].sum()} of {len(pairs)} pairs differ at α = {alpha:g} after Holm correction, "
+            f"{pairs['Reject H₀ (BH)'].sum()} after Benjamini-Hochberg"
+        )
     else:
-        st.write("Not enough suppliers for comparison.")
+        test = TESTS_BY_NAME[selected_test]
+        st.title(test.title)
+        result = test.run(test_data, alpha, approximate)
+        if np.isnan(result["P-value"]):
+            st.write(result["Decision"])
+        else:
+            st.write(f"{test.statistic}: {result['Value']:.4f}")
+            st.write(f"P-value: {result['P-value']:.4f}")
+            st.write(f"Decision: {result['Decision']}")
+        if approximate and test.approx is not None:
+            bound = result["Error Bound"]
+            st.caption(
+                f"Approximate: statistic within ±{bound:.4g} of the exact value" if not np.isnan(bound)
+                else "Approximate: ranks resolved to sketch buckets (no bound on the statistic)"
+            )
+            if test.groups:
+                quantiles = getattr(test_data.dataset_stats, test.groups).quantiles()
+                st.markdown(f"Group quartiles (each within ±{REL_ERROR:.1%})")
+                st.dataframe(quantiles)
+        if "Spearman" in test.name:
+            # Same cached assignments as the segmentation page
+            st.markdown("Frequency and revenue by RFM segment")
+            with stage("segments"):
+                summary = segment_summary(load_segments())
+            st.dataframe(summary.style.format(precision=2, thousands=","))
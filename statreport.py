@@ -0,0 +1,375 @@
+import os
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from onlinestats import anova_from_moments, welch_from_moments
+from pairwise import pair_table, PERMUTATION, BOOTSTRAP
+from sketches import ks_normal_sketch, mannwhitney_sketch, kruskal_sketch
+from instrumentation import timed, stage
+
+# -------------------- CONFIG --------------------
+ALPHA = 0.05
+ALPHA_OPTIONS = [0.01, 0.05, 0.10]
+TEST_COLUMNS = ["Supplier", "Warehouse Location", "Revenue (USD)", "Sales Quantity", "Lead Time (days)"]
+SMALL_SAMPLE = 8  # Mann-Whitney samples this small go to scipy (exact distribution)
+
+
+# -------------------- SHARED SORTS --------------------
+def tied_ranks(sorted_values):
+    """1-based average ranks of an already sorted array, and the tie term sum(t^3 - t)."""
+    n = len(sorted_values)
+    if n == 0:
+        return np.zeros(0), 0.0
+    starts = np.flatnonzero(np.r_[True, sorted_values[1:] != sorted_values[:-1]])
+    ties = np.diff(np.r_[starts, n])
+    ranks = np.repeat(starts + (ties + 1) / 2, ties)
+    return ranks, float((ties.astype(np.float64) ** 3 - ties).sum())
+
+
+class RankedColumn:
+    """
+    One argsort of a numeric column, shared by every rank test on it.
+
+    Ranks within any subset of rows (one grouping, one pair of groups) are
+    read off the shared order in O(n) instead of sorting again.
+    """
+
+    def __init__(self, values):
+        self.values = np.asarray(values, dtype=np.float64)
+        self.valid = ~np.isnan(self.values)
+        self.order = np.argsort(self.values, kind="stable")   # NaNs sort last
+        self.sorted = self.values[self.order]
+
+    def __len__(self):
+        return len(self.values)
+
+    def subset(self, mask):
+        """(rows, ranks, tie term) of the valid rows in mask; rows are in value order."""
+        keep = (mask & self.valid)[self.order]
+        ranks, tie_term = tied_ranks(self.sorted[keep])
+        return self.order[keep], ranks, tie_term
+
+    def ranks(self):
+        """Average ranks of the whole column in row order (NaN where the value is missing)."""
+        rows, ranks, _ = self.subset(np.ones(len(self), dtype=bool))
+        out = np.full(len(self), np.nan)
+        out[rows] = ranks
+        return out
+
+
+class GroupPartition:
+    """
+    Rows of one grouping built once: integer codes (first-appearance order),
+    labels and sizes, plus a stable sort by code so each group's rows are one
+    contiguous slice. Tests index these arrays instead of masking per group.
+    """
+
+    def __init__(self, keys):
+        codes, labels = pd.factorize(pd.Series(keys), sort=False)
+        self.codes = codes.astype(np.int64)
+        self.labels = list(labels)
+        self.sizes = np.bincount(self.codes[self.codes >= 0], minlength=len(self.labels))
+        # Small integer codes sort stably with a linear-time radix sort
+        small = np.int16 if len(self.labels) < np.iinfo(np.int16).max else np.int64
+        order = np.argsort(self.codes.astype(small), kind="stable")
+        self.order = order[self.codes[order] >= 0]
+        self.offsets = np.concatenate([[0], np.cumsum(self.sizes)])
+
+    def __len__(self):
+        return len(self.labels)
+
+    def code(self, label):
+        return self.labels.index(label)
+
+    def rows(self, label):
+        j = self.code(label)
+        return self.order[self.offsets[j]:self.offsets[j + 1]]
+
+    def groups(self, values):
+        """Per-group value arrays, in label order."""
+        values = np.asarray(values)[self.order]
+        return [values[self.offsets[j]:self.offsets[j + 1]] for j in range(len(self))]
+
+
+# -------------------- TESTS FROM SHARED ARRAYS --------------------
+def kruskal_from_ranks(partition, ranked):
+    """Kruskal-Wallis H and p-value (same as scipy.stats.kruskal on the groups)."""
+    rows, ranks, tie_term = ranked.subset(partition.codes >= 0)
+    n_i = np.bincount(partition.codes[rows], minlength=len(partition)).astype(np.float64)
+    r_i = np.bincount(partition.codes[rows], weights=ranks, minlength=len(partition))
+    present = n_i > 0
+    N = n_i.sum()
+    h = 12.0 / (N * (N + 1)) * (r_i[present] ** 2 / n_i[present]).sum() - 3 * (N + 1)
+    h /= 1 - tie_term / (N ** 3 - N)
+    return float(h), float(stats.chi2.sf(h, present.sum() - 1))
+
+
+def pair_ranks(partition, ranked, first, second):
+    """Rows and ranks of two groups within their pooled sample, and its tie term."""
+    a, b = partition.code(first), partition.code(second)
+    rows, ranks, tie_term = ranked.subset(np.isin(partition.codes, [a, b]))
+    in_first = partition.codes[rows] == a
+    return (rows[in_first], rows[~in_first]), (ranks[in_first], ranks[~in_first]), tie_term
+
+
+def mannwhitney_from_ranks(partition, ranked, first, second):
+    """
+    Two-sided Mann-Whitney U (statistic for `first`) and p-value, as
+    scipy.stats.mannwhitneyu with its defaults: normal approximation with
+    tie and continuity correction, exact for small tie-free samples.
+    """
+    return _mannwhitney(ranked, *pair_ranks(partition, ranked, first, second))
+
+
+def _mannwhitney(ranked, rows, ranks, tie_term):
+    n1, n2 = len(ranks[0]), len(ranks[1])
+    if min(n1, n2) <= SMALL_SAMPLE and tie_term == 0:
+        return stats.mannwhitneyu(ranked.values[rows[0]], ranked.values[rows[1]])
+    n = n1 + n2
+    u1 = ranks[0].sum() - n1 * (n1 + 1) / 2
+    u = max(u1, n1 * n2 - u1)
+    sigma = np.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1))))
+    z = (u - n1 * n2 / 2 - 0.5) / sigma
+    return float(u1), float(np.clip(2 * stats.norm.sf(z), 0, 1))
+
+
+def spearman(x, y):
+    """
+    Spearman rho and two-sided p-value of two RankedColumns over the same rows
+    (same as scipy.stats.spearmanr on the two value arrays).
+    """
+    rank_x, rank_y = x.ranks(), y.ranks()
+    r = float(np.corrcoef(rank_x, rank_y)[0, 1])
+    dof = len(rank_x) - 2
+    if abs(r) == 1.0:
+        return r, 0.0
+    t = r * np.sqrt(dof / (1 - r ** 2))
+    return r, float(2 * stats.t.sf(abs(t), dof))
+
+
+def ks_normal(ranked):
+    """
+    KS test of a column against a normal with its own mean and std (same as
+    scipy.stats.kstest), read off the shared sorted values without sorting again.
+    """
+    values = ranked.sorted[ranked.valid[ranked.order]]
+    n = len(values)
+    cdf = stats.norm.cdf(values, values.mean(), values.std(ddof=1))
+    d_plus = (np.arange(1, n + 1) / n - cdf).max()
+    d_minus = (cdf - np.arange(n) / n).max()
+    d = float(max(d_plus, d_minus))
+    return d, float(stats.kstwo.sf(d, n))
+
+
+# -------------------- ALL PAIRS --------------------
+def mannwhitney_pairs(partition, ranked, **options):
+    """Mann-Whitney U for every pair of groups; permutations shuffle the pair's shared ranks."""
+    labels, statistics, p_values, samples = [], [], [], []
+    for first, second in itertools.combinations(partition.labels, 2):
+        rows, ranks, tie_term = pair_ranks(partition, ranked, first, second)
+        u1, p_val = _mannwhitney(ranked, rows, ranks, tie_term)
+        labels.append((first, second))
+        statistics.append(float(u1))
+        p_values.append(float(p_val))
+        samples.append(ranks)
+    return pair_table(labels, statistics, p_values, samples, statistic="Mann-Whitney U Statistic", **options)
+
+
+def welch_pairs(partition, values, **options):
+    """Welch's t-test for every pair of groups, from per-group moments of the partition's slices."""
+    groups = [g[~np.isnan(g)] for g in partition.groups(np.asarray(values, dtype=np.float64))]
+    mean = np.array([g.mean() for g in groups])
+    std = np.array([g.std(ddof=1) for g in groups])
+    n = np.array([len(g) for g in groups])
+    i, j = (np.array(ix, dtype=np.int64) for ix in zip(*itertools.combinations(range(len(groups)), 2)))
+    t, p = stats.ttest_ind_from_stats(mean[i], std[i], n[i], mean[j], std[j], n[j], equal_var=False)
+    labels = [(partition.labels[a], partition.labels[b]) for a, b in zip(i, j)]
+    samples = [(groups[a], groups[b]) for a, b in zip(i, j)]
+    return pair_table(labels, t, p, samples, statistic="T-Statistic", **options)
+
+
+# -------------------- SHARED TEST DATA --------------------
+class TestData:
+    """
+    Everything the tests read, built once per dataset version: the supplier
+    and warehouse partitions, the shared sorts of revenue and sales, and the
+    running statistics (moments, counts, co-moments). Independent builds run
+    in parallel threads; argsort and factorize release the GIL.
+
+    Without rows (df=None) only the running statistics and sketches are
+    available, which is enough for every test in approximate mode.
+    """
+
+    def __init__(self, df, dataset_stats, max_workers=None):
+        self.dataset_stats = dataset_stats
+        self.has_rows = df is not None
+        if df is None:
+            return
+        with ThreadPoolExecutor(max_workers=max_workers or min(4, os.cpu_count() or 1)) as pool:
+            suppliers = pool.submit(GroupPartition, df["Supplier"])
+            warehouses = pool.submit(GroupPartition, df["Warehouse Location"])
+            revenue = pool.submit(RankedColumn, df["Revenue (USD)"])
+            sales = pool.submit(RankedColumn, df["Sales Quantity"])
+            self.suppliers = suppliers.result()
+            self.warehouses = warehouses.result()
+            self.revenue = revenue.result()
+            self.sales = sales.result()
+        self.lead_time = df["Lead Time (days)"].to_numpy(np.float64)
+
+
+# -------------------- TEST CATALOGUE --------------------
+def _pearson(data):
+    return data.dataset_stats.correlations.pearson("Stock Level", "Sales Quantity")
+
+
+def _regression(data):
+    # Simple regression: R² is the squared Pearson correlation, with the same p-value
+    r, p_val = data.dataset_stats.correlations.pearson("Lead Time (days)", "Sales Quantity")
+    return r ** 2, p_val
+
+
+def _kruskal(data):
+    return kruskal_from_ranks(data.suppliers, data.revenue)
+
+
+def _spearman(data):
+    rfm = data.dataset_stats.rfm()
+    return spearman(RankedColumn(rfm["Frequency"]), RankedColumn(rfm["Monetary"]))
+
+
+def _anova(data):
+    return anova_from_moments(data.dataset_stats.category_revenue, "Revenue (USD)")
+
+
+def _chi_square(data):
+    chi2, p_val, dof, expected = stats.chi2_contingency(data.dataset_stats.returns_table())
+    return chi2, p_val
+
+
+def _mann_whitney(data):
+    warehouses = data.warehouses.labels
+    if len(warehouses) < 2:
+        return None
+    return mannwhitney_from_ranks(data.warehouses, data.revenue, warehouses[0], warehouses[1])
+
+
+def _ks(data):
+    return ks_normal(data.sales)
+
+
+def _t_test(data):
+    suppliers = data.dataset_stats.supplier_lead_time.labels
+    if len(suppliers) < 2:
+        return None
+    return welch_from_moments(data.dataset_stats.supplier_lead_time, "Lead Time (days)", suppliers[0], suppliers[1])
+
+
+# Approximate variants: sketches only, so they never touch rows
+def _kruskal_sketch(data):
+    return kruskal_sketch(data.dataset_stats.supplier_revenue)
+
+
+def _mann_whitney_sketch(data):
+    grouped = data.dataset_stats.warehouse_revenue
+    if len(grouped.labels) < 2:
+        return None
+    return mannwhitney_sketch(grouped.sketches[grouped.labels[0]], grouped.sketches[grouped.labels[1]])
+
+
+def _ks_sketch(data):
+    return ks_normal_sketch(data.dataset_stats.sales_sketch)
+
+
+def _mann_whitney_pairs(data, **options):
+    return mannwhitney_pairs(data.warehouses, data.revenue, **options)
+
+
+def _t_test_pairs(data, **options):
+    return welch_pairs(data.suppliers, data.lead_time, **options)
+
+
+class StatTest:
+    """One entry of the page: sidebar label, page title, statistic label and how to compute it."""
+
+    def __init__(self, name, title, statistic, func, not_enough=None, pairs=None, resampling=(), approx=None,
+                 groups=None):
+        self.name = name
+        self.title = title
+        self.statistic = statistic
+        self.func = func
+        self.not_enough = not_enough  # message when the data has too few groups
+        self.pairs = pairs            # all-pairs variant, for two-group tests
+        self.resampling = resampling  # resampled p-values the all-pairs variant supports
+        self.approx = approx          # sketch-based variant for tests that otherwise need every row
+        self.groups = groups          # attribute of DatasetStats with the compared groups' sketches
+
+    def run_pairs(self, data, alpha=ALPHA, method=None, n_resamples=None, seed=0, max_workers=None):
+        """Every pairwise comparison, with Holm / BH corrections (see pairwise.pair_table)."""
+        options = {"alpha": alpha, "method": method, "seed": seed, "max_workers": max_workers}
+        if n_resamples:
+            options["n_resamples"] = n_resamples
+        return self.pairs(data, **options)
+
+    def run(self, data, alpha=ALPHA, approximate=False):
+        """
+        One report row. In approximate mode tests with a sketch variant use it
+        and the row carries an "Error Bound" on the statistic (NaN when the
+        variant has none; 0 for tests that are exact from running statistics).
+        """
+        sketched = approximate and self.approx is not None
+        with stage(f"test: {self.statistic}"):
+            result = (self.approx if sketched else self.func)(data)
+        row = {"Test": self.name, "Statistic": self.statistic}
+        if result is None:
+            row.update({"Value": np.nan, "P-value": np.nan, "Decision": self.not_enough})
+        else:
+            stat, p_val = float(result[0]), float(result[1])
+            decision = "Reject H₀" if p_val < alpha else "Fail to Reject H₀"
+            row.update({"Value": stat, "P-value": p_val, "Decision": decision})
+        if approximate:
+            bound = 0.0
+            if sketched:
+                bound = float(result[2]) if result is not None and len(result) > 2 else np.nan
+            row["Error Bound"] = bound
+        return row
+
+
+TESTS = [
+    StatTest("Stockouts reduce sales (Pearson Correlation)", "Stockouts Reduce Sales (Pearson Correlation)",
+             "Correlation Coefficient (r)", _pearson),
+    StatTest("Longer lead times lower sales (Linear Regression)", "Longer Lead Times Lower Sales (Linear Regression)",
+             "R²", _regression),
+    StatTest("Supplier revenue distribution (Kruskal-Wallis Test)",
+             "Supplier Revenue Distribution (Kruskal-Wallis Test)", "Kruskal-Wallis Statistic", _kruskal,
+             approx=_kruskal_sketch, groups="supplier_revenue"),
+    StatTest("Frequent buyers generate higher revenue (Spearman Correlation)",
+             "Frequent Buyers Generate Higher Revenue (Spearman Correlation)", "Spearman Correlation (ρ)", _spearman),
+    StatTest("Certain categories generate higher revenue (ANOVA)",
+             "Certain Categories Generate Higher Revenue (ANOVA)", "F-Statistic", _anova),
+    StatTest("Category vs Returns (Chi-Square Test)", "Category vs Returns (Chi-Square Test)",
+             "Chi-Square Statistic", _chi_square),
+    StatTest("Warehouse revenue difference (Mann-Whitney U Test)",
+             "Warehouse Revenue Difference (Mann-Whitney U Test)", "Mann-Whitney U Statistic", _mann_whitney,
+             not_enough="Not enough warehouse locations for comparison.",
+             pairs=_mann_whitney_pairs, resampling=(PERMUTATION,), approx=_mann_whitney_sketch,
+             groups="warehouse_revenue"),
+    StatTest("Sales distribution normality (Kolmogorov–Smirnov Test)",
+             "Sales Distribution Normality (Kolmogorov–Smirnov Test)", "KS Statistic", _ks, approx=_ks_sketch),
+    StatTest("Lead time difference between two suppliers (T-Test)",
+             "Lead Time Difference Between Two Suppliers (T-Test)", "T-Statistic", _t_test,
+             not_enough="Not enough suppliers for comparison.",
+             pairs=_t_test_pairs, resampling=(PERMUTATION, BOOTSTRAP)),
+]
+TESTS_BY_NAME = {test.name: test for test in TESTS}
+
+
+@timed()
+def run_all_tests(data, alpha=ALPHA, max_workers=None, approximate=False):
+    """The full report, one row per test, with the tests run in parallel threads over the shared arrays."""
+    with ThreadPoolExecutor(max_workers=max_workers or min(len(TESTS), os.cpu_count() or 1)) as pool:
+        rows = list(pool.map(lambda test: test.run(data, alpha, approximate), TESTS))
+    return pd.DataFrame(rows).set_index("Test")
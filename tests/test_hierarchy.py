@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from hierarchy import (
+    Hierarchy, BottomForecast, reconcile_forecast, BOTTOM_UP, OLS, MINT, RECONCILIATION_METHODS, TOTAL
+)
+
+N_WEEKS, SPLIT, HORIZON = 30, 24, 6
+
+
+@pytest.fixture(scope="module")
+def hierarchy():
+    skus = [f"SKU-{i}" for i in range(9)]
+    parents = {
+        "Category": pd.Series(["A", "A", "B", "B", "B", "C", "C", "C", "C"], index=skus),
+        "Supplier": pd.Series(["X", "Y", "X", "Y", "X", "Y", "X", "Y", "X"], index=skus),
+    }
+    return Hierarchy(skus, parents)
+
+
+@pytest.fixture(scope="module")
+def bottom(hierarchy):
+    rng = np.random.default_rng(0)
+    n = len(hierarchy.bottom_members)
+    actual = rng.gamma(5, 20, (n, N_WEEKS))
+    pred = actual[:, SPLIT:] * rng.uniform(0.7, 1.3, (n, N_WEEKS - SPLIT))
+    future = rng.gamma(5, 20, (n, HORIZON))
+    dates = pd.date_range("2024-01-07", periods=N_WEEKS, freq="W-SUN")
+    future_dates = pd.date_range(dates[-1] + pd.Timedelta(weeks=1), periods=HORIZON, freq="W-SUN")
+    return BottomForecast(hierarchy.bottom_members, dates, actual, SPLIT, SPLIT, pred, future, future_dates, "Test")
+
+
+def incoherent_upper(hierarchy, bottom, seed=1):
+    """Aggregate base forecasts that do not add up to the SKU forecasts."""
+    rng = np.random.default_rng(seed)
+    upper = hierarchy.upper
+    return (upper @ bottom.pred * rng.uniform(0.8, 1.2, (hierarchy.n_upper, 1)),
+            upper @ bottom.future * rng.uniform(0.8, 1.2, (hierarchy.n_upper, 1)))
+
+
+def test_summing_matrix(hierarchy):
+    bottom = np.arange(1, 10, dtype=np.float64)
+    nodes = pd.Series(hierarchy.aggregate(bottom), index=hierarchy.nodes)
+    assert nodes[(TOTAL, TOTAL)] == bottom.sum()
+    assert nodes[("Category", "A")] == 3 and nodes[("Category", "C")] == 6 + 7 + 8 + 9
+    assert nodes[("Supplier", "Y")] == 2 + 4 + 6 + 8
+    np.testing.assert_array_equal(nodes.loc["SKU"].to_numpy(), bottom)
+
+
+@pytest.mark.parametrize("method", [OLS, MINT])
+def test_reconcile_matches_dense_solution(hierarchy, method):
+    rng = np.random.default_rng(2)
+    base = rng.gamma(5, 20, (len(hierarchy.nodes), 4))
+    variances = rng.uniform(1, 50, len(hierarchy.nodes))
+    weights = np.ones(len(base)) if method == OLS else 1 / variances
+    S = hierarchy.S.toarray()
+    expected = np.linalg.solve(S.T @ (weights[:, None] * S), S.T @ (weights[:, None] * base))
+    np.testing.assert_allclose(hierarchy.reconcile(base, method, variances), expected, rtol=1e-8)
+
+
+@pytest.mark.parametrize("method", RECONCILIATION_METHODS)
+def test_coherent_base_is_unchanged(hierarchy, method):
+    bottom = np.random.default_rng(3).gamma(5, 20, (len(hierarchy.bottom_members), 3))
+    base = hierarchy.aggregate(bottom)
+    np.testing.assert_allclose(hierarchy.reconcile(base, method, np.ones(len(base))), bottom, rtol=1e-8)
+
+
+@pytest.mark.parametrize("method", RECONCILIATION_METHODS)
+def test_reconciled_forecasts_are_coherent(hierarchy, bottom, method):
+    forecast = reconcile_forecast(hierarchy, bottom, method, upper=incoherent_upper(hierarchy, bottom))
+    sku_rows = hierarchy.level_rows["SKU"]
+    for values in (forecast.pred, forecast.future):
+        np.testing.assert_allclose(hierarchy.S @ values[sku_rows], values, rtol=1e-12)
+    np.testing.assert_allclose(forecast.actual, hierarchy.S @ bottom.actual)
+    if method == BOTTOM_UP:
+        np.testing.assert_array_equal(forecast.pred[sku_rows], bottom.pred)
+    else:
+        # The aggregates' own forecasts moved the SKU forecasts
+        assert not np.allclose(forecast.pred[sku_rows], bottom.pred)
+
+
+def test_mint_needs_variances(hierarchy):
+    with pytest.raises(ValueError):
+        hierarchy.reconcile(np.ones((len(hierarchy.nodes), 1)), MINT)
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sketches import QuantileSketch, GroupedSketch, REL_ERROR
+
+QS = np.linspace(0, 1, 101)
+
+
+def lower_quantiles(values, qs):
+    """Exact value at rank floor(q * (n - 1)), the one QuantileSketch.quantile approximates."""
+    ordered = np.sort(values)
+    return ordered[np.floor(np.asarray(qs) * (len(ordered) - 1)).astype(np.int64)]
+
+
+def assert_within_rel_error(sketch, values, qs=QS):
+    exact = lower_quantiles(values, qs)
+    approx = sketch.quantile(qs)
+    assert np.all(np.abs(approx - exact) <= REL_ERROR * np.abs(exact) + 1e-12)
+
+
+@pytest.mark.parametrize("draw", [
+    lambda rng: rng.lognormal(3, 1.5, 20_000),
+    lambda rng: rng.normal(0, 50, 20_000),
+    lambda rng: np.floor(rng.gamma(2, 30, 20_000)),   # integer quantities with zeros and ties
+    lambda rng: -rng.exponential(1e4, 20_000),
+])
+def test_quantiles_within_relative_error(draw):
+    values = draw(np.random.default_rng(0))
+    assert_within_rel_error(QuantileSketch().update(values), values)
+
+
+def test_merged_partitions_match_one_sketch():
+    values = np.random.default_rng(1).lognormal(2, 1, 30_000)
+    merged = QuantileSketch()
+    for part in np.array_split(values, 7):
+        merged.merge(QuantileSketch().update(part))
+    whole = QuantileSketch().update(values)
+    np.testing.assert_array_equal(merged.quantile(QS), whole.quantile(QS))
+    assert merged.count == len(values)
+    assert merged.mean == pytest.approx(values.mean(), rel=1e-12)
+    assert merged.std == pytest.approx(values.std(ddof=1), rel=1e-9)
+    assert_within_rel_error(merged, values)
+
+
+def test_nans_are_ignored():
+    values = np.random.default_rng(2).uniform(1, 100, 1_000)
+    sketch = QuantileSketch().update(np.r_[values, np.nan, np.nan])
+    assert sketch.count == len(values)
+    assert_within_rel_error(sketch, values)
+
+
+def test_grouped_quantiles_within_relative_error():
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({"Supplier": rng.choice(["A", "B", "C"], 9_000), "Revenue (USD)": rng.lognormal(5, 1, 9_000)})
+    grouped = GroupedSketch("Supplier", "Revenue (USD)")
+    for start in range(0, len(df), 4_000):
+        grouped.update(df.iloc[start:start + 4_000])
+    quartiles = grouped.quantiles()
+    for label, values in df.groupby("Supplier")["Revenue (USD)"]:
+        exact = lower_quantiles(values.to_numpy(), (0.25, 0.5, 0.75))
+        assert np.all(np.abs(quartiles.loc[label].to_numpy() - exact) <= REL_ERROR * exact)
+        assert_within_rel_error(grouped.sketches[label], values.to_numpy())
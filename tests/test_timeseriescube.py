@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from datagenerator import Catalog, generate_days
+from datastore import load_dataset, append_partition, list_partitions, dataset_fingerprint
+from timeseriescube import build_cube, CUBE_LEVELS, SUM_MEASURES, MEAN_MEASURES, PARENT_LEVELS
+
+
+@pytest.fixture(scope="module")
+def rows():
+    catalog = Catalog(n_skus=12, n_customers=6, n_warehouses=3, seed=1)
+    return generate_days(catalog, 0, 40, seed=1)
+
+
+def assert_same_cube(cube, expected):
+    for level in CUBE_LEVELS:
+        for freq in ("daily", "weekly"):
+            got, want = getattr(cube, freq)(level), getattr(expected, freq)(level)
+            assert got.dates.equals(want.dates), (level, freq)
+            members = np.sort(want.members)
+            assert sorted(got.members) == list(members), (level, freq)
+            counts = pd.DataFrame(got.counts, columns=got.members)[members]
+            np.testing.assert_array_equal(counts, pd.DataFrame(want.counts, columns=want.members)[members])
+            for measure in SUM_MEASURES + MEAN_MEASURES:
+                np.testing.assert_allclose(
+                    got.frame(measure)[members], want.frame(measure)[members], rtol=1e-12, err_msg=f"{level} {measure}"
+                )
+    for level in PARENT_LEVELS:
+        pd.testing.assert_series_equal(cube.parent_map(level).sort_index(), expected.parent_map(level).sort_index())
+
+
+def test_append_days_equals_rebuild(rows):
+    # Cut mid-week so the appended rows land in an already published week
+    cut = rows["Date"].min() + pd.Timedelta(days=23)
+    cube = build_cube(rows[rows["Date"] < cut])
+    cube.append(rows[rows["Date"] >= cut])
+    assert_same_cube(cube, build_cube(rows))
+
+
+def test_append_in_several_steps_with_new_skus(rows):
+    dates = rows["Date"].drop_duplicates().sort_values()
+    late_skus = rows["SKU"].cat.categories[-3:]
+    # Three SKUs start selling after the initial build
+    first = rows[(rows["Date"] < dates.iloc[10]) & ~rows["SKU"].isin(late_skus)].copy()
+    first["SKU"] = first["SKU"].cat.remove_unused_categories()
+    rest = rows.drop(first.index)
+    cube = build_cube(first)
+    snapshot = cube.daily("SKU").sums["Sales Quantity"].copy()
+    for day_block in np.array_split(dates[dates >= dates.iloc[10]].to_numpy(), 4):
+        cube.append(rest[rest["Date"].isin(day_block)])
+    # Late rows for days already in the cube: the back-filled SKUs
+    cube.append(rest[rest["Date"] < dates.iloc[10]])
+    assert_same_cube(cube, build_cube(rows))
+    # Arrays handed out before the appends are unchanged
+    np.testing.assert_array_equal(snapshot, build_cube(first).daily("SKU").sums["Sales Quantity"])
+
+
+def test_append_before_start_raises(rows):
+    cube = build_cube(rows[rows["Date"] > rows["Date"].min()])
+    with pytest.raises(ValueError):
+        cube.append(rows[rows["Date"] == rows["Date"].min()])
+
+
+def test_sync_partitions_equals_rebuild(rows, tmp_path):
+    path = str(tmp_path / "sales.csv")
+    cut = rows["Date"].min() + pd.Timedelta(days=30)
+    rows[rows["Date"] < cut].to_csv(path, index=False)
+    cube = build_cube(load_dataset(path=path))
+    later = rows[rows["Date"] >= cut]
+    for day in later["Date"].drop_duplicates()[:5]:
+        append_partition(later[later["Date"] == day], path=path)
+    cube.sync(path)
+    for day in later["Date"].drop_duplicates()[5:]:
+        append_partition(later[later["Date"] == day], path=path)
+    cube.sync(path)
+    assert len(cube.applied_partitions) == len(list_partitions(path))
+    assert cube.fingerprint == dataset_fingerprint(path)
+    assert_same_cube(cube, build_cube(load_dataset(path=path)))
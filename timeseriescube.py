@@ -0,0 +1,384 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from datastore import (
+    load_dataset, iter_dataset, dataset_date_range, streaming_enabled, dataset_fingerprint, file_fingerprint,
+    list_partitions, read_partition, DATA_PATH
+)
+from instrumentation import timed
+
+# -------------------- CONFIG --------------------
+CUBE_LEVELS = ["SKU", "Category", "Supplier", "Warehouse Location", "Product_Family_Name"]
+SUM_MEASURES = ["Sales Quantity", "Revenue (USD)", "Return Quantity"]
+MEAN_MEASURES = ["Stock Level", "Discount Applied (%)", "Price_per_Unit (USD)", "Lead Time (days)"]
+DATE_COL = "Date"
+BOTTOM_LEVEL = "SKU"
+PARENT_LEVELS = ["Category", "Supplier", "Product_Family_Name"]  # each SKU rolls up into one member of each
+
+
+# -------------------- LEVEL CUBE --------------------
+class LevelCube:
+    """
+    Dense (dates x members) arrays for one level at one frequency.
+
+    Sum measures are stored as totals per cell; mean measures keep their sum
+    and the row count so roll-ups across members or dates stay exact.
+
+    The arrays are read-only views into row buffers with spare capacity. A
+    published cube never changes: TimeSeriesCube.append works on a fork(),
+    which shares the buffers when only rows past the published dates are
+    written (so appending days only writes the new rows) and copies them when
+    published rows change.
+    """
+
+    def __init__(self, level, dates, members, sums, counts):
+        self.level = level
+        self._sum_buffers = dict(sums)
+        self._count_buffer = counts
+        self._set_members(members)
+        self._publish(dates)
+
+    def _set_members(self, members):
+        self.members = np.asarray(members)
+        self.member_index = {m: i for i, m in enumerate(self.members)}
+
+    def _publish(self, dates):
+        """Expose the first len(dates) buffer rows as read-only arrays."""
+        self.dates = dates
+        n = len(dates)
+        self.sums = {m: buf[:n] for m, buf in self._sum_buffers.items()}
+        self.counts = self._count_buffer[:n]
+        for arr in list(self.sums.values()) + [self.counts]:
+            arr.setflags(write=False)
+
+    def _reserve(self, n_rows, n_members):
+        """Grow the buffers (rows doubled, new member columns zero) when they are too small."""
+        rows, cols = self._count_buffer.shape
+        if n_rows <= rows and n_members <= cols:
+            return
+        new_rows = max(n_rows, 2 * rows) if n_rows > rows else rows
+
+        def grow(buf):
+            out = np.zeros((new_rows, n_members), dtype=buf.dtype)
+            out[:rows, :cols] = buf
+            return out
+
+        self._sum_buffers = {m: grow(buf) for m, buf in self._sum_buffers.items()}
+        self._count_buffer = grow(self._count_buffer)
+
+    def fork(self, first_row):
+        """Writable copy of this cube for changes from row `first_row` on; readers of this one are unaffected."""
+        if first_row < len(self.dates):
+            sums = {m: buf.copy() for m, buf in self._sum_buffers.items()}
+            counts = self._count_buffer.copy()
+        else:
+            sums, counts = self._sum_buffers, self._count_buffer
+        return LevelCube(self.level, self.dates, self.members, sums, counts)
+
+    def member_codes(self, keys):
+        """Column of every key, adding columns for members not seen before."""
+        keys = pd.Series(keys).astype(object).to_numpy()
+        codes = pd.Index(self.members).get_indexer(keys)
+        new = pd.unique(keys[(codes < 0) & pd.notna(keys)])
+        if len(new):
+            self._reserve(len(self.dates), len(self.members) + len(new))
+            self._set_members(np.concatenate([self.members, new]))
+            codes = pd.Index(self.members).get_indexer(keys)
+        return codes
+
+    def add_rows(self, keys, date_idx, measures, dates):
+        """Add new rows (already mapped to day positions in `dates`) into the cells they fall in."""
+        codes = self.member_codes(keys)
+        valid = codes >= 0
+        self._reserve(len(dates), len(self.members))
+        if valid.any():
+            lo, hi = date_idx[valid].min(), date_idx[valid].max() + 1
+            n_members = len(self.members)
+            flat = (date_idx[valid] - lo) * n_members + codes[valid]
+            size = (hi - lo) * n_members
+            self._count_buffer[lo:hi, :n_members] += np.bincount(flat, minlength=size).reshape(hi - lo, n_members)
+            for measure, values in measures.items():
+                block = np.bincount(flat, weights=values[valid], minlength=size).reshape(hi - lo, n_members)
+                self._sum_buffers[measure][lo:hi, :n_members] += block
+        self._publish(dates)
+
+    def write_rows(self, start, dates, sums, counts):
+        """Overwrite rows from `start` on (with len(dates) - start rows) and publish `dates`."""
+        n_members = counts.shape[1]
+        self._reserve(len(dates), n_members)
+        if n_members > len(self.members):
+            raise ValueError("write_rows cannot add members; map keys with member_codes first.")
+        self._count_buffer[start:len(dates), :n_members] = counts
+        for measure, block in sums.items():
+            self._sum_buffers[measure][start:len(dates), :n_members] = block
+        self._publish(dates)
+
+    def values(self, measure):
+        if measure in MEAN_MEASURES:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                return np.where(self.counts > 0, self.sums[measure] / self.counts, np.nan)
+        return self.sums[measure]
+
+    def column(self, member):
+        return self.member_index[member]
+
+    def series(self, measure, member, trim=True):
+        """Time series for one member; trimmed to the dates where it has rows."""
+        j = self.column(member)
+        if measure in MEAN_MEASURES:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                values = self.sums[measure][:, j] / self.counts[:, j]
+        else:
+            values = self.sums[measure][:, j]
+        dates = self.dates
+        if trim:
+            active = np.flatnonzero(self.counts[:, j])
+            if active.size:
+                values = values[active[0]:active[-1] + 1]
+                dates = dates[active[0]:active[-1] + 1]
+        return pd.Series(values, index=dates, name=measure)
+
+    def frame(self, measure):
+        return pd.DataFrame(self.values(measure), index=self.dates, columns=self.members)
+
+    def totals(self, measure):
+        """Per-member total (sum measures) or overall mean (mean measures)."""
+        if measure in MEAN_MEASURES:
+            counts = self.counts.sum(axis=0)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                values = self.sums[measure].sum(axis=0) / counts
+        else:
+            values = self.sums[measure].sum(axis=0)
+        return pd.Series(values, index=pd.Index(self.members, name=self.level), name=measure)
+
+    def rollup(self, measure, members=None):
+        """Series aggregated over a subset of members (all members by default)."""
+        cols = slice(None) if members is None else [self.member_index[m] for m in members]
+        if measure in MEAN_MEASURES:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                values = self.sums[measure][:, cols].sum(axis=1) / self.counts[:, cols].sum(axis=1)
+        else:
+            values = self.sums[measure][:, cols].sum(axis=1)
+        return pd.Series(values, index=self.dates, name=measure)
+
+
+# -------------------- BUILD --------------------
+def week_bins(dates):
+    """Start offsets of each W-SUN week in a dense daily index, and the week-end labels."""
+    week_end = dates + pd.to_timedelta((6 - dates.dayofweek) % 7, unit="D")
+    starts = np.flatnonzero(np.r_[True, week_end[1:] != week_end[:-1]])
+    return starts, pd.DatetimeIndex(week_end[starts], freq="W-SUN")
+
+
+def build_level_cube(df, level, dates, date_idx):
+    col = df[level]
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        codes = col.cat.codes.to_numpy()
+        members = np.asarray(col.cat.categories)
+    else:
+        codes, members = pd.factorize(col, sort=True)
+        members = np.asarray(members)
+
+    valid = codes >= 0
+    n_dates, n_members = len(dates), len(members)
+    flat = date_idx[valid] * n_members + codes[valid]
+    size = n_dates * n_members
+
+    counts = np.bincount(flat, minlength=size).reshape(n_dates, n_members)
+    sums = {}
+    for measure in SUM_MEASURES + MEAN_MEASURES:
+        weights = df[measure].to_numpy(dtype=np.float64)[valid]
+        sums[measure] = np.bincount(flat, weights=weights, minlength=size).reshape(n_dates, n_members)
+    return LevelCube(level, dates, members, sums, counts)
+
+
+def empty_level_cube(level, dates):
+    n_dates = len(dates)
+    sums = {m: np.zeros((n_dates, 0)) for m in SUM_MEASURES + MEAN_MEASURES}
+    return LevelCube(level, dates, [], sums, np.zeros((n_dates, 0), dtype=np.int64))
+
+
+def sort_members(cube):
+    """Same cube with member columns in sorted order, as build_level_cube produces them."""
+    order = np.argsort(cube.members, kind="stable")
+    sums = {m: arr[:, order] for m, arr in cube.sums.items()}
+    return LevelCube(cube.level, cube.dates, cube.members[order], sums, cube.counts[:, order])
+
+
+def to_weekly(cube):
+    starts, week_dates = week_bins(cube.dates)
+    sums = {m: np.add.reduceat(arr, starts, axis=0) for m, arr in cube.sums.items()}
+    counts = np.add.reduceat(cube.counts, starts, axis=0)
+    return LevelCube(cube.level, week_dates, cube.members, sums, counts)
+
+
+# -------------------- HIERARCHY LINKS --------------------
+def link_counts(df, levels):
+    """Rows per (SKU, parent member) pair for every parent level present in `levels`."""
+    if BOTTOM_LEVEL not in levels:
+        return {}
+    return {
+        parent: df.groupby([BOTTOM_LEVEL, parent], observed=True, sort=False).size()
+        for parent in PARENT_LEVELS if parent in levels
+    }
+
+
+def merge_link_counts(links, new):
+    for parent, counts in new.items():
+        links[parent] = counts if parent not in links else links[parent].add(counts, fill_value=0).astype(np.int64)
+    return links
+
+
+class TimeSeriesCube:
+    """
+    Daily and weekly LevelCubes for every drill-down level, plus the SKU ->
+    parent links (row counts per pair) the hierarchical forecast sums over.
+    """
+
+    def __init__(self, daily, fingerprint=None, links=None):
+        self.fingerprint = fingerprint
+        self._daily = daily
+        self._weekly = {level: to_weekly(c) for level, c in daily.items()}
+        self.links = dict(links or {})
+        self.applied_partitions = []
+        self._lock = threading.RLock()  # sync() holds it around append()
+
+    @property
+    def levels(self):
+        return list(self._daily)
+
+    def daily(self, level):
+        return self._daily[level]
+
+    def weekly(self, level):
+        return self._weekly[level]
+
+    def parent_map(self, level):
+        """
+        Parent member of every SKU at `level`. A SKU recorded under several
+        parents is assigned to the one it has most rows with.
+        """
+        counts = self.links[level].sort_values(ascending=False, kind="stable")
+        skus = counts.index.get_level_values(0)
+        first = ~skus.duplicated()
+        return pd.Series(
+            np.asarray(counts.index.get_level_values(1)[first]),
+            index=pd.Index(np.asarray(skus[first]), name=BOTTOM_LEVEL), name=level
+        )
+
+    @property
+    def start_date(self):
+        return next(iter(self._daily.values())).dates[0]
+
+    @property
+    def end_date(self):
+        return next(iter(self._daily.values())).dates[-1]
+
+    def append(self, df):
+        """
+        Fold new rows into the cube. Only the days the rows fall on are touched in
+        the daily arrays, and only the weeks from the earliest of those days on
+        are re-aggregated, so the cost scales with the new data. The changes are
+        made on forks of the level cubes, swapped in under the lock, so arrays
+        already handed to readers never change.
+        """
+        if df.empty:
+            return
+        start = self.start_date
+        day = df[DATE_COL].dt.normalize()
+        if day.min() < start:
+            raise ValueError(f"Rows dated before the cube start ({start.date()}) cannot be appended.")
+        dates = pd.date_range(start, max(self.end_date, day.max()), freq="D")
+        date_idx = ((day - start) // pd.Timedelta(days=1)).to_numpy(dtype=np.int64)
+        measures = {m: df[m].to_numpy(dtype=np.float64) for m in SUM_MEASURES + MEAN_MEASURES}
+
+        # First day of the earliest touched week; weeks before it are unchanged
+        first = dates[date_idx.min()]
+        week_start = max(first - pd.Timedelta(days=first.dayofweek), start)  # W-SUN weeks start on Monday
+        tail_start = (week_start - start).days
+
+        starts, week_dates = week_bins(dates[tail_start:])
+        with self._lock:
+            links = merge_link_counts(dict(self.links), link_counts(df, self.levels))
+            new_daily, new_weekly = {}, {}
+            for level, daily in self._daily.items():
+                daily = daily.fork(date_idx.min())
+                daily.add_rows(df[level], date_idx, measures, dates)
+                row = self._weekly[level].dates.searchsorted(week_dates[0])
+                weekly = self._weekly[level].fork(row)
+                weekly.member_codes(daily.members)  # same member columns as the daily cube
+                tail_sums = {m: np.add.reduceat(arr[tail_start:], starts, axis=0) for m, arr in daily.sums.items()}
+                tail_counts = np.add.reduceat(daily.counts[tail_start:], starts, axis=0)
+                weekly.write_rows(row, weekly.dates[:row].append(week_dates), tail_sums, tail_counts)
+                new_daily[level], new_weekly[level] = daily, weekly
+            self._daily, self._weekly, self.links = new_daily, new_weekly, links
+
+    @timed("cube.sync")
+    def sync(self, path=DATA_PATH):
+        """Append any day partitions written since this cube was built or last synced."""
+        with self._lock:
+            columns = [DATE_COL] + CUBE_LEVELS + SUM_MEASURES + MEAN_MEASURES
+            for partition in list_partitions(path):
+                if partition not in self.applied_partitions:
+                    self.append(read_partition(partition, columns))
+                    self.applied_partitions.append(partition)
+            self.fingerprint = dataset_fingerprint(path)
+        return self
+
+
+@timed()
+def build_cube(df, levels=CUBE_LEVELS, fingerprint=None):
+    dates = pd.date_range(df[DATE_COL].min().normalize(), df[DATE_COL].max().normalize(), freq="D")
+    date_idx = ((df[DATE_COL].dt.normalize() - dates[0]) // pd.Timedelta(days=1)).to_numpy(dtype=np.int64)
+    daily = {level: build_level_cube(df, level, dates, date_idx) for level in levels}
+    return TimeSeriesCube(daily, fingerprint=fingerprint, links=link_counts(df, levels))
+
+
+@timed()
+def build_cube_chunked(chunks, start, end, levels=CUBE_LEVELS, fingerprint=None):
+    """
+    Streaming build: the same cube as build_cube on the concatenated chunks.
+
+    Each chunk's rows are added to the daily cells they fall in, in any order,
+    and the weekly cubes are aggregated once at the end, so memory is one
+    chunk plus the (dates x members) output arrays.
+    """
+    dates = pd.date_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize(), freq="D")
+    daily = {level: empty_level_cube(level, dates) for level in levels}
+    links = {}
+    for chunk in chunks:
+        merge_link_counts(links, link_counts(chunk, levels))
+        day = chunk[DATE_COL].dt.normalize()
+        date_idx = ((day - dates[0]) // pd.Timedelta(days=1)).to_numpy(dtype=np.int64)
+        measures = {m: chunk[m].to_numpy(dtype=np.float64) for m in SUM_MEASURES + MEAN_MEASURES}
+        for level, cube in daily.items():
+            cube.add_rows(chunk[level], date_idx, measures, dates)
+    for level in daily:
+        daily[level] = sort_members(daily[level])
+    return TimeSeriesCube(daily, fingerprint=fingerprint, links=links)
+
+
+@st.cache_resource(show_spinner=False)
+def _cached_cube(path, base_fingerprint):
+    columns = [DATE_COL] + CUBE_LEVELS + SUM_MEASURES + MEAN_MEASURES
+    partitions = list_partitions(path)
+    if streaming_enabled(path):
+        start, end = dataset_date_range(path, partitions)
+        chunks = iter_dataset(columns=columns, path=path, partitions=partitions)
+        cube = build_cube_chunked(chunks, start, end, fingerprint=dataset_fingerprint(path))
+    else:
+        df = load_dataset(columns=columns, path=path, partitions=partitions)
+        cube = build_cube(df, fingerprint=dataset_fingerprint(path))
+    cube.applied_partitions = list(partitions)
+    return cube
+
+
+def load_cube(path=DATA_PATH):
+    """
+    Shared cube for the current dataset. It is built once per version of the
+    base file; day partitions appended later are folded in place by sync().
+    """
+    return _cached_cube(path, file_fingerprint(path)).sync(path)
@@ -0,0 +1,176 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import timed
+
+# -------------------- CONFIG --------------------
+BASE_BATCH_SIZE = 16
+MAX_BATCH_SIZE = 512
+TARGET_STEPS_PER_EPOCH = 64
+MIN_VALIDATION_SAMPLES = 8
+
+
+class TrainingBudget:
+    """Limits for one fit: epochs, wall-clock seconds and early-stopping patience."""
+
+    def __init__(self, max_epochs=200, max_seconds=120.0, patience=20, early_stopping=True,
+                 validation_fraction=0.1, batch_size=None):
+        self.max_epochs = max_epochs
+        self.max_seconds = max_seconds
+        self.patience = patience
+        self.early_stopping = early_stopping
+        self.validation_fraction = validation_fraction
+        self.batch_size = batch_size  # None -> adaptive_batch_size
+
+
+def adaptive_batch_size(n_samples, base=BASE_BATCH_SIZE, target_steps=TARGET_STEPS_PER_EPOCH,
+                        max_batch=MAX_BATCH_SIZE):
+    """Keep the page's batch of 16 for short series, grow by powers of two for long ones."""
+    if n_samples <= base * target_steps:
+        return base
+    return int(min(max_batch, 2 ** np.ceil(np.log2(n_samples / target_steps))))
+
+
+# -------------------- TELEMETRY --------------------
+# Epoch hooks are plain objects with optional on_train_begin / on_epoch_begin /
+# on_epoch_end methods and a stop_training flag. They never touch Keras, so they
+# pickle with job results and load in a page that has not imported TensorFlow;
+# keras_callback() adapts them for model.fit().
+class TrainingTelemetry:
+    """Per-epoch loss/time log that also enforces the wall-clock budget."""
+
+    def __init__(self, max_seconds=None):
+        self.max_seconds = max_seconds
+        self.records = []
+        self.stop_reason = "epoch budget"
+        self.batch_size = None
+        self.n_train = 0
+        self.n_val = 0
+        self.stop_training = False
+        self._start = None
+        self._epoch_start = None
+
+    def on_train_begin(self, logs=None):
+        self._start = time.perf_counter()
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._epoch_start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        now = time.perf_counter()
+        logs = logs or {}
+        self.records.append({
+            "epoch": epoch + 1,
+            "loss": float(logs.get("loss", np.nan)),
+            "val_loss": float(logs.get("val_loss", np.nan)),
+            "seconds": now - self._epoch_start,
+        })
+        if self.max_seconds is not None and now - self._start >= self.max_seconds:
+            self.stop_reason = "time budget"
+            self.stop_training = True
+
+    @property
+    def epochs_run(self):
+        return len(self.records)
+
+    @property
+    def total_seconds(self):
+        return float(sum(r["seconds"] for r in self.records))
+
+    def to_frame(self):
+        return pd.DataFrame(self.records, columns=["epoch", "loss", "val_loss", "seconds"]).set_index("epoch")
+
+    @property
+    def validated(self):
+        return self.n_val > 0
+
+    def summary(self):
+        validation = f"{self.n_val} validation windows" if self.validated else "validation off: too few windows"
+        return (
+            f"{self.epochs_run} epochs in {self.total_seconds:.1f}s "
+            f"(batch size {self.batch_size}, {self.n_train} train windows, {validation}), "
+            f"stopped by {self.stop_reason}"
+        )
+
+
+def keras_callback(hooks):
+    """One Keras Callback forwarding epoch events to `hooks`; imports Keras on first use."""
+    from keras.callbacks import Callback
+
+    class EpochHooks(Callback):
+        def _forward(self, event, *args):
+            for hook in hooks:
+                method = getattr(hook, event, None)
+                if method is not None:
+                    method(*args)
+            if any(getattr(hook, "stop_training", False) for hook in hooks):
+                self.model.stop_training = True
+
+        def on_train_begin(self, logs=None):
+            self._forward("on_train_begin", logs)
+
+        def on_epoch_begin(self, epoch, logs=None):
+            self._forward("on_epoch_begin", epoch, logs)
+
+        def on_epoch_end(self, epoch, logs=None):
+            self._forward("on_epoch_end", epoch, logs)
+
+    return EpochHooks()
+
+
+# -------------------- CONTROLLER --------------------
+def split_validation(inputs, y, fraction):
+    """
+    Hold out the trailing windows (the most recent ones for a single series):
+    the fraction, but at least MIN_VALIDATION_SAMPLES, as long as as many
+    training windows remain. Otherwise there is no validation set.
+    """
+    n = len(y)
+    n_val = max(int(np.ceil(n * fraction)), MIN_VALIDATION_SAMPLES)
+    if fraction <= 0 or n - n_val < MIN_VALIDATION_SAMPLES:
+        return inputs, y, None
+
+    def head(a):
+        return [x[:n - n_val] for x in a] if isinstance(a, list) else a[:n - n_val]
+
+    def tail(a):
+        return [x[n - n_val:] for x in a] if isinstance(a, list) else a[n - n_val:]
+
+    return head(inputs), y[:n - n_val], (tail(inputs), y[n - n_val:])
+
+
+@timed("fit")
+def train_with_budget(model, inputs, y, budget=None, callbacks=()):
+    """
+    Fit with validation-based early stopping, epoch and wall-clock limits and an
+    adaptive batch size. Extra epoch hooks (e.g. job progress) run alongside.
+    Returns the TrainingTelemetry for display.
+    """
+    from keras.callbacks import EarlyStopping
+
+    budget = budget or TrainingBudget()
+    train_inputs, train_y, validation = split_validation(inputs, y, budget.validation_fraction)
+
+    telemetry = TrainingTelemetry(max_seconds=budget.max_seconds)
+    telemetry.batch_size = budget.batch_size or adaptive_batch_size(len(train_y))
+    telemetry.n_train = len(train_y)
+    telemetry.n_val = 0 if validation is None else len(validation[1])
+
+    callbacks = [keras_callback([telemetry, *callbacks])]
+    early_stopping = None
+    if budget.early_stopping:
+        early_stopping = EarlyStopping(
+            monitor="val_loss" if validation is not None else "loss",
+            patience=budget.patience, restore_best_weights=True
+        )
+        callbacks.append(early_stopping)
+
+    model.fit(
+        train_inputs, train_y, validation_data=validation, epochs=budget.max_epochs,
+        batch_size=telemetry.batch_size, callbacks=callbacks, verbose=0
+    )
+    if early_stopping is not None and early_stopping.stopped_epoch > 0 and telemetry.stop_reason != "time budget":
+        telemetry.stop_reason = "early stopping"
+    return telemetry
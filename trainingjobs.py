@@ -0,0 +1,219 @@
+import os
+import json
+import time
+import uuid
+import pickle
+import threading
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+from datastore import DATA_PATH
+
+# -------------------- CONFIG --------------------
+JOBS_DIR_NAME = ".scm_jobs"
+MAX_WORKERS = 2
+MAX_PENDING = 8  # queued + running jobs accepted before submit() refuses
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+LOST = "lost"  # still active on disk but no worker in this process owns it (server restarted)
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+
+def default_jobs_dir(path=DATA_PATH):
+    return os.environ.get(
+        "SCM_JOBS_DIR", os.path.join(os.path.dirname(os.path.abspath(path)), JOBS_DIR_NAME)
+    )
+
+
+class QueueFull(RuntimeError):
+    pass
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def _write_json(path, payload):
+    with open(path + ".tmp", "w") as fh:
+        json.dump(payload, fh, indent=2, default=str)
+    os.replace(path + ".tmp", path)
+
+
+def _read_json(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as fh:
+        return json.load(fh)
+
+
+# -------------------- WORKER SIDE --------------------
+class JobContext:
+    """Handle passed to the job function: progress reporting and cancellation checks."""
+
+    def __init__(self, job_dir):
+        self.job_dir = job_dir
+
+    def progress(self, fraction, message=""):
+        _write_json(os.path.join(self.job_dir, "progress.json"), {
+            "fraction": float(min(max(fraction, 0.0), 1.0)),
+            "message": message,
+            "updated_at": time.time(),
+        })
+
+    def cancelled(self):
+        return os.path.exists(os.path.join(self.job_dir, "cancel"))
+
+    def check_cancelled(self):
+        if self.cancelled():
+            raise JobCancelled()
+
+    def epoch_callback(self, max_epochs, start=0.1, end=0.9):
+        return JobProgressCallback(self, max_epochs, start, end)
+
+
+class JobProgressCallback:
+    """
+    Epoch hook (see trainingcontrol.keras_callback) mapping epochs onto the job's
+    progress bar and aborting fit() once cancel is requested.
+    """
+
+    def __init__(self, job, max_epochs, start=0.1, end=0.9):
+        self.job = job
+        self.max_epochs = max(int(max_epochs), 1)
+        self.start = start
+        self.end = end
+
+    def on_epoch_end(self, epoch, logs=None):
+        loss = (logs or {}).get("loss")
+        message = f"epoch {epoch + 1}/{self.max_epochs}" + (f", loss {loss:.4f}" if loss is not None else "")
+        self.job.progress(self.start + (self.end - self.start) * (epoch + 1) / self.max_epochs, message)
+        self.job.check_cancelled()
+
+
+def _run_job(job_dir, func, args, kwargs):
+    status_path = os.path.join(job_dir, "status.json")
+    status = _read_json(status_path)
+    job = JobContext(job_dir)
+    if job.cancelled():
+        _write_json(status_path, status | {"state": CANCELLED, "finished_at": time.time()})
+        return CANCELLED
+
+    _write_json(status_path, status | {"state": RUNNING, "started_at": time.time(), "pid": os.getpid()})
+    job.progress(0.0, "starting")
+    try:
+        result = func(*args, job=job, **kwargs)
+    except JobCancelled:
+        state, error = CANCELLED, None
+    except Exception as exc:  # reported to the page, the worker stays alive
+        state, error = FAILED, f"{type(exc).__name__}: {exc}"
+    else:
+        with open(os.path.join(job_dir, "result.pkl.tmp"), "wb") as fh:
+            pickle.dump(result, fh)
+        os.replace(os.path.join(job_dir, "result.pkl.tmp"), os.path.join(job_dir, "result.pkl"))
+        state, error = DONE, None
+        job.progress(1.0, "finished")
+
+    _write_json(status_path, status | {
+        "state": state, "error": error, "started_at": _read_json(status_path).get("started_at"),
+        "finished_at": time.time(),
+    })
+    return state
+
+
+# -------------------- MANAGER --------------------
+class JobManager:
+    """
+    Background training jobs on a spawn process pool.
+
+    Every job gets an id and a directory holding status.json, progress.json, a
+    cancel flag and, once finished, result.pkl, so pages can poll a job across
+    reruns and still read its result after the session that submitted it is gone.
+    At most max_pending jobs may be queued or running; a second submit for a key
+    that is already in flight returns the existing job instead of a new one.
+    The manager is shared by every session, so the pool, the job table and the
+    in-flight keys are only touched under one (re-entrant) lock.
+    """
+
+    def __init__(self, root=None, max_workers=MAX_WORKERS, max_pending=MAX_PENDING):
+        self.root = root or default_jobs_dir()
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pool = None
+        self._futures = {}
+        self._inflight = {}
+        self._lock = threading.RLock()
+
+    def _job_dir(self, job_id):
+        return os.path.join(self.root, job_id)
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=mp.get_context("spawn"))
+            return self._pool
+
+    def active_jobs(self):
+        with self._lock:
+            job_ids = list(self._futures)
+        return [job_id for job_id in job_ids if self.status(job_id)["state"] in ACTIVE_STATES]
+
+    def submit(self, key, func, *args, label=None, **kwargs):
+        """Queue func(*args, job=JobContext, **kwargs); returns the job id."""
+        key = json.dumps(key, default=str)
+        with self._lock:
+            job_id = self._inflight.get(key)
+            if job_id is not None and self.status(job_id)["state"] in ACTIVE_STATES:
+                return job_id
+            if len(self.active_jobs()) >= self.max_pending:
+                raise QueueFull(f"{self.max_pending} training jobs are already queued or running. Try again shortly.")
+
+            job_id = uuid.uuid4().hex[:12]
+            job_dir = self._job_dir(job_id)
+            os.makedirs(job_dir, exist_ok=True)
+            _write_json(os.path.join(job_dir, "status.json"), {
+                "job_id": job_id, "key": key, "label": label or key, "state": QUEUED, "submitted_at": time.time(),
+            })
+            self._futures[job_id] = self._executor().submit(_run_job, job_dir, func, args, kwargs)
+            self._inflight[key] = job_id
+            return job_id
+
+    def status(self, job_id):
+        job_dir = self._job_dir(job_id)
+        status = _read_json(os.path.join(job_dir, "status.json"))
+        if not status:
+            return {"job_id": job_id, "state": LOST, "progress": 0.0, "message": "unknown job"}
+        progress = _read_json(os.path.join(job_dir, "progress.json"))
+        status["progress"] = progress.get("fraction", 0.0)
+        status["message"] = progress.get("message", "")
+
+        future = self._futures.get(job_id)
+        if status["state"] in ACTIVE_STATES:
+            if future is None:
+                status["state"] = LOST
+            elif future.done():
+                # The worker process died without writing its final state
+                exc = future.exception() if not future.cancelled() else None
+                status["state"] = CANCELLED if future.cancelled() else FAILED
+                status["error"] = f"{type(exc).__name__}: {exc}" if exc else None
+        return status
+
+    def result(self, job_id):
+        result_path = os.path.join(self._job_dir(job_id), "result.pkl")
+        if not os.path.exists(result_path):
+            return None
+        with open(result_path, "rb") as fh:
+            return pickle.load(fh)
+
+    def cancel(self, job_id):
+        job_dir = self._job_dir(job_id)
+        open(os.path.join(job_dir, "cancel"), "w").close()
+        with self._lock:
+            future = self._futures.get(job_id)
+            cancelled = future is not None and future.cancel()
+        if cancelled:
+            status_path = os.path.join(job_dir, "status.json")
+            _write_json(status_path, _read_json(status_path) | {"state": CANCELLED, "finished_at": time.time()})
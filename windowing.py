@@ -0,0 +1,122 @@
+import numpy as np
+
+# -------------------- CONFIG --------------------
+TARGET_CHANNEL = 0
+FEATURE_CHANNELS = [
+    "Discount Applied (%)",
+    "Stock Level",
+    "Price_per_Unit (USD)",
+    "Lead Time (days)",
+]
+
+
+# -------------------- WINDOW VIEWS --------------------
+def as_series_tensor(values):
+    """Normalise (weeks,), (weeks, channels) or (series, weeks, channels) input to 3-D."""
+    values = np.asarray(values)
+    if values.ndim == 1:
+        return values[None, :, None]
+    if values.ndim == 2:
+        return values[None, :, :]
+    return values
+
+
+class WindowSet:
+    """
+    Sliding (input, target) windows over many series and channels.
+
+    The windows are a strided view over the original (series, weeks, channels)
+    array, so building them allocates nothing per window. Samples are only
+    materialised by gather(): arrays() copies every valid window into one
+    (n, time_steps, channels) training array with a single fancy index instead
+    of appending windows one by one.
+    """
+
+    def __init__(self, values, time_steps, horizon=1, active=None, target_channel=TARGET_CHANNEL):
+        self.values = as_series_tensor(values)
+        self.time_steps = time_steps
+        self.horizon = horizon
+        self.target_channel = target_channel
+        n_series, n_weeks, _ = self.values.shape
+        span = time_steps + horizon
+
+        if n_weeks < span:
+            self.view = np.empty((n_series, 0, self.values.shape[2], span), dtype=self.values.dtype)
+            self.series_idx = np.empty(0, dtype=np.int64)
+            self.start_idx = np.empty(0, dtype=np.int64)
+            return
+
+        # (series, n_windows, channels, span) -- a view, no copy
+        self.view = np.lib.stride_tricks.sliding_window_view(self.values, span, axis=1)
+        valid = np.ones(self.view.shape[:2], dtype=bool)
+        if active is not None:
+            active = np.asarray(active, dtype=bool).reshape(n_series, n_weeks)
+            valid = np.lib.stride_tricks.sliding_window_view(active, span, axis=1).all(axis=-1)
+        self.series_idx, self.start_idx = np.nonzero(valid)  # series-major order
+
+    def __len__(self):
+        return len(self.series_idx)
+
+    def gather(self, idx=None):
+        """X (n, time_steps, channels), y (n,) or (n, horizon) and series ids for the given samples."""
+        s = self.series_idx if idx is None else self.series_idx[idx]
+        w = self.start_idx if idx is None else self.start_idx[idx]
+        samples = self.view[s, w]                                    # (n, channels, span)
+        X = samples[:, :, :self.time_steps].transpose(0, 2, 1)
+        y = samples[:, self.target_channel, self.time_steps:]
+        if self.horizon == 1:
+            y = y[:, 0]
+        return X, y, s.astype(np.int32)
+
+    def arrays(self):
+        return self.gather()
+
+
+def sliding_windows(values, time_steps, horizon=1):
+    """Drop-in for the old list-append window loop: X (n, time_steps, channels), y."""
+    X, y, _ = WindowSet(values, time_steps, horizon).arrays()
+    return X, y
+
+
+# -------------------- FEATURES --------------------
+def minmax_channels(values, axis=0):
+    """Scale each channel to [0, 1]; constant channels map to 0. Returns scaled, min, range."""
+    values = np.asarray(values, dtype=np.float64)
+    col_min = values.min(axis=axis, keepdims=True)
+    col_range = values.max(axis=axis, keepdims=True) - col_min
+    col_range = np.where(col_range > 0, col_range, 1.0)
+    return (values - col_min) / col_range, col_min, col_range
+
+
+class ChannelScaler:
+    """MinMaxScaler-compatible fit_transform/inverse_transform on minmax_channels (no sklearn import)."""
+
+    def __init__(self):
+        self.data_min_ = None
+        self.data_range_ = None
+
+    def fit_transform(self, values):
+        scaled, self.data_min_, self.data_range_ = minmax_channels(values)
+        return scaled
+
+    def transform(self, values):
+        return (np.asarray(values, dtype=np.float64) - self.data_min_) / self.data_range_
+
+    def inverse_transform(self, scaled):
+        return np.asarray(scaled, dtype=np.float64) * self.data_range_ + self.data_min_
+
+
+# -------------------- METRICS --------------------
+def ape(actual, pred):
+    """Elementwise absolute percentage error, |pred - actual| / max(|actual|, eps) as sklearn computes it."""
+    actual = np.asarray(actual, dtype=np.float64)
+    pred = np.asarray(pred, dtype=np.float64).reshape(actual.shape)
+    return np.abs(pred - actual) / np.maximum(np.abs(actual), np.finfo(np.float64).eps)
+
+
+def mape(actual, pred):
+    """
+    sklearn's mean_absolute_percentage_error along axis 0: a scalar for 1-D input,
+    one value per column (multioutput="raw_values") for 2-D input.
+    """
+    return ape(actual, pred).mean(axis=0)